@@ -1 +1,24 @@
-# app/__init__.py
\ No newline at end of file
+# app/__init__.py
+import os
+
+
+def create_app(config_object=None):
+    """创建Flask应用实例，供迁移脚本、命令行任务和后台任务使用
+    
+    配置与app.py保持一致：相同的模板/静态目录、数据库和API蓝图。
+    """
+    from flask import Flask
+    from config import Config
+    from app.models import db
+    from app.api import api_bp
+    
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    app = Flask(
+        __name__,
+        template_folder=os.path.join(base_dir, 'templates'),
+        static_folder=os.path.join(base_dir, 'static')
+    )
+    app.config.from_object(config_object or Config)
+    db.init_app(app)
+    app.register_blueprint(api_bp, url_prefix='/api')
+    return app
@@ -1,24 +1,44 @@
-from flask import request, jsonify
+from flask import request, jsonify, make_response
 from app.api import api_bp
 from app.hot_analysis.analyzer import HotnessAnalyzer
+from app.hot_analysis.snapshot import hot_rank_snapshots
+from app.hot_analysis.cache import analysis_cache
+from app.hot_analysis.sentiment import sentiment_distribution
+from app.hot_analysis.charts import CHART_FORMATS, TREND_CHARTS, chart_key, chart_service
+from app.hot_analysis.trending import get_trending_terms
 from app.models import AnalysisResult
+from config import Config
 import logging
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+def _days_arg(default=7):
+    """分析天数参数（天数同时是各类缓存的键），不是1到ANALYSIS_MAX_DAYS之间的整数时返回None"""
+    try:
+        days = int(request.args.get('days', default))
+    except ValueError:
+        return None
+    return days if 1 <= days <= Config.ANALYSIS_MAX_DAYS else None
+
+def _invalid_days():
+    return jsonify({
+        'code': 400,
+        'data': {},
+        'message': f'days必须是1到{Config.ANALYSIS_MAX_DAYS}之间的整数'
+    })
+
 # 分析热度
 @api_bp.route('/analysis/hotness', methods=['GET'])
 def analyze_hotness():
     try:
         # 获取分析天数
-        days = int(request.args.get('days', 7))
+        days = _days_arg()
+        if days is None:
+            return _invalid_days()
         
-        # 创建分析器实例
-        analyzer = HotnessAnalyzer()
-        
-        # 执行热度分析
-        result = analyzer.analyze_hotness(days=days)
+        # 读取缓存的热度分析结果（不保存分析结果）
+        result = analysis_cache.get(days)
         
         if not result:
             return jsonify({
@@ -41,21 +61,22 @@ def analyze_hotness():
             'message': '热度分析失败'
         })
 
-# 获取热度排行榜
+# 获取热度排行榜（从物化的排行榜快照中读取）
 @api_bp.route('/analysis/hot-rank', methods=['GET'])
 def get_hot_rank():
     try:
         # 获取查询参数
-        limit = int(request.args.get('limit', 20))
-        days = int(request.args.get('days', 7))
+        limit = min(int(request.args.get('limit', 20)), Config.HOT_RANK_SNAPSHOT_SIZE)
+        days = _days_arg()
+        if days is None:
+            return _invalid_days()
+        collapse = request.args.get('collapse', 'false').lower() == 'true'
+        category = request.args.get('category')
+        source = request.args.get('source')
         
-        # 创建分析器实例
-        analyzer = HotnessAnalyzer()
+        snapshot = hot_rank_snapshots.get(days=days, category=category, source=source, collapse_duplicates=collapse)
         
-        # 执行热度分析
-        result = analyzer.analyze_hotness(days=days)
-        
-        if not result or 'top_news' not in result:
+        if not snapshot['top_news']:
             return jsonify({
                 'code': 404,
                 'data': {},
@@ -63,13 +84,29 @@ def get_hot_rank():
             })
         
         # 获取前N条
-        top_news = result['top_news'][:limit]
+        top_news = snapshot['top_news'][:limit]
+        if snapshot['mode'] == 'log':
+            # 展示分数随时间连续衰减，按当前时间换算
+            analyzer = HotnessAnalyzer()
+            now = datetime.utcnow()
+            top_news = [
+                dict(item, hotness_score=analyzer.hot_log_display_score(
+                    item['hot_log_score'], now,
+                    engaged=bool(item['view_count'] or item['comment_count'] or item['share_count'])
+                ))
+                for item in top_news
+            ]
         
         return jsonify({
             'code': 200,
             'data': {
                 'top_news': top_news,
                 'limit': limit,
+                'collapse': collapse,
+                'category': category,
+                'source': source,
+                'mode': snapshot['mode'],
+                'generated_at': snapshot['generated_at'],
                 'analysis_period': f'过去{days}天'
             },
             'message': '获取热度排行榜成功'
@@ -88,14 +125,13 @@ def get_hot_rank():
 def get_hotness_trend():
     try:
         # 获取查询参数
-        days = int(request.args.get('days', 7))
+        days = _days_arg()
+        if days is None:
+            return _invalid_days()
         trend_type = request.args.get('type', 'hourly')  # hourly, daily
         
-        # 创建分析器实例
-        analyzer = HotnessAnalyzer()
-        
-        # 执行热度分析
-        result = analyzer.analyze_hotness(days=days)
+        # 读取缓存的热度趋势（只读取小时热度汇总表）
+        result = analysis_cache.get(days, 'trend')
         
         if not result or 'trend_data' not in result:
             return jsonify({
@@ -116,6 +152,7 @@ def get_hotness_trend():
             'data': {
                 'trend_data': trend_data,
                 'trend_type': trend_type,
+                'generated_at': result['analyzed_at'],
                 'analysis_period': f'过去{days}天'
             },
             'message': '获取热度趋势成功'
@@ -129,18 +166,66 @@ def get_hotness_trend():
             'message': '获取热度趋势失败'
         })
 
+# 获取热度趋势图
+@api_bp.route('/analysis/trend/chart', methods=['GET'])
+def get_hotness_trend_chart():
+    try:
+        # 获取查询参数
+        days = _days_arg()
+        if days is None:
+            return _invalid_days()
+        trend_type = request.args.get('type', 'hourly')  # hourly, daily
+        fmt = request.args.get('format', 'png')  # png, svg
+        if trend_type not in TREND_CHARTS or fmt not in CHART_FORMATS:
+            return jsonify({
+                'code': 400,
+                'data': {},
+                'message': '不支持的图表类型或格式'
+            })
+        
+        result = analysis_cache.get(days, 'trend')
+        points = (result.get('trend_data') or {}).get(trend_type) if result else None
+        if not points:
+            return jsonify({
+                'code': 404,
+                'data': {},
+                'message': f'过去{days}天内没有新闻数据'
+            })
+        
+        # 图表按趋势数据的哈希缓存，哈希同时作为ETag；数据未变时直接返回304，不读取或绘制图表
+        key = chart_key(points, trend_type, fmt)
+        if key in request.if_none_match:
+            response = make_response('', 304)
+            response.set_etag(key)
+            response.cache_control.no_cache = True
+            return response
+        
+        key, content = chart_service.get(points, trend_type, fmt)
+        response = make_response(content)
+        response.mimetype = CHART_FORMATS[fmt]
+        response.set_etag(key)
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+        
+    except Exception as e:
+        logger.error(f'Error rendering hotness trend chart: {e}')
+        return jsonify({
+            'code': 500,
+            'data': {},
+            'message': '生成热度趋势图失败'
+        })
+
 # 获取分类热度
 @api_bp.route('/analysis/category', methods=['GET'])
 def get_category_hotness():
     try:
         # 获取查询参数
-        days = int(request.args.get('days', 7))
-        
-        # 创建分析器实例
-        analyzer = HotnessAnalyzer()
+        days = _days_arg()
+        if days is None:
+            return _invalid_days()
         
-        # 执行热度分析
-        result = analyzer.analyze_hotness(days=days)
+        # 读取缓存的热度分析结果（不保存分析结果）
+        result = analysis_cache.get(days)
         
         if not result or 'category_data' not in result:
             return jsonify({
@@ -153,6 +238,7 @@ def get_category_hotness():
             'code': 200,
             'data': {
                 'category_data': result['category_data'],
+                'generated_at': result['analyzed_at'],
                 'analysis_period': f'过去{days}天'
             },
             'message': '获取分类热度成功'
@@ -166,6 +252,99 @@ def get_category_hotness():
             'message': '获取分类热度失败'
         })
 
+# 获取情感分布
+@api_bp.route('/analysis/sentiment', methods=['GET'])
+def get_sentiment_distribution():
+    try:
+        # 获取查询参数
+        days = _days_arg()
+        if days is None:
+            return _invalid_days()
+        
+        # 按存储的情感分数统计（分数由python -m app.hot_analysis.sentiment写回）
+        result = sentiment_distribution(days)
+        
+        if not result['total_news_count']:
+            return jsonify({
+                'code': 404,
+                'data': {},
+                'message': f'过去{days}天内没有新闻数据'
+            })
+        
+        return jsonify({
+            'code': 200,
+            'data': dict(result, analysis_period=f'过去{days}天'),
+            'message': '获取情感分布成功'
+        })
+        
+    except Exception as e:
+        logger.error(f'Error getting sentiment distribution: {e}')
+        return jsonify({
+            'code': 500,
+            'data': {},
+            'message': '获取情感分布失败'
+        })
+
+# 获取突发热词
+@api_bp.route('/analysis/trending-terms', methods=['GET'])
+def get_trending_terms_rank():
+    try:
+        # 获取查询参数
+        limit = min(int(request.args.get('limit', 20)), Config.TRENDING_CANDIDATES)
+        
+        # 进程内的滑动窗口计数，先追赶新入库的新闻
+        detector = get_trending_terms()
+        terms = detector.top_terms(limit)
+        
+        return jsonify({
+            'code': 200,
+            'data': dict(
+                detector.stats(),
+                terms=terms,
+                generated_at=datetime.utcnow().isoformat()
+            ),
+            'message': '获取突发热词成功'
+        })
+        
+    except Exception as e:
+        logger.error(f'Error getting trending terms: {e}')
+        return jsonify({
+            'code': 500,
+            'data': {},
+            'message': '获取突发热词失败'
+        })
+
+# 获取故事热度排行
+@api_bp.route('/analysis/stories', methods=['GET'])
+def get_story_rank():
+    try:
+        # 获取查询参数
+        days = _days_arg()
+        if days is None:
+            return _invalid_days()
+        limit = min(int(request.args.get('limit', 20)), 100)
+        
+        # 按入库时分配的故事簇聚合成员新闻的热度和互动数据
+        analyzer = HotnessAnalyzer()
+        stories = analyzer.top_stories(days, limit)
+        
+        return jsonify({
+            'code': 200,
+            'data': {
+                'analysis_period': f'过去{days}天',
+                'stories': stories
+            },
+            'message': '获取故事热度排行成功'
+        })
+        
+    except Exception as e:
+        logger.error(f'Error getting story rank: {e}')
+        return jsonify({
+            'code': 500,
+            'data': {},
+            'message': '获取故事热度排行失败'
+        })
+
 # 获取历史分析结果
 @api_bp.route('/analysis/history', methods=['GET'])
 def get_analysis_history():
@@ -1,7 +1,11 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from app.api import api_bp
-from app.models import News
-from app.news_fetcher.fetcher import NewsFetcher
+from sqlalchemy import or_
+from app.models import News, RelatedNews
+from app.news_fetcher.jobs import refresh_jobs
+from app.hot_analysis.generation import data_generation
+from app.hot_analysis.rollup import RollupDeltas
+from config import Config
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,10 +21,15 @@ def get_news_list():
         category = request.args.get('category')
         sort_by = request.args.get('sort_by', 'publish_time')
         order = request.args.get('order', 'desc')
+        collapse = request.args.get('collapse', 'false').lower() == 'true'
         
         # 构建查询
         query = News.query
         
+        # 合并近似重复的新闻，只保留每个故事的首篇
+        if collapse:
+            query = query.filter(or_(News.story_id.is_(None), News.story_id == News.id))
+        
         # 按来源过滤
         if source:
             query = query.filter_by(source=source)
@@ -31,10 +40,12 @@ def get_news_list():
         
         # 排序
         if sort_by == 'hotness':
+            # 对数热度模式下按不随时间变化的对数热度分数排序
+            hotness_column = News.hot_log_score if Config.HOTNESS_MODE == 'log' else News.hotness_score
             if order == 'desc':
-                query = query.order_by(News.hotness_score.desc())
+                query = query.order_by(hotness_column.desc())
             else:
-                query = query.order_by(News.hotness_score.asc())
+                query = query.order_by(hotness_column.asc())
         else:
             if order == 'desc':
                 query = query.order_by(News.publish_time.desc())
@@ -80,10 +91,15 @@ def get_news_detail(news_id):
                 'message': '新闻不存在'
             })
         
-        # 增加浏览量
-        news.view_count += 1
+        # 增加浏览量，并标记等待重算热度；与互动数据接口相同，计数变化时更新数据代数
+        news.view_count = (news.view_count or 0) + 1
+        news.hotness_dirty = True
+        rollup = RollupDeltas()
+        rollup.add(news.source, news.category, news.publish_time, view_sum=1)
+        rollup.apply()
         from app.models import db
         db.session.commit()
+        data_generation.bump()
         
         return jsonify({
             'code': 200,
@@ -99,23 +115,77 @@ def get_news_detail(news_id):
             'message': '获取新闻详情失败'
         })
 
-# 刷新新闻
-@api_bp.route('/news/refresh', methods=['POST'])
-def refresh_news():
+# 获取相关新闻
+@api_bp.route('/news/<int:news_id>/related', methods=['GET'])
+def get_related_news(news_id):
     try:
-        # 创建新闻抓取器实例
-        fetcher = NewsFetcher()
+        limit = min(int(request.args.get('limit', Config.RELATED_NEWS_LIMIT)), 50)
         
-        # 抓取新闻
-        news_list = fetcher.fetch_all_news()
+        # 相关新闻在入库时预先计算，这里只按news_id读取一次
+        rows = News.query.with_entities(
+            News.id, News.title, News.url, News.source, News.category, News.publish_time, RelatedNews.score
+        ).join(
+            RelatedNews, RelatedNews.related_id == News.id
+        ).filter(
+            RelatedNews.news_id == news_id
+        ).order_by(RelatedNews.score.desc(), RelatedNews.related_id).limit(limit).all()
+        
+        if not rows and not News.query.get(news_id):
+            return jsonify({
+                'code': 404,
+                'data': {},
+                'message': '新闻不存在'
+            })
         
         return jsonify({
             'code': 200,
             'data': {
-                'fetched_count': len(news_list),
-                'message': f'成功抓取{len(news_list)}条新闻'
+                'news_id': news_id,
+                'items': [
+                    {
+                        'id': row.id,
+                        'title': row.title,
+                        'url': row.url,
+                        'source': row.source,
+                        'category': row.category,
+                        'publish_time': row.publish_time.isoformat() if row.publish_time else None,
+                        'score': row.score
+                    }
+                    for row in rows
+                ]
             },
-            'message': '刷新新闻成功'
+            'message': '获取相关新闻成功'
+        })
+        
+    except Exception as e:
+        logger.error(f'Error getting related news: {e}')
+        return jsonify({
+            'code': 500,
+            'data': {},
+            'message': '获取相关新闻失败'
+        })
+
+# 刷新新闻（后台任务）
+@api_bp.route('/news/refresh', methods=['POST'])
+def refresh_news():
+    try:
+        # 是否忽略抓取间隔，强制抓取所有启用的来源
+        data = request.get_json(silent=True) or {}
+        force = bool(data.get('force')) or request.args.get('force', 'false').lower() == 'true'
+        
+        # 提交后台刷新任务，已有任务运行时合并到该任务；强制刷新可能排在当前任务之后
+        job, created = refresh_jobs.submit(current_app._get_current_object(), force=force)
+        if job.status == 'queued' and job.force:
+            message = '已有刷新任务正在运行，强制刷新将在其结束后执行'
+        elif created:
+            message = '刷新任务已提交'
+        else:
+            message = '已有刷新任务正在运行，请求已合并'
+        
+        return jsonify({
+            'code': 200,
+            'data': job.to_dict(),
+            'message': message
         })
         
     except Exception as e:
@@ -126,6 +196,32 @@ def refresh_news():
             'message': '刷新新闻失败'
         })
 
+# 获取刷新任务状态
+@api_bp.route('/news/refresh/<job_id>', methods=['GET'])
+def get_refresh_job(job_id):
+    try:
+        job = refresh_jobs.get(job_id)
+        if not job:
+            return jsonify({
+                'code': 404,
+                'data': {},
+                'message': '刷新任务不存在'
+            })
+        
+        return jsonify({
+            'code': 200,
+            'data': job.to_dict(),
+            'message': '获取刷新任务状态成功'
+        })
+        
+    except Exception as e:
+        logger.error(f'Error getting refresh job: {e}')
+        return jsonify({
+            'code': 500,
+            'data': {},
+            'message': '获取刷新任务状态失败'
+        })
+
 # 更新新闻互动数据
 @api_bp.route('/news/<int:news_id>/interact', methods=['POST'])
 def update_news_interaction(news_id):
@@ -144,16 +240,29 @@ def update_news_interaction(news_id):
         comment_count = data.get('comment_count', 0)
         share_count = data.get('share_count', 0)
         
-        # 更新互动数据
-        if view_count > 0:
-            news.view_count = view_count
-        if comment_count > 0:
-            news.comment_count = comment_count
-        if share_count > 0:
-            news.share_count = share_count
+        # 只更新大于0且与原值不同的计数，变化量计入小时热度汇总；
+        # 有计数变化时才标记等待重算热度并更新数据代数，重复提交相同数据不会使缓存失效
+        deltas = {}
+        for column, value in (('view_count', view_count), ('comment_count', comment_count),
+                              ('share_count', share_count)):
+            current = getattr(news, column) or 0
+            if value > 0 and value != current:
+                deltas[column] = value - current
+                setattr(news, column, value)
         
-        from app.models import db
-        db.session.commit()
+        if deltas:
+            news.hotness_dirty = True
+            rollup = RollupDeltas()
+            rollup.add(
+                news.source, news.category, news.publish_time,
+                view_sum=deltas.get('view_count'),
+                comment_sum=deltas.get('comment_count'),
+                share_sum=deltas.get('share_count')
+            )
+            rollup.apply()
+            from app.models import db
+            db.session.commit()
+            data_generation.bump()
         
         return jsonify({
             'code': 200,
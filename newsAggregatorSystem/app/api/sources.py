@@ -1,9 +1,11 @@
 from flask import request, jsonify
 from app.api import api_bp
-from app.models import NewsSource
+from app.models import NewsSource, HostBreaker
 from app.models import db
 import logging
 from app.news_fetcher.fetcher import init_news_sources
+from app.news_fetcher.transport import get_transport
+from app.news_fetcher.scheduler import CrawlScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -100,6 +102,8 @@ def update_source_interval(source_id):
         
         if crawl_interval and isinstance(crawl_interval, int) and crawl_interval > 0:
             source.crawl_interval = crawl_interval
+            # 从新的基准间隔重新开始自适应调度
+            CrawlScheduler().reset(source)
             db.session.commit()
             
             return jsonify({
@@ -107,7 +111,8 @@ def update_source_interval(source_id):
                 'data': {
                     'source_id': source.id,
                     'name': source.name,
-                    'crawl_interval': source.crawl_interval
+                    'crawl_interval': source.crawl_interval,
+                    'next_crawl_time': source.next_crawl_time.isoformat() if source.next_crawl_time else None
                 },
                 'message': f'{source.name}的抓取间隔已更新为{source.crawl_interval}分钟'
             })
@@ -162,6 +167,7 @@ def get_sources_status():
         sources = NewsSource.query.all()
         
         # 转换为状态格式
+        scheduler = CrawlScheduler()
         status_data = []
         for source in sources:
             status_data.append({
@@ -170,14 +176,24 @@ def get_sources_status():
                 'enabled': source.enabled,
                 'crawl_status': source.crawl_status,
                 'last_crawl_time': source.last_crawl_time.isoformat() if source.last_crawl_time else None,
-                'error_message': source.error_message
+                'error_message': source.error_message,
+                'schedule': scheduler.state(source),
+                'breaker': {
+                    'state': source.breaker_state or 'closed',
+                    'consecutive_failures': source.breaker_failures or 0,
+                    'open_until': source.breaker_open_until.isoformat() if source.breaker_open_until else None
+                }
             })
         
+        # 正文页等其他主机的断路器状态
+        hosts = [row.to_dict() for row in HostBreaker.query.order_by(HostBreaker.host).all()]
+        
         return jsonify({
             'code': 200,
             'data': {
                 'status_list': status_data,
-                'total': len(status_data)
+                'total': len(status_data),
+                'hosts': hosts
             },
             'message': '获取新闻来源状态成功'
         })
@@ -188,4 +204,22 @@ def get_sources_status():
             'code': 500,
             'data': {},
             'message': '获取新闻来源状态失败'
-        })
\ No newline at end of file
+        })
+
+# 获取抓取传输层的连接复用统计
+@api_bp.route('/sources/transport', methods=['GET'])
+def get_transport_stats():
+    try:
+        return jsonify({
+            'code': 200,
+            'data': get_transport().stats(),
+            'message': '获取传输层统计成功'
+        })
+        
+    except Exception as e:
+        logger.error(f'Error getting transport stats: {e}')
+        return jsonify({
+            'code': 500,
+            'data': {},
+            'message': '获取传输层统计失败'
+        })
@@ -1,102 +1,550 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime, timedelta
+import heapq
 import logging
-from app.models import db, News, AnalysisResult
+import math
+from sqlalchemy import Date, bindparam, extract, func, or_, select
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models import db, News, AnalysisResult, HotnessRollup
+from app.hot_analysis.rollup import RollupDeltas, bucket_of
+from app.hot_analysis.sentiment import SentimentEngine, write_sentiment_scores
+from app.hot_analysis.charts import render_trend_chart
 from config import Config
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# 配置matplotlib中文显示
-plt.rcParams['font.sans-serif'] = ['SimHei']  # 用来正常显示中文标签
-plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
+# 时间衰减阶梯：(发布后小时数上限, 衰减因子)，72小时以上为TIME_DECAY_FLOOR
+TIME_DECAY_STEPS = [(1, 1.0), (6, 0.8), (24, 0.5), (72, 0.3)]
+TIME_DECAY_FLOOR = 0.1
 
 class HotnessAnalyzer:
     def __init__(self):
         self.hotness_weight = Config.HOTNESS_WEIGHT
         self.trend_weight = Config.TREND_WEIGHT
     
-    def analyze_hotness(self, days=7):
-        """分析新闻热度"""
+    def analyze_hotness(self, days=7, collapse_duplicates=False, stream=False):
+        """分析新闻热度，写回热度分数并保存分析结果（由定时任务调用）
+        
+        collapse_duplicates为True时，近似重复的新闻在排行榜中只保留热度最高的一条。
+        stream为True时使用内存占用恒定的stream_hotness_analysis，不写回热度分数。
+        接口的查询使用compute_hotness_analysis，只读取存储的热度分数，不写数据库。
+        """
         try:
-            # 获取指定天数内的新闻
-            end_date = datetime.utcnow()
-            start_date = end_date - timedelta(days=days)
-            
-            news_list = News.query.filter(
-                News.publish_time >= start_date,
-                News.publish_time <= end_date
-            ).all()
-            
-            if not news_list:
-                logger.warning(f'No news found in the last {days} days')
+            if stream:
+                result = self.stream_hotness_analysis(days, collapse_duplicates)
+            else:
+                result = self.compute_hotness_analysis(days, collapse_duplicates, rescore=True)
+            if not result:
                 return {}
             
-            # 计算热度
-            hot_news = []
-            for news in news_list:
-                hotness_score = self.calculate_hotness(news)
-                news.hotness_score = hotness_score
-                db.session.commit()
-                
-                hot_news.append({
-                    'id': news.id,
-                    'title': news.title,
-                    'source': news.source,
-                    'publish_time': news.publish_time,
-                    'hotness_score': hotness_score,
-                    'view_count': news.view_count,
-                    'comment_count': news.comment_count,
-                    'share_count': news.share_count,
-                    'category': news.category
-                })
-            
-            # 按热度排序
-            hot_news.sort(key=lambda x: x['hotness_score'], reverse=True)
-            
-            # 生成热度排行榜
-            top_news = hot_news[:20]  # 取前20条
-            
-            # 分析热度趋势
-            trend_data = self.analyze_hotness_trend(news_list)
-            
-            # 分析分类热度
-            category_data = self.analyze_category_hotness(news_list)
-            
             # 存储分析结果
             analysis_result = AnalysisResult(
                 analysis_type='hotness',
-                analysis_date=end_date.date(),
+                analysis_date=datetime.fromisoformat(result['analyzed_at']).date(),
                 result_data={
-                    'top_news': top_news,
-                    'trend_data': trend_data,
-                    'category_data': category_data,
-                    'total_news_count': len(news_list),
-                    'analysis_period': f'{start_date.date()} to {end_date.date()}'
+                    'top_news': result['top_news'],
+                    'trend_data': result['trend_data'],
+                    'category_data': result['category_data'],
+                    'total_news_count': result['total_news_count'],
+                    'analysis_period': result['analysis_period']
                 },
-                summary=f'共分析{len(news_list)}条新闻，生成热度排行榜前20条'
+                summary=f'共分析{result["total_news_count"]}条新闻，生成热度排行榜前20条'
             )
             
             db.session.add(analysis_result)
             db.session.commit()
             
-            logger.info(f'Analyzed hotness for {len(news_list)} news articles')
-            
             return {
-                'top_news': top_news,
-                'trend_data': trend_data,
-                'category_data': category_data,
-                'total_news_count': len(news_list)
+                'top_news': result['top_news'],
+                'trend_data': result['trend_data'],
+                'category_data': result['category_data'],
+                'total_news_count': result['total_news_count']
             }
             
         except Exception as e:
             logger.error(f'Error analyzing hotness: {e}')
+            db.session.rollback()
             return {}
     
+    def compute_hotness_analysis(self, days=7, collapse_duplicates=False, rescore=False):
+        """计算热度排行榜、趋势和分类热度，没有新闻时返回空字典
+        
+        排行榜、趋势和分类热度都由数据库按存储的分数排序和聚合，不把整个时间窗口读入内存。
+        rescore为True时（定时任务）先让存储的热度分数保持最新，增量模式下只重算到期的
+        新闻；接口的读取路径不重算，也不写数据库。
+        """
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days)
+        updated = self.ensure_scores(start_date, end_date) if rescore else 0
+        
+        window = (News.publish_time >= start_date, News.publish_time <= end_date)
+        total = db.session.query(func.count(News.id)).filter(*window).scalar()
+        if not total:
+            logger.warning(f'No news found in the last {days} days')
+            return {}
+        
+        top_news = self.top_hot_news(
+            days=days, limit=20, collapse_duplicates=collapse_duplicates,
+            now=end_date, log_mode=False, refresh=False
+        )
+        trend_data = self.analyze_hotness_trend(start_date, end_date)
+        category_data = self.analyze_category_hotness(start_date, end_date)
+        
+        logger.info(f'Analyzed hotness for {total} news articles, {updated} scores updated')
+        
+        return {
+            'top_news': top_news,  # 前20条
+            'trend_data': trend_data,
+            'category_data': category_data,
+            'total_news_count': total,
+            'analysis_period': f'{start_date.date()} to {end_date.date()}',
+            'analyzed_at': end_date.isoformat()
+        }
+    
+    def compute_hotness_trend(self, days=7):
+        """只计算热度趋势，没有新闻时返回空字典
+        
+        只读取小时热度汇总表，不扫描也不重算新闻；汇总的热度随入库和定时任务的重算更新。
+        """
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days)
+        
+        total = db.session.query(func.sum(HotnessRollup.news_count)).filter(
+            HotnessRollup.bucket >= bucket_of(start_date),
+            HotnessRollup.bucket <= end_date
+        ).scalar()
+        if not total:
+            logger.warning(f'No news found in the last {days} days')
+            return {}
+        
+        return {
+            'trend_data': self.analyze_hotness_trend(start_date, end_date),
+            'total_news_count': int(total),
+            'analysis_period': f'{start_date.date()} to {end_date.date()}',
+            'analyzed_at': end_date.isoformat()
+        }
+    
+    def stream_hotness_analysis(self, days=7, collapse_duplicates=False, top_n=20, chunk_size=None):
+        """流式计算热度分析，结果格式与compute_hotness_analysis相同，没有新闻时返回空字典
+        
+        通过服务器端游标按块读取时间窗口内的新闻，逐块按当前时间批量计算热度分数，只保留
+        按小时/日期和分类的累计值、前top_n条（合并重复时为前top_n个故事）的有界堆，以及
+        每个分类前5条的堆，内存占用不随窗口增大。不读取也不写回存储的热度分数。
+        """
+        chunk_size = chunk_size or Config.ANALYSIS_STREAM_CHUNK_SIZE
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days)
+        
+        statement = select(
+            News.id, News.title, News.source, News.publish_time, News.view_count,
+            News.comment_count, News.share_count, News.category, News.story_id
+        ).where(
+            News.publish_time >= start_date,
+            News.publish_time <= end_date
+        ).order_by(News.id).execution_options(yield_per=chunk_size)
+        
+        total = 0
+        hourly = {}  # 小时 -> [热度和, 新闻数]
+        daily = {}  # 日期 -> [热度和, 新闻数]
+        categories = {}  # 分类 -> {'count', 'total_hotness', 'heap'}，按首条新闻的ID顺序插入
+        top_heap = []  # (热度, -ID, 条目)的小顶堆
+        top_stories = {}  # 合并重复时：故事ID -> 该故事热度最高的条目
+        
+        for rows in db.session.execute(statement).partitions():
+            scores = self.calculate_hotness_batch(rows, now=end_date)
+            for row, score in zip(rows, scores):
+                total += 1
+                hour_bucket = hourly.setdefault(row.publish_time.hour, [0.0, 0])
+                hour_bucket[0] += score
+                hour_bucket[1] += 1
+                day_bucket = daily.setdefault(row.publish_time.date(), [0.0, 0])
+                day_bucket[0] += score
+                day_bucket[1] += 1
+                
+                category = categories.setdefault(
+                    row.category or '其他', {'count': 0, 'total_hotness': 0.0, 'heap': []}
+                )
+                category['count'] += 1
+                category['total_hotness'] += score
+                self._push_bounded(category['heap'], 5, (score, -row.id, row.id, row.title))
+                
+                rank_key = (score, -row.id)
+                if collapse_duplicates:
+                    story_id = row.story_id or row.id
+                    best = top_stories.get(story_id)
+                    if best is not None:
+                        if rank_key > best[0]:
+                            top_stories[story_id] = (rank_key, self._stream_item(row, score))
+                    elif len(top_stories) < top_n:
+                        top_stories[story_id] = (rank_key, self._stream_item(row, score))
+                    else:
+                        weakest = min(top_stories, key=lambda key: top_stories[key][0])
+                        if rank_key > top_stories[weakest][0]:
+                            del top_stories[weakest]
+                            top_stories[story_id] = (rank_key, self._stream_item(row, score))
+                elif len(top_heap) < top_n or rank_key > top_heap[0][:2]:
+                    self._push_bounded(top_heap, top_n, (score, -row.id, self._stream_item(row, score)))
+        
+        if not total:
+            logger.warning(f'No news found in the last {days} days')
+            return {}
+        
+        if collapse_duplicates:
+            ranked = sorted(top_stories.values(), key=lambda entry: entry[0], reverse=True)
+            top_news = [item for _, item in ranked]
+            if top_news:
+                self.count_story_duplicates(top_news, start_date, end_date)
+        else:
+            top_news = [entry[2] for entry in sorted(top_heap, key=lambda entry: entry[:2], reverse=True)]
+        
+        category_data = []
+        for name, category in categories.items():
+            hot_news = sorted(category['heap'], reverse=True)
+            category_data.append({
+                'category': name,
+                'count': category['count'],
+                'average_hotness': round(category['total_hotness'] / category['count'], 2),
+                'total_hotness': round(category['total_hotness'], 2),
+                'hot_news': [
+                    {'id': news_id, 'title': title, 'hotness_score': score}
+                    for score, _, news_id, title in hot_news
+                ]
+            })
+        category_data.sort(key=lambda x: x['average_hotness'], reverse=True)
+        
+        logger.info(f'Streamed hotness analysis over {total} news articles')
+        
+        return {
+            'top_news': top_news,
+            'trend_data': {
+                'hourly': [
+                    {'hour': hour, 'average_hotness': value[0] / value[1]}
+                    for hour, value in sorted(hourly.items())
+                ],
+                'daily': [
+                    {'date': date.isoformat(), 'average_hotness': value[0] / value[1]}
+                    for date, value in sorted(daily.items())
+                ]
+            },
+            'category_data': category_data,
+            'total_news_count': total,
+            'analysis_period': f'{start_date.date()} to {end_date.date()}',
+            'analyzed_at': end_date.isoformat()
+        }
+    
+    def _push_bounded(self, heap, size, entry):
+        """把entry放入最多保留size个最大元素的小顶堆"""
+        if len(heap) < size:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    
+    def _stream_item(self, row, hotness_score):
+        return {
+            'id': row.id,
+            'title': row.title,
+            'source': row.source,
+            'publish_time': row.publish_time.isoformat(),
+            'hotness_score': hotness_score,
+            'view_count': row.view_count,
+            'comment_count': row.comment_count,
+            'share_count': row.share_count,
+            'category': row.category,
+            'story_id': row.story_id or row.id
+        }
+    
+    def ensure_scores(self, start_date, end_date):
+        """使存储的热度分数对end_date时刻保持最新，返回重算的新闻数
+        
+        增量模式只重算到期的新闻；关闭增量模式时批量重算窗口内全部新闻并写回变化的分数
+        （包括对数热度分数）。
+        """
+        if Config.HOTNESS_INCREMENTAL:
+            return self.refresh_hotness(now=end_date)
+        
+        query = db.session.query(
+            News.id, News.title, News.source, News.publish_time, News.view_count,
+            News.comment_count, News.share_count, News.category, News.hotness_score, News.hot_log_score
+        ).filter(
+            News.publish_time >= start_date,
+            News.publish_time <= end_date
+        )
+        updated = 0
+        for rows in self._id_chunks(query):
+            scores = self.calculate_hotness_batch(rows, now=end_date)
+            log_scores = self.calculate_hot_log_score_batch(rows)
+            changed = [
+                (row, {'news_id': row.id, 'hotness_score': score, 'hot_log_score': log_score})
+                for row, score, log_score in zip(rows, scores, log_scores)
+                if row.hotness_score != score or row.hot_log_score != log_score
+            ]
+            updated += self.write_rescored([row for row, _ in changed], [values for _, values in changed])
+        return updated
+    
+    def refresh_hotness(self, now=None, include_due=True):
+        """增量重算热度，返回重算的新闻数
+        
+        只重算被标记为脏（互动数据变化、新入库）或已跨越时间衰减阶梯的新闻，
+        并记录每条新闻下次跨越阶梯的时间；超过最后一个阶梯的新闻不再因时间变化重算。
+        对数热度分数只随互动数据变化，同时写回；include_due为False时只重算脏新闻。
+        按ID分块读取和提交，迁移后首次全量重算时内存占用也不随新闻数增长。
+        """
+        now = now or datetime.utcnow()
+        condition = or_(News.hotness_dirty.is_(True), News.hotness_dirty.is_(None))
+        if include_due:
+            condition = or_(condition, News.hotness_due_at < now)
+        query = db.session.query(
+            News.id, News.title, News.source, News.publish_time, News.view_count,
+            News.comment_count, News.share_count, News.category, News.hotness_score
+        ).filter(condition)
+        
+        total = 0
+        for rows in self._id_chunks(query):
+            scores = self.calculate_hotness_batch(rows, now=now)
+            log_scores = self.calculate_hot_log_score_batch(rows)
+            total += self.write_rescored(rows, [
+                {
+                    'news_id': row.id,
+                    'hotness_score': score,
+                    'hot_log_score': log_score,
+                    'hotness_dirty': False,
+                    'hotness_due_at': self.next_decay_time(row.publish_time, now)
+                }
+                for row, score, log_score in zip(rows, scores, log_scores)
+            ])
+        return total
+    
+    def _id_chunks(self, query, chunk_size=None):
+        """按ID升序分块执行查询（键集分页），每块处理完后可直接写回和提交"""
+        chunk_size = chunk_size or Config.ANALYSIS_STREAM_CHUNK_SIZE
+        last_id = 0
+        while True:
+            rows = query.filter(News.id > last_id).order_by(News.id).limit(chunk_size).all()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1].id
+    
+    def top_hot_news(self, days=7, limit=20, category=None, source=None, collapse_duplicates=False, now=None,
+                     log_mode=None, refresh=True):
+        """按存储的热度分数取热度排行榜前limit条（合并重复时为前limit个故事）
+        
+        先增量重算到期的新闻，之后存储的分数即为最新，排行榜由带索引的ORDER BY ... LIMIT
+        直接取出，不扫描整个时间窗口。HOTNESS_MODE为log时按对数热度分数排序，只需重算
+        互动数据变化的新闻；条目带hot_log_score，hotness_score为换算出的0-100展示分数。
+        分数相同时按ID升序。log_mode默认取决于HOTNESS_MODE；refresh为False时由调用方负责重算。
+        """
+        now = now or datetime.utcnow()
+        start_date = now - timedelta(days=days)
+        if log_mode is None:
+            log_mode = Config.HOTNESS_MODE == 'log'
+        if refresh:
+            self.refresh_hotness(now=now, include_due=not log_mode)
+        
+        score_column = News.hot_log_score if log_mode else News.hotness_score
+        query = db.session.query(
+            News.id, News.title, News.source, News.publish_time, News.view_count, News.comment_count,
+            News.share_count, News.category, News.story_id, score_column.label('score')
+        ).filter(
+            News.publish_time >= start_date,
+            News.publish_time <= now,
+            score_column.isnot(None)
+        )
+        if category:
+            query = query.filter(News.category == category)
+        if source:
+            query = query.filter(News.source == source)
+        query = query.order_by(score_column.desc(), News.id)
+        
+        # 合并重复时按页多取，直到凑够limit个故事
+        page_size = limit * 2 if collapse_duplicates else limit
+        hot_news = []
+        offset = 0
+        while True:
+            rows = query.offset(offset).limit(page_size).all()
+            offset += len(rows)
+            for row in rows:
+                item = {
+                    'id': row.id,
+                    'title': row.title,
+                    'source': row.source,
+                    'publish_time': row.publish_time.isoformat(),
+                    'hotness_score': self.hot_log_display_score(
+                        row.score, now, engaged=bool(row.view_count or row.comment_count or row.share_count)
+                    ) if log_mode else row.score,
+                    'view_count': row.view_count,
+                    'comment_count': row.comment_count,
+                    'share_count': row.share_count,
+                    'category': row.category,
+                    'story_id': row.story_id or row.id
+                }
+                if log_mode:
+                    item['hot_log_score'] = row.score
+                hot_news.append(item)
+            if not collapse_duplicates:
+                return hot_news
+            top_news = self.collapse_stories(hot_news)
+            if len(top_news) >= limit or len(rows) < page_size:
+                break
+        
+        top_news = top_news[:limit]
+        if top_news:
+            self.count_story_duplicates(top_news, start_date, now, category, source)
+        return top_news
+    
+    def count_story_duplicates(self, top_news, start_date, end_date, category=None, source=None):
+        """按时间窗口内（及分类、来源过滤后）的全部新闻重新统计每个故事的重复数"""
+        story_ids = [item['story_id'] for item in top_news]
+        query = db.session.query(News.story_id, func.count(News.id)).filter(
+            News.story_id.in_(story_ids),
+            News.publish_time >= start_date,
+            News.publish_time <= end_date
+        )
+        if category:
+            query = query.filter(News.category == category)
+        if source:
+            query = query.filter(News.source == source)
+        counts = dict(query.group_by(News.story_id).all())
+        for item in top_news:
+            item['duplicate_count'] = max(counts.get(item['story_id'], 1) - 1, 0)
+    
+    def top_stories(self, days=7, limit=20, now=None):
+        """按故事簇聚合时间窗口内的新闻，返回故事热度前limit的故事
+        
+        故事热度为成员存储的热度分数之和，互动数据为成员之和；每个故事附带热度前3的成员新闻，
+        以热度最高的成员标题作为故事标题。分数相同时按簇ID升序。只读取，不重算热度分数。
+        """
+        now = now or datetime.utcnow()
+        start_date = now - timedelta(days=days)
+        
+        window = (News.publish_time >= start_date, News.publish_time <= now)
+        cluster = func.coalesce(News.cluster_id, News.id)
+        story_hotness = func.sum(News.hotness_score)
+        stories = db.session.query(
+            cluster.label('cluster_id'),
+            func.count(News.id).label('news_count'),
+            func.count(func.distinct(News.source)).label('source_count'),
+            story_hotness.label('story_hotness'),
+            func.max(News.hotness_score).label('max_hotness'),
+            func.sum(News.view_count).label('view_count'),
+            func.sum(News.comment_count).label('comment_count'),
+            func.sum(News.share_count).label('share_count'),
+            func.min(News.publish_time).label('first_time'),
+            func.max(News.publish_time).label('last_time')
+        ).filter(*window).group_by(cluster).order_by(story_hotness.desc(), cluster).limit(limit).all()
+        if not stories:
+            return []
+        
+        # 用窗口函数取每个故事热度前3的成员
+        ranked = db.session.query(
+            News.id, News.title, News.source, News.publish_time, News.hotness_score,
+            cluster.label('cluster_id'),
+            func.row_number().over(
+                partition_by=cluster,
+                order_by=(News.hotness_score.desc(), News.id)
+            ).label('rank')
+        ).filter(*window, cluster.in_([row.cluster_id for row in stories])).subquery()
+        member_rows = db.session.query(ranked).filter(ranked.c.rank <= 3).order_by(
+            ranked.c.cluster_id, ranked.c.rank
+        ).all()
+        
+        members = {}
+        for row in member_rows:
+            members.setdefault(row.cluster_id, []).append({
+                'id': row.id,
+                'title': row.title,
+                'source': row.source,
+                'publish_time': row.publish_time.isoformat(),
+                'hotness_score': row.hotness_score
+            })
+        
+        result = []
+        for row in stories:
+            top_members = members.get(row.cluster_id, [])
+            result.append({
+                'cluster_id': row.cluster_id,
+                'title': top_members[0]['title'] if top_members else '',
+                'news_count': row.news_count,
+                'source_count': row.source_count,
+                'story_hotness': round(row.story_hotness or 0, 2),
+                'max_hotness': round(row.max_hotness or 0, 2),
+                'view_count': row.view_count or 0,
+                'comment_count': row.comment_count or 0,
+                'share_count': row.share_count or 0,
+                'first_time': row.first_time.isoformat(),
+                'last_time': row.last_time.isoformat(),
+                'news': top_members
+            })
+        return result
+    
+    def next_decay_time(self, publish_time, now=None):
+        """新闻下次跨越时间衰减阶梯的时间，已超过最后一个阶梯时返回None"""
+        now = now or datetime.utcnow()
+        hours_since_publish = (now - publish_time).total_seconds() / 3600
+        for hours, _ in TIME_DECAY_STEPS:
+            if hours_since_publish <= hours:
+                return publish_time + timedelta(hours=hours)
+        return None
+    
+    def write_rescored(self, rows, updates):
+        """条件写回重算结果，把实际写入的分数变化累加到小时热度汇总，最后统一提交，返回写入的新闻数
+        
+        updates与rows一一对应，每项包含news_id和要更新的列（含hotness_score）。UPDATE以读取时的
+        热度分数为条件，并发的重算（刷新任务、定时任务或其他工作进程）已先写入的新闻不再更新，
+        其分数变化也不会重复累加。驱动能报告executemany的总影响行数时按块批量写入，
+        全部命中即可；否则（或有新闻被并发改写时）回滚后逐条写入，按各自的影响行数累加。
+        """
+        if not updates:
+            return 0
+        table = News.__table__
+        statement = table.update().where(
+            table.c.id == bindparam('news_id'),
+            func.coalesce(table.c.hotness_score, -1.0) == bindparam('old_score')
+        ).values(**{column: bindparam(column) for column in updates[0] if column != 'news_id'})
+        params = [dict(values, old_score=-1.0 if row.hotness_score is None else row.hotness_score)
+                  for row, values in zip(rows, updates)]
+        
+        applied = None
+        if db.engine.dialect.supports_sane_multi_rowcount:
+            chunk_size = Config.HOTNESS_UPDATE_CHUNK_SIZE
+            matched = sum(
+                db.session.execute(statement, params[start:start + chunk_size]).rowcount
+                for start in range(0, len(params), chunk_size)
+            )
+            if matched == len(params):
+                applied = list(zip(rows, updates))
+            else:
+                db.session.rollback()
+        if applied is None:
+            applied = [
+                (row, values) for row, values, param in zip(rows, updates, params)
+                if db.session.execute(statement, param).rowcount == 1
+            ]
+        
+        rollup = RollupDeltas()
+        for row, values in applied:
+            if row.hotness_score != values['hotness_score']:
+                rollup.add(row.source, row.category, row.publish_time,
+                           hotness_sum=values['hotness_score'] - (row.hotness_score or 0))
+        rollup.apply()
+        db.session.commit()
+        return len(applied)
+    
+    def collapse_stories(self, hot_news):
+        """按故事ID合并已按热度排序的新闻，每个故事保留热度最高的一条并记录重复数"""
+        stories = {}
+        collapsed = []
+        for item in hot_news:
+            story = stories.get(item['story_id'])
+            if story is None:
+                story = dict(item, duplicate_count=0)
+                stories[item['story_id']] = story
+                collapsed.append(story)
+            else:
+                story['duplicate_count'] += 1
+        return collapsed
+    
     def calculate_hotness(self, news):
         """计算新闻热度分数"""
         # 基础热度分数 = 浏览量 * 0.1 + 评论数 * 0.3 + 分享数 * 0.6
@@ -119,27 +567,114 @@ class HotnessAnalyzer:
         
         return round(hotness_score, 2)
     
+    def calculate_hotness_batch(self, rows, now=None):
+        """批量计算热度分数，结果与逐条调用calculate_hotness一致
+        
+        rows需提供view_count、comment_count、share_count、publish_time、source和title属性。
+        各因子用NumPy数组一次算出，乘法顺序与calculate_hotness相同；最后逐个用round
+        保留两位小数，与Python内置round的舍入结果保持一致。
+        """
+        import numpy as np  # 延迟导入，只服务新闻接口或抓取的进程无需加载
+        
+        if not rows:
+            return []
+        now = now or datetime.utcnow()
+        
+        base_score, source_weight, title_weight = self._engagement_arrays(rows)
+        
+        # 与timedelta.total_seconds()相同：整数微秒差除以10^6
+        elapsed_us = (np.datetime64(now, 'us') - self._publish_times(rows)).astype(np.int64)
+        hours_since_publish = (elapsed_us / 1e6) / 3600
+        time_factor = np.select(
+            [hours_since_publish <= hours for hours, _ in TIME_DECAY_STEPS],
+            [factor for _, factor in TIME_DECAY_STEPS],
+            default=TIME_DECAY_FLOOR
+        )
+        
+        hotness_score = base_score * time_factor * source_weight * title_weight
+        hotness_score = np.minimum(hotness_score, 100)
+        
+        return [round(score, 2) for score in hotness_score.tolist()]
+    
+    def calculate_hot_log_score_batch(self, rows):
+        """批量计算以发布时间为锚点的对数热度分数
+        
+        分数 = log10(max(互动量, 1)) + (发布时间 - HOT_LOG_EPOCH) / HOT_LOG_DECAY_HOURS，
+        其中互动量为不含时间衰减的热度（基础热度 × 来源权重 × 标题权重）。
+        晚发布HOT_LOG_DECAY_HOURS小时相当于互动量多一个数量级，两篇新闻的先后顺序
+        只随互动数据变化，不随时间推移改变。
+        """
+        import numpy as np
+        
+        if not rows:
+            return []
+        base_score, source_weight, title_weight = self._engagement_arrays(rows)
+        magnitude = np.maximum(base_score * source_weight * title_weight, 1.0)
+        
+        anchor_us = (self._publish_times(rows) - np.datetime64(Config.HOT_LOG_EPOCH, 'us')).astype(np.int64)
+        log_score = np.log10(magnitude) + (anchor_us / 1e6) / (Config.HOT_LOG_DECAY_HOURS * 3600)
+        return log_score.tolist()
+    
+    def calculate_hot_log_score(self, news):
+        """计算单条新闻的对数热度分数，与calculate_hot_log_score_batch一致（入库时使用）"""
+        base_score = ((news.view_count or 0) * 0.1) + ((news.comment_count or 0) * 0.3) + \
+            ((news.share_count or 0) * 0.6)
+        magnitude = max(
+            base_score * self.get_source_weight(news.source) * self.calculate_title_weight_by_length(len(news.title)),
+            1.0
+        )
+        anchor_us = (news.publish_time - Config.HOT_LOG_EPOCH) // timedelta(microseconds=1)
+        return math.log10(magnitude) + (anchor_us / 1e6) / (Config.HOT_LOG_DECAY_HOURS * 3600)
+    
+    def hot_log_display_score(self, hot_log_score, now=None, engaged=True):
+        """把对数热度分数换算为当前时间的0-100展示分数（互动量按发布时长连续衰减）
+        
+        对数分数把零互动按互动量1计算；engaged为False（浏览、评论、分享均为0）时
+        展示分数为0，与阶梯衰减模式一致。
+        """
+        if not engaged:
+            return 0.0
+        now = now or datetime.utcnow()
+        elapsed_hours = (now - Config.HOT_LOG_EPOCH).total_seconds() / 3600
+        display = 10 ** (hot_log_score - elapsed_hours / Config.HOT_LOG_DECAY_HOURS)
+        return round(min(display, 100), 2)
+    
+    def _publish_times(self, rows):
+        import pandas as pd
+        
+        return pd.DatetimeIndex([row.publish_time for row in rows]).values.astype('datetime64[us]')
+    
+    def _engagement_arrays(self, rows):
+        """批量计算基础热度、来源权重和标题权重数组"""
+        import numpy as np
+        
+        views = np.array([row.view_count or 0 for row in rows], dtype=np.float64)
+        comments = np.array([row.comment_count or 0 for row in rows], dtype=np.float64)
+        shares = np.array([row.share_count or 0 for row in rows], dtype=np.float64)
+        base_score = (views * 0.1) + (comments * 0.3) + (shares * 0.6)
+        
+        # 来源和标题长度的取值很少，先按取值算好权重再逐行查表
+        sources = [row.source for row in rows]
+        weights = {source: self.get_source_weight(source) for source in set(sources)}
+        source_weight = np.fromiter((weights[source] for source in sources), np.float64, len(rows))
+        
+        lengths = np.fromiter((len(row.title) for row in rows), np.int64, len(rows))
+        length_weights = np.array([self.calculate_title_weight_by_length(length)
+                                   for length in range(int(lengths.max()) + 1)])
+        title_weight = length_weights[lengths]
+        
+        return base_score, source_weight, title_weight
+    
     def calculate_time_factor(self, publish_time):
         """计算时间衰减因子"""
         now = datetime.utcnow()
         hours_since_publish = (now - publish_time).total_seconds() / 3600
         
-        # 时间衰减函数：指数衰减
-        # 1小时内：1.0
-        # 1-6小时：0.8
-        # 6-24小时：0.5
-        # 24-72小时：0.3
-        # 72小时以上：0.1
-        if hours_since_publish <= 1:
-            return 1.0
-        elif hours_since_publish <= 6:
-            return 0.8
-        elif hours_since_publish <= 24:
-            return 0.5
-        elif hours_since_publish <= 72:
-            return 0.3
-        else:
-            return 0.1
+        # 时间衰减函数：阶梯衰减，见TIME_DECAY_STEPS
+        for hours, factor in TIME_DECAY_STEPS:
+            if hours_since_publish <= hours:
+                return factor
+        return TIME_DECAY_FLOOR
     
     def get_source_weight(self, source):
         """获取来源权重"""
@@ -153,8 +688,10 @@ class HotnessAnalyzer:
     
     def calculate_title_weight(self, title):
         """计算标题权重"""
-        title_length = len(title)
-        
+        return self.calculate_title_weight_by_length(len(title))
+    
+    def calculate_title_weight_by_length(self, title_length):
+        """按标题长度计算标题权重"""
         # 标题长度在15-30字之间的权重较高
         if 15 <= title_length <= 30:
             return 1.2
@@ -165,93 +702,84 @@ class HotnessAnalyzer:
         else:
             return 0.7
     
-    def analyze_hotness_trend(self, news_list):
-        """分析热度趋势"""
-        # 按小时分组分析热度
-        df = pd.DataFrame([
-            {
-                'hour': news.publish_time.hour,
-                'hotness': self.calculate_hotness(news),
-                'date': news.publish_time.date()
-            }
-            for news in news_list
-        ])
+    def analyze_hotness_trend(self, start_date, end_date):
+        """按小时和日期汇总时间窗口内的平均热度
         
-        if df.empty:
-            return []
+        只读取小时热度汇总表中的桶，代价与窗口内的桶数成正比；窗口起点按整点对齐。
+        """
+        window = (HotnessRollup.bucket >= bucket_of(start_date), HotnessRollup.bucket <= end_date)
+        average = (func.sum(HotnessRollup.hotness_sum) / func.sum(HotnessRollup.news_count)).label('average_hotness')
         
         # 按小时计算平均热度
-        hourly_trend = df.groupby('hour')['hotness'].mean().reset_index()
-        hourly_trend = hourly_trend.sort_values('hour')
-        
-        # 转换为列表格式
-        trend_data = []
-        for _, row in hourly_trend.iterrows():
-            trend_data.append({
-                'hour': int(row['hour']),
-                'average_hotness': float(row['hotness'])
-            })
+        hour = extract('hour', HotnessRollup.bucket)
+        hourly_rows = db.session.query(hour.label('hour'), average).filter(
+            *window, HotnessRollup.news_count > 0
+        ).group_by(hour).order_by(hour).all()
+        
+        trend_data = [
+            {'hour': int(row.hour), 'average_hotness': float(row.average_hotness)}
+            for row in hourly_rows
+        ]
         
         # 按日期分析热度趋势
-        daily_trend = df.groupby('date')['hotness'].mean().reset_index()
-        daily_trend = daily_trend.sort_values('date')
-        
-        daily_trend_data = []
-        for _, row in daily_trend.iterrows():
-            daily_trend_data.append({
-                'date': row['date'].isoformat(),
-                'average_hotness': float(row['hotness'])
-            })
+        date = func.date(HotnessRollup.bucket, type_=Date)
+        daily_rows = db.session.query(date.label('date'), average).filter(
+            *window, HotnessRollup.news_count > 0
+        ).group_by(date).order_by(date).all()
+        
+        daily_trend_data = [
+            {'date': row.date.isoformat(), 'average_hotness': float(row.average_hotness)}
+            for row in daily_rows
+        ]
         
         return {
             'hourly': trend_data,
             'daily': daily_trend_data
         }
     
-    def analyze_category_hotness(self, news_list):
-        """分析分类热度"""
-        # 按分类分组分析热度
-        category_dict = {}
+    def analyze_category_hotness(self, start_date, end_date):
+        """按分类聚合时间窗口内存储的热度分数，每个分类附带热度前5的新闻"""
+        window = (News.publish_time >= start_date, News.publish_time <= end_date)
+        category = func.coalesce(func.nullif(News.category, ''), '其他')
         
-        for news in news_list:
-            category = news.category or '其他'
-            if category not in category_dict:
-                category_dict[category] = {
-                    'count': 0,
-                    'total_hotness': 0,
-                    'news_list': []
-                }
-            
-            category_dict[category]['count'] += 1
-            category_dict[category]['total_hotness'] += news.hotness_score
-            category_dict[category]['news_list'].append(news)
+        # 分类统计；平均热度相同时按分类首条新闻的ID排序
+        stats = db.session.query(
+            category.label('category'),
+            func.count(News.id).label('count'),
+            func.sum(News.hotness_score).label('total_hotness'),
+            func.min(News.id).label('first_id')
+        ).filter(*window).group_by(category).all()
+        
+        # 用窗口函数取每个分类热度前5的新闻
+        ranked = db.session.query(
+            News.id, News.title, News.hotness_score,
+            category.label('category'),
+            func.row_number().over(
+                partition_by=category,
+                order_by=(News.hotness_score.desc(), News.id)
+            ).label('rank')
+        ).filter(*window).subquery()
+        top_rows = db.session.query(ranked).filter(ranked.c.rank <= 5).order_by(
+            ranked.c.category, ranked.c.rank
+        ).all()
+        
+        hot_news_by_category = {}
+        for row in top_rows:
+            hot_news_by_category.setdefault(row.category, []).append({
+                'id': row.id,
+                'title': row.title,
+                'hotness_score': row.hotness_score
+            })
         
-        # 计算每个分类的平均热度
         category_data = []
-        for category, data in category_dict.items():
-            avg_hotness = data['total_hotness'] / data['count'] if data['count'] > 0 else 0
-            
-            # 获取每个分类的热门新闻
-            hot_news_in_category = sorted(
-                data['news_list'],
-                key=lambda x: x.hotness_score,
-                reverse=True
-            )[:5]  # 每个分类取前5条
-            
-            hot_news_list = []
-            for news in hot_news_in_category:
-                hot_news_list.append({
-                    'id': news.id,
-                    'title': news.title,
-                    'hotness_score': news.hotness_score
-                })
-            
+        for row in sorted(stats, key=lambda row: row.first_id):
+            total_hotness = row.total_hotness or 0
             category_data.append({
-                'category': category,
-                'count': data['count'],
-                'average_hotness': round(avg_hotness, 2),
-                'total_hotness': round(data['total_hotness'], 2),
-                'hot_news': hot_news_list
+                'category': row.category,
+                'count': row.count,
+                'average_hotness': round(total_hotness / row.count, 2) if row.count > 0 else 0,
+                'total_hotness': round(total_hotness, 2),
+                'hot_news': hot_news_by_category.get(row.category, [])
             })
         
         # 按平均热度排序
@@ -260,7 +788,10 @@ class HotnessAnalyzer:
         return category_data
     
     def generate_hotness_chart(self, trend_data, output_path=None):
-        """生成热度趋势图表"""
+        """生成24小时热度趋势图表，保存到output_path或返回PNG的BytesIO
+        
+        使用独立的Agg Figure绘制，不经过pyplot全局状态；接口使用带缓存的chart_service。
+        """
         try:
             # 准备数据
             hourly_data = trend_data.get('hourly', [])
@@ -268,59 +799,35 @@ class HotnessAnalyzer:
                 logger.warning('No hourly trend data available')
                 return None
             
-            hours = [item['hour'] for item in hourly_data]
-            hotness_values = [item['average_hotness'] for item in hourly_data]
-            
-            # 创建图表
-            plt.figure(figsize=(12, 6))
-            sns.lineplot(x=hours, y=hotness_values, marker='o')
-            plt.title('24小时热度趋势', fontsize=16)
-            plt.xlabel('小时', fontsize=12)
-            plt.ylabel('平均热度', fontsize=12)
-            plt.xticks(range(0, 24, 2))
-            plt.grid(True, linestyle='--', alpha=0.7)
-            plt.tight_layout()
+            content = render_trend_chart(hourly_data, 'hourly', 'png')
             
             # 保存图表
             if output_path:
-                plt.savefig(output_path)
+                with open(output_path, 'wb') as f:
+                    f.write(content)
                 logger.info(f'Saved hotness trend chart to {output_path}')
                 return output_path
             else:
                 # 如果没有指定输出路径，返回图表数据
                 import io
-                buffer = io.BytesIO()
-                plt.savefig(buffer, format='png')
-                buffer.seek(0)
-                return buffer
+                return io.BytesIO(content)
         
         except Exception as e:
             logger.error(f'Error generating hotness chart: {e}')
             return None
     
     def analyze_sentiment(self, news_list):
-        """分析新闻情感倾向"""
-        # 简单的情感分析实现
-        # 实际项目中可以使用更复杂的NLP模型
-        positive_words = ['好', '优秀', '成功', '上涨', '创新', '进步', '胜利', '高兴', '繁荣']
-        negative_words = ['坏', '失败', '下跌', '危机', '问题', '困难', '错误', '悲伤', '衰退']
+        """分析新闻情感倾向，批量写回情感分数并一次提交
         
+        打分使用情感词典编译的多模式匹配引擎；大批量打分请使用sentiment.score_news。
+        """
+        engine = SentimentEngine()
         sentiment_data = []
         
         for news in news_list:
-            text = news.title + ' ' + news.content
-            positive_count = sum(1 for word in positive_words if word in text)
-            negative_count = sum(1 for word in negative_words if word in text)
-            
-            # 计算情感分数：(正面词数 - 负面词数) / (总词数 + 1)
-            total_words = len(text) // 2  # 粗略估计词数
-            sentiment_score = (positive_count - negative_count) / (total_words + 1)
-            sentiment_score = max(-1, min(1, sentiment_score))  # 限制在-1到1之间
-            
-            # 更新新闻的情感分数
-            news.sentiment_score = sentiment_score
-            db.session.commit()
-            
+            sentiment_score, positive_count, negative_count = engine.score(news.title, news.content)
+            # 只更新内存中的值，数据库由下面的批量UPDATE写回
+            set_committed_value(news, 'sentiment_score', sentiment_score)
             sentiment_data.append({
                 'id': news.id,
                 'title': news.title,
@@ -329,10 +836,16 @@ class HotnessAnalyzer:
                 'negative_count': negative_count
             })
         
+        write_sentiment_scores([
+            {'news_id': item['id'], 'sentiment_score': item['sentiment_score']} for item in sentiment_data
+        ])
+        db.session.commit()
+        
         # 分析情感分布
-        positive_news = [item for item in sentiment_data if item['sentiment_score'] > 0.1]
-        negative_news = [item for item in sentiment_data if item['sentiment_score'] < -0.1]
-        neutral_news = [item for item in sentiment_data if -0.1 <= item['sentiment_score'] <= 0.1]
+        threshold = Config.SENTIMENT_THRESHOLD
+        positive_news = [item for item in sentiment_data if item['sentiment_score'] > threshold]
+        negative_news = [item for item in sentiment_data if item['sentiment_score'] < -threshold]
+        neutral_news = [item for item in sentiment_data if -threshold <= item['sentiment_score'] <= threshold]
         
         return {
             'sentiment_data': sentiment_data,
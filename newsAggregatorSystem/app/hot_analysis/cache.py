@@ -0,0 +1,77 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+from app.hot_analysis.analyzer import HotnessAnalyzer
+from app.hot_analysis.generation import data_generation
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """热度分析结果的进程内缓存
+
+    每个(天数, 种类)缓存一份计算结果及其计算时的数据代数：hotness为完整的
+    compute_hotness_analysis，trend只计算读取小时汇总表的热度趋势。
+    新闻入库或互动数据变化使代数改变后重新计算，数据不变时最多缓存ANALYSIS_CACHE_TTL秒
+    （阶梯衰减分数会随时间变化）。计算只读取存储的热度分数，不写数据库，
+    同一键的并发请求只计算一次。最多缓存ANALYSIS_CACHE_MAX_ENTRIES个结果，
+    超出时淘汰最久未使用的。
+    """
+
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = Config.ANALYSIS_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries or Config.ANALYSIS_CACHE_MAX_ENTRIES
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    KINDS = ('hotness', 'trend')
+
+    def get(self, days=7, kind='hotness'):
+        """返回分析结果，没有新闻时返回空字典"""
+        if kind not in self.KINDS:
+            raise ValueError(f'kind must be one of {self.KINDS}')
+        key = (days, kind)
+        generation = data_generation.current()
+        entry = self._fresh(key, generation)
+        if entry is not None:
+            return entry['result']
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            entry = self._fresh(key, generation)
+            if entry is not None:
+                return entry['result']
+            analyzer = HotnessAnalyzer()
+            if kind == 'trend':
+                result = analyzer.compute_hotness_trend(days)
+            else:
+                result = analyzer.compute_hotness_analysis(days)
+            with self._lock:
+                self._entries[key] = {
+                    'generation': generation,
+                    'created': time.monotonic(),
+                    'result': result
+                }
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._build_locks.pop(evicted, None)
+            return result
+
+    def _fresh(self, key, generation):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None or entry['generation'] != generation:
+            return None
+        if time.monotonic() - entry['created'] >= self.ttl:
+            return None
+        return entry
+
+
+analysis_cache = AnalysisCache()
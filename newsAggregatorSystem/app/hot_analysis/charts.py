@@ -0,0 +1,187 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 支持的图片格式及其MIME类型
+CHART_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# 各趋势类型的横轴字段和标题
+TREND_CHARTS = {
+    'hourly': {'x': 'hour', 'title': '24小时热度趋势', 'xlabel': '小时'},
+    'daily': {'x': 'date', 'title': '每日热度趋势', 'xlabel': '日期'}
+}
+
+
+def render_trend_chart(points, trend_type='hourly', fmt='png'):
+    """用独立的Figure对象和Agg画布绘制热度趋势图，返回图片字节
+
+    不使用pyplot的全局状态，可在多个线程或进程中同时调用；图表绘制完即释放。
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    chart = TREND_CHARTS[trend_type]
+    xs = [item[chart['x']] for item in points]
+    ys = [item['average_hotness'] for item in points]
+
+    with _chart_style():
+        figure = Figure(figsize=(12, 6))
+        FigureCanvasAgg(figure)
+        ax = figure.add_subplot()
+        ax.plot(xs, ys, marker='o')
+        ax.set_title(chart['title'], fontsize=16)
+        ax.set_xlabel(chart['xlabel'], fontsize=12)
+        ax.set_ylabel('平均热度', fontsize=12)
+        if trend_type == 'hourly':
+            ax.set_xticks(range(0, 24, 2))
+        else:
+            ax.tick_params(axis='x', labelrotation=45)
+        ax.grid(True, linestyle='--', alpha=0.7)
+        figure.tight_layout()
+
+        buffer = io.BytesIO()
+        figure.savefig(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def _chart_style():
+    """中文字体设置，只作用于本次绘图"""
+    import matplotlib
+
+    return matplotlib.rc_context({
+        'font.sans-serif': ['SimHei'] + matplotlib.rcParams['font.sans-serif'],  # 用来正常显示中文标签
+        'axes.unicode_minus': False  # 用来正常显示负号
+    })
+
+
+def chart_key(points, trend_type, fmt):
+    """图表内容的哈希：趋势数据和参数相同时得到相同的键（同时用作ETag）"""
+    payload = json.dumps([trend_type, fmt, points], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ChartService:
+    """在进程池中绘制趋势图，按数据哈希缓存到实例目录
+
+    相同数据的图表只绘制一次，并发请求共享同一个绘制任务；缓存文件供所有工作进程复用，
+    超过CHART_CACHE_MAX_FILES个时删除最早的文件。
+    """
+
+    DIR_NAME = 'charts'
+
+    def __init__(self, workers=None, max_files=None):
+        self.workers = workers or Config.CHART_WORKERS
+        self.max_files = max_files or Config.CHART_CACHE_MAX_FILES
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, points, trend_type='hourly', fmt='png'):
+        """返回(键, 图片字节)"""
+        if trend_type not in TREND_CHARTS:
+            raise ValueError(f'trend_type must be one of {tuple(TREND_CHARTS)}')
+        if fmt not in CHART_FORMATS:
+            raise ValueError(f'fmt must be one of {tuple(CHART_FORMATS)}')
+
+        key = chart_key(points, trend_type, fmt)
+        path = self._path(key, fmt)
+        content = self._load(path)
+        if content is not None:
+            return key, content
+
+        try:
+            content = self._render(key, points, trend_type, fmt)
+        except BrokenProcessPool:
+            # 子进程异常退出后进程池不可再用，换一个新的进程池重试一次
+            logger.warning('Chart worker process died, restarting the pool')
+            content = self._render(key, points, trend_type, fmt)
+        self._save(path, content)
+        return key, content
+
+    def _render(self, key, points, trend_type, fmt):
+        """在进程池中绘制，相同键的并发请求共享同一个任务；进程池已损坏时将其丢弃"""
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                executor = self._pool()
+                try:
+                    pending = (executor.submit(render_trend_chart, points, trend_type, fmt), executor)
+                except BrokenProcessPool:
+                    self._discard(executor)
+                    raise
+                self._pending[key] = pending
+        future, executor = pending
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            with self._lock:
+                self._discard(executor)
+            raise
+        finally:
+            with self._lock:
+                if self._pending.get(key) is pending:
+                    del self._pending[key]
+
+    def _pool(self):
+        """按需创建进程池（需持有self._lock）
+
+        Web工作进程中已有其他线程在运行，fork出的子进程可能继承被其他线程持有的锁，
+        因此子进程使用spawn方式启动。
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def _discard(self, executor):
+        """丢弃已损坏的进程池（需持有self._lock），下次绘制时重新创建"""
+        if self._executor is executor:
+            self._executor = None
+        executor.shutdown(wait=False)
+
+    def _path(self, key, fmt):
+        return os.path.join(current_app.instance_path, self.DIR_NAME, f'{key}.{fmt}')
+
+    def _load(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _save(self, path, content):
+        """先写临时文件再原子替换，然后清理过多的旧图表"""
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            self._prune(os.path.dirname(path))
+        except OSError as e:
+            logger.warning(f'Unable to cache chart: {e}')
+
+    def _prune(self, directory):
+        entries = [entry for entry in os.scandir(directory) if not entry.name.endswith('.tmp')]
+        if len(entries) <= self.max_files:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_files]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+chart_service = ChartService()
@@ -0,0 +1,41 @@
+import os
+import time
+import logging
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+
+class DataGeneration:
+    """跨进程共享的数据代数
+
+    实例目录中的标记文件在新闻入库或互动数据变化时被touch，其修改时间（纳秒）
+    即当前代数。各工作进程只需stat一次文件就能判断缓存是否过期，无需加锁。
+    """
+
+    FILE_NAME = 'data_generation'
+
+    def _path(self):
+        return os.path.join(current_app.instance_path, self.FILE_NAME)
+
+    def current(self):
+        try:
+            return os.stat(self._path()).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def bump(self):
+        """标记数据已变化（需在应用上下文中调用）"""
+        path = self._path()
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a'):
+                pass
+            # 同一时钟刻度内的两次变化也要得到不同的代数
+            now = max(os.stat(path).st_mtime_ns + 1, time.time_ns())
+            os.utime(path, ns=(now, now))
+        except OSError as e:
+            logger.warning(f'Unable to bump data generation: {e}')
+
+
+data_generation = DataGeneration()
@@ -0,0 +1,149 @@
+"""按小时 × 来源 × 分类预聚合的热度汇总表
+
+新闻入库、热度重算和互动数据变化时按桶累加增量，热度趋势只读取汇总桶，
+查询代价与时间窗口内的桶数成正比，与新闻数量无关。汇总表缺失或与news表不一致时
+（例如升级前的历史数据）可全量重建：
+
+    python -m app.hot_analysis.rollup --rebuild
+"""
+import argparse
+import logging
+from datetime import datetime
+from app.models import db, News, HotnessRollup
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 汇总桶的累加列
+ROLLUP_SUMS = ('news_count', 'hotness_sum', 'view_sum', 'comment_sum', 'share_sum')
+
+# 没有分类的新闻所在的分类（与分类热度分析一致）
+DEFAULT_CATEGORY = '其他'
+
+
+def bucket_of(publish_time):
+    """发布时间所在的整点"""
+    return publish_time.replace(minute=0, second=0, microsecond=0)
+
+
+class RollupDeltas:
+    """按汇总桶累积的增量，apply()一次写入数据库"""
+
+    def __init__(self):
+        self._deltas = {}
+
+    def __len__(self):
+        return len(self._deltas)
+
+    def add(self, source, category, publish_time, **amounts):
+        key = (bucket_of(publish_time), source, category or DEFAULT_CATEGORY)
+        delta = self._deltas.setdefault(key, dict.fromkeys(ROLLUP_SUMS, 0))
+        for name, amount in amounts.items():
+            delta[name] += amount or 0
+
+    def add_news(self, news):
+        """计入一条新入库的新闻（列字典或News对象）"""
+        get = news.get if isinstance(news, dict) else lambda name: getattr(news, name)
+        self.add(
+            get('source'), get('category'), get('publish_time'),
+            news_count=1,
+            hotness_sum=get('hotness_score'),
+            view_sum=get('view_count'),
+            comment_sum=get('comment_count'),
+            share_sum=get('share_count')
+        )
+
+    def rows(self):
+        now = datetime.utcnow()
+        return [
+            dict(delta, bucket=bucket, source=source, category=category, updated_at=now)
+            for (bucket, source, category), delta in self._deltas.items()
+            if any(delta.values())
+        ]
+
+    def apply(self):
+        """把增量累加到汇总表（不提交，与调用方的写入在同一事务中）"""
+        rows = self.rows()
+        chunk_size = Config.HOTNESS_UPDATE_CHUNK_SIZE
+        for start in range(0, len(rows), chunk_size):
+            _upsert(rows[start:start + chunk_size])
+        self._deltas = {}
+        return len(rows)
+
+
+def _upsert(rows):
+    """每块一条executemany：桶已存在时累加各列，否则插入新桶"""
+    if not rows:
+        return
+    table = HotnessRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+
+    # 方言模块按需导入，避免拖慢不写汇总表的进程启动
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    if dialect in ('sqlite', 'postgresql'):
+        insert = dialect_insert(table)
+        set_ = {name: table.c[name] + insert.excluded[name] for name in ROLLUP_SUMS}
+        set_['updated_at'] = insert.excluded.updated_at
+        db.session.execute(
+            insert.on_conflict_do_update(index_elements=['bucket', 'source', 'category'], set_=set_),
+            rows
+        )
+        return
+    if dialect in ('mysql', 'mariadb'):
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        insert = mysql_insert(table)
+        update = {name: table.c[name] + insert.inserted[name] for name in ROLLUP_SUMS}
+        update['updated_at'] = insert.inserted.updated_at
+        db.session.execute(insert.on_duplicate_key_update(update), rows)
+        return
+
+    # 其他数据库：先累加已有的桶，再插入缺失的桶
+    for row in rows:
+        key = (table.c.bucket == row['bucket'], table.c.source == row['source'], table.c.category == row['category'])
+        values = {name: table.c[name] + row[name] for name in ROLLUP_SUMS}
+        result = db.session.execute(table.update().where(*key).values(updated_at=row['updated_at'], **values))
+        if not result.rowcount:
+            db.session.execute(table.insert(), row)
+
+
+def rebuild(chunk_size=None):
+    """按news表全量重建汇总表，返回(新闻数, 桶数)
+
+    新闻分块流式读取，内存中只保留汇总桶；删除和重新插入在同一事务中完成。
+    """
+    chunk_size = chunk_size or Config.HOTNESS_UPDATE_CHUNK_SIZE
+    deltas = RollupDeltas()
+    total = 0
+    query = db.session.query(
+        News.source, News.category, News.publish_time, News.hotness_score,
+        News.view_count, News.comment_count, News.share_count
+    ).execution_options(yield_per=chunk_size)
+    for row in query:
+        deltas.add_news(row._asdict())
+        total += 1
+
+    db.session.execute(HotnessRollup.__table__.delete())
+    buckets = deltas.apply()
+    db.session.commit()
+    logger.info(f'Rebuilt hotness rollups: {total} news in {buckets} buckets')
+    return total, buckets
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Hourly hotness rollup maintenance')
+    parser.add_argument('--rebuild', action='store_true', help='rebuild all rollup buckets from the news table')
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error('nothing to do, pass --rebuild')
+
+    app = create_app()
+    with app.app_context():
+        HotnessRollup.__table__.create(bind=db.engine, checkfirst=True)
+        rebuild()
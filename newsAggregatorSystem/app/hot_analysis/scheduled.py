@@ -0,0 +1,34 @@
+"""定时热度分析任务：写回热度分数并保存分析结果到AnalysisResult
+
+接口只读取缓存的分析结果，不保存分析历史；分析历史由本任务定期生成，例如用cron每小时运行：
+
+    python -m app.hot_analysis.scheduled --days 7
+
+分析很长的时间窗口（如--days 365）时可加--stream，按块流式计算，内存占用不随窗口增大。
+"""
+import argparse
+import logging
+from app import create_app
+from app.hot_analysis.analyzer import HotnessAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+def run(days=7, stream=False):
+    app = create_app()
+    with app.app_context():
+        result = HotnessAnalyzer().analyze_hotness(days=days, stream=stream)
+        if result:
+            logger.info(f'Saved hotness analysis of {result["total_news_count"]} news for the last {days} days')
+        else:
+            logger.warning(f'No hotness analysis saved for the last {days} days')
+        return result
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Scheduled hotness analysis')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--stream', action='store_true', help='bounded-memory streaming analysis')
+    args = parser.parse_args()
+    run(args.days, args.stream)
@@ -0,0 +1,238 @@
+"""基于情感词典的新闻情感打分
+
+情感词典编译为一个Aho-Corasick自动机，每篇新闻的标题和正文只扫描一遍即可找出
+全部命中的情感词；批量打分时把新闻分块交给进程池，结果用executemany UPDATE写回。
+修改情感词典后重新打分：
+
+    python -m app.hot_analysis.sentiment --all
+"""
+import argparse
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam, case, func
+from app.models import db, News
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+POSITIVE = 'positive'
+NEGATIVE = 'negative'
+
+
+def load_lexicon(path=None):
+    """读取情感词典，返回{词: positive/negative}；同一个词出现多次时以最后一次为准"""
+    path = path or Config.SENTIMENT_LEXICON_PATH
+    lexicon = {}
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split('\t')
+            if len(parts) != 2 or parts[1].strip() not in (POSITIVE, NEGATIVE):
+                logger.warning(f'Skipping malformed lexicon line {line_number} in {path}')
+                continue
+            lexicon[parts[0].strip()] = parts[1].strip()
+    return lexicon
+
+
+class AhoCorasick:
+    """多模式匹配自动机：构建后一次扫描文本即可找出所有模式的出现位置"""
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for index, pattern in enumerate(patterns):
+            self._insert(pattern, index)
+        self._build_failure_links()
+
+    def _insert(self, pattern, index):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += (index,)
+
+    def _build_failure_links(self):
+        """按广度优先为每个状态计算失败转移，并合并后缀状态的输出"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find_all(self, text):
+        """依次产生文本中每次命中的模式序号"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                yield from output[state]
+
+
+class SentimentEngine:
+    """用编译好的情感词典为新闻打分
+
+    分数 = (命中的正面词数 - 命中的负面词数) / (文本长度 // 2 + 1)，限制在-1到1之间；
+    每个词在一篇新闻中只计一次。
+    """
+
+    def __init__(self, lexicon=None):
+        lexicon = load_lexicon() if lexicon is None else lexicon
+        words = [word for word in lexicon if word]
+        self._positive = [lexicon[word] == POSITIVE for word in words]
+        self._automaton = AhoCorasick(words)
+
+    def score(self, title, content):
+        """返回(情感分数, 正面词数, 负面词数)"""
+        text = (title or '') + ' ' + (content or '')
+        matched = set(self._automaton.find_all(text))
+        positive_count = sum(1 for index in matched if self._positive[index])
+        negative_count = len(matched) - positive_count
+
+        total_words = len(text) // 2  # 粗略估计词数
+        sentiment_score = (positive_count - negative_count) / (total_words + 1)
+        sentiment_score = max(-1, min(1, sentiment_score))
+        return sentiment_score, positive_count, negative_count
+
+
+# 工作进程内的情感引擎，由进程池初始化函数创建
+_worker_engine = None
+
+
+def _init_worker(lexicon):
+    global _worker_engine
+    _worker_engine = SentimentEngine(lexicon)
+
+
+def _score_chunk(rows):
+    """在工作进程中为一块(id, 标题, 正文)打分"""
+    return [{'news_id': news_id, 'sentiment_score': _worker_engine.score(title, content)[0]}
+            for news_id, title, content in rows]
+
+
+def write_sentiment_scores(scores):
+    """用一条executemany UPDATE写回一块情感分数（不提交）"""
+    if not scores:
+        return
+    table = News.__table__
+    db.session.execute(
+        table.update().where(table.c.id == bindparam('news_id')).values(sentiment_score=bindparam('sentiment_score')),
+        scores
+    )
+
+
+def score_news(days=None, workers=None, chunk_size=None, lexicon=None):
+    """为最近days天（None为全部）的新闻重新打分并写回，返回打分的新闻数
+
+    按ID分块读取，每块交给进程池打分；主进程按完成顺序写回并逐块提交，
+    同时最多有workers * 2块在途，内存占用不随新闻数增长。
+    """
+    workers = workers or Config.SENTIMENT_WORKERS
+    chunk_size = chunk_size or Config.SENTIMENT_CHUNK_SIZE
+    lexicon = load_lexicon() if lexicon is None else lexicon
+
+    query = db.session.query(News.id, News.title, News.content)
+    if days is not None:
+        query = query.filter(News.publish_time >= datetime.utcnow() - timedelta(days=days))
+
+    def chunks():
+        last_id = 0
+        while True:
+            rows = query.filter(News.id > last_id).order_by(News.id).limit(chunk_size).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            yield [tuple(row) for row in rows]
+
+    total = 0
+    if workers <= 1:
+        _init_worker(lexicon)
+        for rows in chunks():
+            write_sentiment_scores(_score_chunk(rows))
+            db.session.commit()
+            total += len(rows)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(lexicon,)) as executor:
+            pending = deque()
+            for rows in chunks():
+                pending.append(executor.submit(_score_chunk, rows))
+                if len(pending) >= workers * 2:
+                    total += _write_completed(pending.popleft())
+            while pending:
+                total += _write_completed(pending.popleft())
+
+    logger.info(f'Scored sentiment for {total} news')
+    return total
+
+
+def _write_completed(future):
+    scores = future.result()
+    write_sentiment_scores(scores)
+    db.session.commit()
+    return len(scores)
+
+
+def sentiment_distribution(days=7, threshold=None):
+    """按存储的情感分数统计最近days天新闻的正面/负面/中性分布"""
+    threshold = Config.SENTIMENT_THRESHOLD if threshold is None else threshold
+    score = func.coalesce(News.sentiment_score, 0.0)
+    polarity = case((score > threshold, POSITIVE), (score < -threshold, NEGATIVE), else_='neutral')
+    start_date = datetime.utcnow() - timedelta(days=days)
+
+    rows = db.session.query(
+        News.category, polarity.label('polarity'), func.count(News.id).label('count'),
+        func.sum(score).label('total')
+    ).filter(News.publish_time >= start_date).group_by(News.category, polarity).all()
+
+    distribution = {POSITIVE: 0, NEGATIVE: 0, 'neutral': 0}
+    categories = {}
+    total_count = 0
+    total_score = 0.0
+    for row in rows:
+        distribution[row.polarity] += row.count
+        category = categories.setdefault(row.category or '其他', {POSITIVE: 0, NEGATIVE: 0, 'neutral': 0})
+        category[row.polarity] += row.count
+        total_count += row.count
+        total_score += row.total or 0.0
+
+    return {
+        'sentiment_distribution': distribution,
+        'category_distribution': [
+            dict(counts, category=name) for name, counts in sorted(categories.items())
+        ],
+        'average_sentiment': total_score / total_count if total_count else 0,
+        'total_news_count': total_count
+    }
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Score news sentiment with the lexicon')
+    parser.add_argument('--days', type=int, default=7, help='only rescore news from the last N days')
+    parser.add_argument('--all', action='store_true', help='rescore every news article')
+    parser.add_argument('--workers', type=int, help='override SENTIMENT_WORKERS')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        score_news(days=None if args.all else args.days, workers=args.workers)
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from flask import current_app
+from app.hot_analysis.analyzer import HotnessAnalyzer
+from app.hot_analysis.generation import data_generation
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class HotRankSnapshots:
+    """按(天数, 分类, 来源, 是否合并重复)物化的热度排行榜前HOT_RANK_SNAPSHOT_SIZE条
+
+    快照保存在进程内存中，同时写入实例目录供其他工作进程直接加载。快照在数据代数
+    变化或超过HOT_RANK_SNAPSHOT_TTL秒后按存储的热度分数重建，读取路径不重算也不写数据库，
+    分数由刷新任务和定时任务重算；刷新任务结束后会重建本进程已有的快照。分类和来源来自请求参数，内存和实例目录中
+    各最多保留HOT_RANK_SNAPSHOT_MAX_KEYS个快照，超出时淘汰最久未使用（最早写入）的。
+    """
+
+    DIR_NAME = 'hot_rank'
+
+    def __init__(self, size=None, ttl=None, max_keys=None):
+        self.size = size or Config.HOT_RANK_SNAPSHOT_SIZE
+        self.ttl = Config.HOT_RANK_SNAPSHOT_TTL if ttl is None else ttl
+        self.max_keys = max_keys or Config.HOT_RANK_SNAPSHOT_MAX_KEYS
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def get(self, days=7, category=None, source=None, collapse_duplicates=False):
+        """返回最新的快照字典：top_news、generated_at、generation等"""
+        key = (days, category or '', source or '', bool(collapse_duplicates))
+        generation = data_generation.current()
+
+        with self._lock:
+            snapshot = self._fresh(self._snapshots.get(key), generation)
+            if snapshot is not None:
+                self._snapshots.move_to_end(key)
+        if snapshot is None:
+            with self._build_lock:
+                # 等待期间可能已由其他线程或进程重建
+                snapshot = self._fresh(self._snapshots.get(key), generation) or \
+                    self._fresh(self._load(key), generation)
+                if snapshot is None:
+                    snapshot = self.build(key, generation)
+                self._remember(key, snapshot)
+        return snapshot
+
+    def _remember(self, key, snapshot):
+        with self._lock:
+            self._snapshots[key] = snapshot
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > self.max_keys:
+                self._snapshots.popitem(last=False)
+
+    def rebuild_known(self):
+        """重建本进程中已有的快照（刷新任务结束后调用）"""
+        generation = data_generation.current()
+        with self._lock:
+            keys = list(self._snapshots)
+        with self._build_lock:
+            for key in keys:
+                snapshot = self.build(key, generation)
+                with self._lock:
+                    if key in self._snapshots:
+                        self._snapshots[key] = snapshot
+        return len(keys)
+
+    def build(self, key, generation):
+        days, category, source, collapse = key
+        now = datetime.utcnow()
+        top_news = HotnessAnalyzer().top_hot_news(
+            days=days, limit=self.size, category=category or None, source=source or None,
+            collapse_duplicates=collapse, now=now, refresh=False
+        )
+        snapshot = {
+            'days': days,
+            'category': category or None,
+            'source': source or None,
+            'collapse': collapse,
+            'mode': Config.HOTNESS_MODE,
+            'generation': generation,
+            'generated_at': now.isoformat(),
+            'top_news': top_news
+        }
+        self._save(key, snapshot)
+        return snapshot
+
+    def _fresh(self, snapshot, generation):
+        if snapshot is None or snapshot['generation'] != generation or snapshot['mode'] != Config.HOTNESS_MODE:
+            return None
+        age = (datetime.utcnow() - datetime.fromisoformat(snapshot['generated_at'])).total_seconds()
+        return snapshot if age < self.ttl else None
+
+    def _path(self, key):
+        days, category, source, collapse = key
+        name = hashlib.sha1(json.dumps([days, category, source, collapse]).encode('utf-8')).hexdigest()
+        return os.path.join(current_app.instance_path, self.DIR_NAME, f'{name}.json')
+
+    def _load(self, key):
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, key, snapshot):
+        """先写临时文件再原子替换，其他进程不会读到写了一半的快照"""
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._prune(os.path.dirname(path))
+        except OSError as e:
+            logger.warning(f'Unable to save hot rank snapshot: {e}')
+
+    def _prune(self, directory):
+        """实例目录中的快照超过max_keys个时删除最早写入的"""
+        entries = [entry for entry in os.scandir(directory) if not entry.name.endswith('.tmp')]
+        if len(entries) <= self.max_keys:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_keys]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+hot_rank_snapshots = HotRankSnapshots()
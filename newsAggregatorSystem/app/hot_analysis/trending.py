@@ -0,0 +1,243 @@
+import heapq
+import math
+import re
+import threading
+import logging
+from array import array
+from datetime import datetime, timedelta
+from app.models import db, News
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 标题中的连续汉字和英文单词
+_CJK_RUN_PATTERN = re.compile(r'[\u4e00-\u9fff]+')
+_WORD_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9]+')
+
+# 标题前缀中的来源名称，如“腾讯新闻：”
+_SOURCE_PREFIX_PATTERN = re.compile(r'^[^：:]{2,6}新闻[：:]')
+
+# 计数桶编号的起点
+_BUCKET_EPOCH = datetime(1970, 1, 1)
+
+_HASH_MASK = (1 << 64) - 1
+
+
+def title_terms(title):
+    """标题中的候选词：汉字的二元和三元字符组，以及英文单词（小写）；同一标题中只计一次"""
+    text = _SOURCE_PREFIX_PATTERN.sub('', title or '')
+    terms = set()
+    for run in _CJK_RUN_PATTERN.findall(text):
+        for n in (2, 3):
+            terms.update(run[start:start + n] for start in range(len(run) - n + 1))
+    terms.update(word.lower() for word in _WORD_PATTERN.findall(text))
+    return terms
+
+
+class CountMinSketch:
+    """Count-Min Sketch：固定内存的近似计数，估计值只会偏高不会偏低
+
+    使用进程内的hash()做双重哈希，计数只在本进程内有意义。
+    """
+
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self._rows = [array('I', bytes(4 * width)) for _ in range(depth)]
+
+    def _indexes(self, item):
+        value = hash(item) & _HASH_MASK
+        first, step = value & 0xFFFFFFFF, (value >> 32) | 1
+        return [(first + row * step) % self.width for row in range(self.depth)]
+
+    def add(self, item, count=1):
+        """计数并返回新的估计值"""
+        estimate = None
+        for row, index in zip(self._rows, self._indexes(item)):
+            value = row[index] + count
+            row[index] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        return estimate
+
+    def estimate(self, item):
+        return min(row[index] for row, index in zip(self._rows, self._indexes(item)))
+
+
+class HeavyHitterBucket:
+    """一个时间桶的计数：Count-Min Sketch加上估计值最高的capacity个候选词"""
+
+    def __init__(self, width, depth, capacity):
+        self.sketch = CountMinSketch(width, depth)
+        self.capacity = capacity
+        self.documents = 0
+        self.candidates = {}
+        self._heap = []  # (估计值, 词)的小顶堆，过期条目在取最小值时丢弃
+
+    def add_terms(self, terms):
+        self.documents += 1
+        for term in terms:
+            self._offer(term, self.sketch.add(term))
+
+    def _offer(self, term, estimate):
+        candidates = self.candidates
+        if term not in candidates and len(candidates) >= self.capacity:
+            # 堆顶可能是过期条目，其估计值不大于真实的最小值，不超过它的词可直接跳过
+            if estimate <= self._heap[0][0]:
+                return
+            weakest_estimate, weakest = self._weakest()
+            if estimate <= weakest_estimate:
+                return
+            del candidates[weakest]
+            heapq.heappop(self._heap)
+        candidates[term] = estimate
+        heapq.heappush(self._heap, (estimate, term))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(value, key) for key, value in candidates.items()]
+            heapq.heapify(self._heap)
+
+    def _weakest(self):
+        heap = self._heap
+        while self.candidates.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0]
+
+
+class TrendingTerms:
+    """标题热词的滑动窗口突发检测
+
+    新闻按发布时间落入TRENDING_BUCKET_MINUTES分钟的计数桶，每个桶是一个固定大小的
+    Count-Min Sketch和高频词候选表；只保留当前窗口加基线窗口内的桶，内存占用与新闻总数
+    无关。热词按当前窗口的出现次数超出基线期望的程度排序，并按ID增量追赶数据库中的新数据。
+    """
+
+    def __init__(self, window_hours=None, baseline_hours=None, bucket_minutes=None):
+        self.bucket_span = timedelta(minutes=bucket_minutes or Config.TRENDING_BUCKET_MINUTES)
+        self.window = timedelta(hours=window_hours or Config.TRENDING_WINDOW_HOURS)
+        self.baseline = timedelta(hours=baseline_hours or Config.TRENDING_BASELINE_HOURS)
+        self.window_buckets = max(1, int(self.window / self.bucket_span))
+        self.baseline_buckets = max(1, int(self.baseline / self.bucket_span))
+        self._buckets = {}
+        self._last_id = 0
+        self._lock = threading.RLock()
+
+    def _bucket_index(self, moment):
+        return int((moment - _BUCKET_EPOCH) / self.bucket_span)
+
+    def _new_bucket(self):
+        return HeavyHitterBucket(Config.TRENDING_SKETCH_WIDTH, Config.TRENDING_SKETCH_DEPTH,
+                                 Config.TRENDING_CANDIDATES)
+
+    def observe(self, title, publish_time, now=None):
+        """计入一条新闻标题；超出保留范围的旧新闻忽略，发布时间晚于当前时间的计入当前桶"""
+        now_index = self._bucket_index(now or datetime.utcnow())
+        index = min(self._bucket_index(publish_time), now_index)
+        if index <= now_index - self.window_buckets - self.baseline_buckets:
+            return
+        terms = title_terms(title)
+        if not terms:
+            return
+        with self._lock:
+            bucket = self._buckets.get(index)
+            if bucket is None:
+                bucket = self._buckets[index] = self._new_bucket()
+            bucket.add_terms(terms)
+
+    def evict_expired(self, now=None):
+        oldest = self._bucket_index(now or datetime.utcnow()) - self.window_buckets - self.baseline_buckets
+        with self._lock:
+            for index in [index for index in self._buckets if index <= oldest]:
+                del self._buckets[index]
+
+    def catch_up(self, chunk_size=None):
+        """按ID分块加载上次之后写入、仍在保留范围内的新闻标题"""
+        chunk_size = chunk_size or Config.ANALYSIS_STREAM_CHUNK_SIZE
+        now = datetime.utcnow()
+        cutoff = now - self.window - self.baseline
+        total = 0
+        with self._lock:
+            while True:
+                rows = db.session.query(News.id, News.title, News.publish_time).filter(
+                    News.id > self._last_id,
+                    News.publish_time >= cutoff
+                ).order_by(News.id).limit(chunk_size).all()
+                if not rows:
+                    break
+                for news_id, title, publish_time in rows:
+                    self.observe(title, publish_time, now)
+                self._last_id = rows[-1].id
+                total += len(rows)
+            self.evict_expired(now)
+        return total
+
+    def top_terms(self, limit=20, now=None, min_count=None):
+        """当前窗口内突发程度最高的词
+
+        分数 = (当前次数 - 期望次数) / sqrt(期望次数 + 1)，期望次数为基线窗口的出现次数
+        按时长折算到当前窗口。被某个同样热的三元组包含的二元组不单独列出。
+        """
+        min_count = Config.TRENDING_MIN_COUNT if min_count is None else min_count
+        now_index = self._bucket_index(now or datetime.utcnow())
+        window_start = now_index - self.window_buckets + 1
+        scale = self.window_buckets / self.baseline_buckets
+
+        with self._lock:
+            current = [self._buckets[index] for index in range(window_start, now_index + 1)
+                       if index in self._buckets]
+            baseline = [self._buckets[index] for index in range(window_start - self.baseline_buckets, window_start)
+                        if index in self._buckets]
+            candidates = set()
+            for bucket in current:
+                candidates.update(bucket.candidates)
+
+            scored = []
+            for term in candidates:
+                count = sum(bucket.sketch.estimate(term) for bucket in current)
+                if count < min_count:
+                    continue
+                expected = sum(bucket.sketch.estimate(term) for bucket in baseline) * scale
+                score = (count - expected) / math.sqrt(expected + 1)
+                if score > 0:
+                    scored.append((score, count, expected, term))
+
+        scored.sort(key=lambda item: (-item[0], -item[1], item[3]))
+        trigrams = [(term, count) for _, count, _, term in scored
+                    if len(term) == 3 and _CJK_RUN_PATTERN.fullmatch(term)]
+        terms = []
+        for score, count, expected, term in scored:
+            if len(term) == 2 and _CJK_RUN_PATTERN.fullmatch(term) and any(term in trigram and trigram_count >= 0.8 * count
+                                      for trigram, trigram_count in trigrams):
+                continue
+            terms.append({
+                'term': term,
+                'count': count,
+                'expected': round(expected, 2),
+                'score': round(score, 2)
+            })
+            if len(terms) >= limit:
+                break
+        return terms
+
+    def stats(self):
+        with self._lock:
+            return {
+                'buckets': len(self._buckets),
+                'documents': sum(bucket.documents for bucket in self._buckets.values()),
+                'window_hours': self.window / timedelta(hours=1),
+                'baseline_hours': self.baseline / timedelta(hours=1)
+            }
+
+
+_default_detector = None
+_default_detector_lock = threading.Lock()
+
+
+def get_trending_terms():
+    """获取进程内共享的热词检测器，并追赶数据库中的新数据"""
+    global _default_detector
+    with _default_detector_lock:
+        if _default_detector is None:
+            _default_detector = TrendingTerms()
+        detector = _default_detector
+    detector.catch_up()
+    return detector
@@ -6,4 +6,8 @@ db = SQLAlchemy()
 # 导入所有模型
 from app.models.news import News
 from app.models.analysis import AnalysisResult
-from app.models.source import NewsSource
\ No newline at end of file
+from app.models.source import NewsSource
+from app.models.breaker import HostBreaker
+from app.models.rollup import HotnessRollup
+from app.models.related import RelatedNews
+from app.models.refresh_job import RefreshJob
\ No newline at end of file
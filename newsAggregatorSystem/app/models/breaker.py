@@ -0,0 +1,25 @@
+from app.models import db
+from datetime import datetime
+
+class HostBreaker(db.Model):
+    """按主机持久化的断路器状态（包括正文页等来源首页以外的主机）"""
+    __tablename__ = 'host_breakers'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    host = db.Column(db.String(255), unique=True, nullable=False)  # 主机（含非默认端口）
+    state = db.Column(db.String(20), default='closed')  # 断路器状态：closed, open, half_open
+    consecutive_failures = db.Column(db.Integer, default=0)  # 连续失败次数
+    open_until = db.Column(db.DateTime)  # 断路器冷却截止时间
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<HostBreaker {self.host} {self.state}>'
+    
+    def to_dict(self):
+        return {
+            'host': self.host,
+            'state': self.state or 'closed',
+            'consecutive_failures': self.consecutive_failures or 0,
+            'open_until': self.open_until.isoformat() if self.open_until else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
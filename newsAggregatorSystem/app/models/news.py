@@ -8,15 +8,21 @@ class News(db.Model):
     title = db.Column(db.String(255), nullable=False)
     content = db.Column(db.Text, nullable=False)
     source = db.Column(db.String(100), nullable=False)
-    url = db.Column(db.String(500), nullable=False, unique=True)
+    url = db.Column(db.String(500), nullable=False)  # 规范化后的链接
+    url_hash = db.Column(db.String(40), unique=True, index=True)  # 规范化链接的SHA-1，用于去重
     publish_time = db.Column(db.DateTime, nullable=False)
     crawl_time = db.Column(db.DateTime, default=datetime.utcnow)
     category = db.Column(db.String(50))
-    hotness_score = db.Column(db.Float, default=0.0)
+    hotness_score = db.Column(db.Float, default=0.0, index=True)
     sentiment_score = db.Column(db.Float, default=0.0)
     view_count = db.Column(db.Integer, default=0)
     comment_count = db.Column(db.Integer, default=0)
     share_count = db.Column(db.Integer, default=0)
+    story_id = db.Column(db.Integer, index=True)  # 近似重复新闻共享的故事ID（首篇新闻的ID）
+    cluster_id = db.Column(db.Integer, index=True)  # 报道同一事件的新闻所在故事簇的ID（首篇新闻的ID）
+    hotness_dirty = db.Column(db.Boolean, default=True, index=True)  # 互动数据变化后等待重算热度
+    hotness_due_at = db.Column(db.DateTime, index=True)  # 下次跨越时间衰减阶梯、需要重算热度的时间
+    hot_log_score = db.Column(db.Float, index=True)  # 以发布时间为锚点的对数热度，排序不随时间变化
     
     def __repr__(self):
         return f'<News {self.title}>'
@@ -35,5 +41,7 @@ class News(db.Model):
             'sentiment_score': self.sentiment_score,
             'view_count': self.view_count,
             'comment_count': self.comment_count,
-            'share_count': self.share_count
+            'share_count': self.share_count,
+            'story_id': self.story_id,
+            'cluster_id': self.cluster_id
         }
\ No newline at end of file
@@ -0,0 +1,45 @@
+from app.models import db
+from datetime import datetime
+import json
+
+class RefreshJob(db.Model):
+    """后台刷新任务及其进度，保存在数据库中供所有工作进程查询和合并请求"""
+    __tablename__ = 'refresh_jobs'
+    
+    id = db.Column(db.String(32), primary_key=True)  # 任务ID（uuid4十六进制）
+    force = db.Column(db.Boolean, default=False)  # 是否强制刷新全部启用来源
+    status = db.Column(db.String(20), default='queued', index=True)  # queued, running, succeeded, failed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    sources_total = db.Column(db.Integer, default=0)
+    sources_done = db.Column(db.Integer, default=0)
+    items_fetched = db.Column(db.Integer, default=0)
+    items_inserted = db.Column(db.Integer, default=0)
+    errors = db.Column(db.Text)  # JSON：[{source, error}]
+    merged_requests = db.Column(db.Integer, default=0)  # 合并到本任务的请求数
+    summary = db.Column(db.Text)  # JSON：抓取器的刷新统计
+    
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed')
+    
+    def __repr__(self):
+        return f'<RefreshJob {self.id} {self.status}>'
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'force': bool(self.force),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'sources_total': self.sources_total or 0,
+            'sources_done': self.sources_done or 0,
+            'items_fetched': self.items_fetched or 0,
+            'items_inserted': self.items_inserted or 0,
+            'errors': json.loads(self.errors) if self.errors else [],
+            'merged_requests': self.merged_requests or 0,
+            'summary': json.loads(self.summary) if self.summary else None
+        }
@@ -0,0 +1,26 @@
+from app.models import db
+from datetime import datetime
+
+class RelatedNews(db.Model):
+    """入库时预先计算的相关新闻：每条新闻与其相似新闻之间的有向边"""
+    __tablename__ = 'news_related'
+    __table_args__ = (
+        db.UniqueConstraint('news_id', 'related_id', name='uq_news_related_pair'),
+        db.Index('ix_news_related_news_score', 'news_id', 'score'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    news_id = db.Column(db.Integer, db.ForeignKey('news.id'), nullable=False)
+    related_id = db.Column(db.Integer, db.ForeignKey('news.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)  # 标题TF-IDF向量的余弦相似度
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RelatedNews {self.news_id} -> {self.related_id}>'
+    
+    def to_dict(self):
+        return {
+            'news_id': self.news_id,
+            'related_id': self.related_id,
+            'score': self.score
+        }
@@ -0,0 +1,35 @@
+from app.models import db
+from datetime import datetime
+
+class HotnessRollup(db.Model):
+    """按小时 × 来源 × 分类预聚合的新闻数、热度分数和互动数据之和"""
+    __tablename__ = 'hotness_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('bucket', 'source', 'category', name='uq_hotness_rollup_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    bucket = db.Column(db.DateTime, nullable=False, index=True)  # 发布时间所在整点（UTC）
+    source = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(50), nullable=False)  # 没有分类的新闻记为“其他”
+    news_count = db.Column(db.Integer, nullable=False, default=0)
+    hotness_sum = db.Column(db.Float, nullable=False, default=0.0)
+    view_sum = db.Column(db.Integer, nullable=False, default=0)
+    comment_sum = db.Column(db.Integer, nullable=False, default=0)
+    share_sum = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<HotnessRollup {self.bucket} {self.source} {self.category}>'
+    
+    def to_dict(self):
+        return {
+            'bucket': self.bucket.isoformat() if self.bucket else None,
+            'source': self.source,
+            'category': self.category,
+            'news_count': self.news_count,
+            'hotness_sum': self.hotness_sum,
+            'view_sum': self.view_sum,
+            'comment_sum': self.comment_sum,
+            'share_sum': self.share_sum
+        }
@@ -12,6 +12,12 @@ class NewsSource(db.Model):
     last_crawl_time = db.Column(db.DateTime)  # 上次抓取时间
     crawl_status = db.Column(db.String(20), default='idle')  # 抓取状态：idle, crawling, error
     error_message = db.Column(db.String(500))  # 错误信息
+    effective_interval = db.Column(db.Integer)  # 自适应调整后的实际抓取间隔（分钟）
+    next_crawl_time = db.Column(db.DateTime, index=True)  # 下次计划抓取时间
+    last_new_count = db.Column(db.Integer, default=0)  # 上次抓取到的新条目数
+    breaker_state = db.Column(db.String(20), default='closed')  # 断路器状态：closed, open, half_open
+    breaker_failures = db.Column(db.Integer, default=0)  # 连续失败次数
+    breaker_open_until = db.Column(db.DateTime)  # 断路器冷却截止时间
     
     def __repr__(self):
         return f'<NewsSource {self.name}>'
@@ -26,5 +32,11 @@ class NewsSource(db.Model):
             'crawl_interval': self.crawl_interval,
             'last_crawl_time': self.last_crawl_time.isoformat() if self.last_crawl_time else None,
             'crawl_status': self.crawl_status,
-            'error_message': self.error_message
+            'error_message': self.error_message,
+            'effective_interval': self.effective_interval or self.crawl_interval,
+            'next_crawl_time': self.next_crawl_time.isoformat() if self.next_crawl_time else None,
+            'last_new_count': self.last_new_count,
+            'breaker_state': self.breaker_state or 'closed',
+            'breaker_failures': self.breaker_failures or 0,
+            'breaker_open_until': self.breaker_open_until.isoformat() if self.breaker_open_until else None
         }
\ No newline at end of file
@@ -0,0 +1,114 @@
+import logging
+import re
+from itertools import islice
+from lxml import etree, html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+# 每次喂给增量解析器的字符数
+FEED_CHUNK_SIZE = 16 * 1024
+
+# 元素及其后代的全部文本
+_element_text = etree.XPath('string()')
+
+
+def _class_predicate(class_name):
+    """匹配class属性中包含指定类名的XPath谓词"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def _parse_document(text):
+    """解析完整HTML文档；带编码声明的字符串需先转成字节"""
+    try:
+        return lxml_html.document_fromstring(text)
+    except ValueError:
+        return lxml_html.document_fromstring(text.encode('utf-8'))
+
+
+class LinkExtractor:
+    """流式链接抽取器
+
+    选择器在创建时编译一次；抽取时用增量解析器分块解析页面，只在<a>标签结束时
+    产出(标题, 链接, 是否为纯文本链接)。调用方停止迭代后剩余页面不再解析。
+    """
+
+    def __init__(self, container_class=None):
+        self._in_container = None
+        if container_class:
+            self._in_container = etree.XPath(f'boolean(ancestor::*[{_class_predicate(container_class)}])')
+
+    def iter_links(self, text):
+        parser = etree.HTMLPullParser(events=('end',), tag='a')
+        for start in range(0, len(text), FEED_CHUNK_SIZE):
+            parser.feed(text[start:start + FEED_CHUNK_SIZE])
+            yield from self._read_links(parser)
+        parser.close()
+        yield from self._read_links(parser)
+
+    def _read_links(self, parser):
+        for _, element in parser.read_events():
+            if self._in_container is not None and not self._in_container(element):
+                continue
+            yield _element_text(element).strip(), element.get('href'), len(element) == 0
+
+
+class PatternLinkExtractor:
+    """基于预编译正则的链接抽取器，用finditer逐个匹配，达到数量上限即停止扫描"""
+
+    def __init__(self, pattern):
+        self._pattern = re.compile(pattern)
+
+    def links(self, text, limit):
+        return [(title.strip(), href) for href, title in
+                (match.groups() for match in islice(self._pattern.finditer(text), limit))]
+
+
+class ContentExtractor:
+    """正文抽取器：按优先级依次尝试预编译的容器选择器，取其中的段落文本"""
+
+    def __init__(self, container_xpaths, fallback_paragraphs=20, max_chars=2000):
+        self._containers = [etree.XPath(xpath) for xpath in container_xpaths]
+        self._paragraphs = etree.XPath('.//p')
+        self._all_paragraphs = etree.XPath('//p')
+        self.fallback_paragraphs = fallback_paragraphs
+        self.max_chars = max_chars
+
+    def extract(self, text):
+        if not text or not text.strip():
+            return ''
+        try:
+            document = _parse_document(text)
+        except etree.ParserError as e:
+            logger.warning(f'Unable to parse article page: {e}')
+            return ''
+
+        # 移除脚本和样式
+        etree.strip_elements(document, 'script', 'style', with_tail=False)
+
+        content = ''
+        for container in self._containers:
+            elements = container(document)
+            if elements:
+                content = ' '.join(p.text_content().strip() for p in self._paragraphs(elements[0]))
+                if content:
+                    break
+
+        # 如果没有找到正文，尝试提取所有段落
+        if not content:
+            paragraphs = self._all_paragraphs(document)[:self.fallback_paragraphs]
+            content = ' '.join(p.text_content().strip() for p in paragraphs)
+
+        return content[:self.max_chars]
+
+
+# 各来源使用的抽取器
+NETEASE_LINKS = LinkExtractor(container_class='ns_area')
+PAGE_LINKS = LinkExtractor()
+SINA_LINKS = PatternLinkExtractor(r'<a[^>]+href="([^"]+news\.sina\.com\.cn[^"]+)"[^>]*>([^<]+)</a>')
+ARTICLE_CONTENT = ContentExtractor([
+    '//article',
+    f'//*[{_class_predicate("content")}]',
+    f'//*[{_class_predicate("main-content")}]',
+    f'//*[{_class_predicate("article-content")}]',
+    "//*[@id='content']"
+])
@@ -1,15 +1,33 @@
-import requests
 from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-import re
+from itertools import islice
+import time
 import logging
-from app.models import db, News, NewsSource
+from app.models import db, News, NewsSource, HostBreaker
+from app.news_fetcher.transport import get_transport, host_of
+from app.news_fetcher.pipeline import IngestPipeline
+from app.news_fetcher.scheduler import CrawlScheduler
+from app.news_fetcher.urls import canonicalize_url, url_hash
+from app.news_fetcher.near_dup import get_near_duplicate_index, signature
+from app.news_fetcher.story_cluster import get_story_cluster_index
+from app.news_fetcher.related import get_related_news_index, save_related
+from app.hot_analysis.analyzer import HotnessAnalyzer
+from app.hot_analysis.generation import data_generation
+from app.hot_analysis.rollup import RollupDeltas
+from app.hot_analysis.trending import get_trending_terms
+from app.news_fetcher.extractor import NETEASE_LINKS, PAGE_LINKS, SINA_LINKS, ARTICLE_CONTENT
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
 from config import Config
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# 单条IN查询中的最大参数数（SQLite旧版本上限为999）
+SQL_IN_CHUNK_SIZE = 500
+
 class NewsFetcher:
     def __init__(self):
         self.headers = {
@@ -19,63 +37,230 @@ class NewsFetcher:
         }
         # 代理设置（可选）
         self.proxies = getattr(Config, 'PROXIES', None)
+        # 共享的HTTP传输层（连接池、重试、每主机连接数限制）
+        self.transport = get_transport()
+        # 按抓取间隔调度来源
+        self.scheduler = CrawlScheduler()
+        # 入库时计算对数热度分数
+        self.hotness_analyzer = HotnessAnalyzer()
+        # 最近一次刷新的耗时汇总
+        self.last_refresh_stats = {}
     
-    def fetch_all_news(self):
-        """抓取所有启用的新闻来源"""
-        sources = NewsSource.query.filter_by(enabled=True).all()
+    def fetch_all_news(self, force=False, progress=None):
+        """抓取已到抓取时间的新闻来源，force为True时抓取所有启用的来源
+        
+        progress可选，需提供sources_planned(total)和source_finished(name, stats)
+        两个回调，用于后台任务汇报进度。
+        
+        各来源的列表页抓取与解析在线程池中并行执行，抓取结果交给入库流水线，
+        正文由流水线的工作线程异步抓取；数据库写入仍由调用线程串行完成，
+        工作线程不会接触数据库会话。
+        """
+        if force:
+            sources = NewsSource.query.filter_by(enabled=True).all()
+        else:
+            sources = self.scheduler.due_sources()
         results = []
+        refresh_start = time.perf_counter()
+        self.last_refresh_stats = {
+            'total_seconds': 0.0, 'max_workers': 0, 'forced': force, 'sources': {}, 'skipped': []
+        }
+        
+        # 断路器冷却中的来源本次跳过，避免在失败的主机上消耗超时时间
+        sources = self._restore_breakers(sources)
         
+        if progress is not None:
+            progress.sources_planned(len(sources))
+        
+        if not sources:
+            logger.info('No news sources due for crawling')
+            return results
+        
+        # 更新抓取状态
         for source in sources:
-            try:
-                logger.info(f'Start fetching news from {source.name}')
-                # 更新抓取状态
-                source.crawl_status = 'crawling'
-                db.session.commit()
-                
-                # 根据来源名称选择对应的抓取方法
-                if source.name == '腾讯新闻':
-                    news_list = self.fetch_tencent_news()
-                elif source.name == '网易新闻':
-                    news_list = self.fetch_163_news()
-                elif source.name == '新浪新闻':
-                    news_list = self.fetch_sina_news()
-                elif source.name == '央视新闻':
-                    news_list = self.fetch_cctv_news()
-                else:
-                    logger.warning(f'No fetcher implemented for source: {source.name}')
-                    news_list = []
-                
-                # 存储新闻
-                for news_item in news_list:
-                    try:
-                        self.save_news(news_item)
-                        results.append(news_item)
-                    except Exception as e:
-                        logger.error(f'Error saving news: {e}')
-                
-                # 更新抓取状态
-                source.last_crawl_time = datetime.utcnow()
-                source.crawl_status = 'idle'
-                source.error_message = None
-                db.session.commit()
-                
-                logger.info(f'Fetched {len(news_list)} news from {source.name}')
-                
-            except Exception as e:
-                logger.error(f'Error fetching news from {source.name}: {e}')
-                # 更新错误状态
-                source.crawl_status = 'error'
-                source.error_message = str(e)
-                db.session.commit()
+            source.crawl_status = 'crawling'
+        db.session.commit()
+        
+        max_workers = min(Config.CRAWL_MAX_WORKERS, len(sources)) if Config.CRAWL_CONCURRENT else 1
+        max_workers = max(1, max_workers)
+        self.last_refresh_stats['max_workers'] = max_workers
         
+        pipeline = IngestPipeline(self).start()
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='news-crawl') as executor:
+                futures = {
+                    executor.submit(self._crawl_source, source.name): source
+                    for source in sources
+                }
+                for future in as_completed(futures):
+                    source = futures[future]
+                    results.extend(self._store_source_result(source, future, pipeline, progress))
+        finally:
+            # 等待正文抓取完成并回填
+            pipeline.finish()
+            # 保存包括正文抓取在内的断路器状态
+            self._save_breakers(sources)
+            db.session.commit()
+        
+        self.last_refresh_stats['pipeline'] = pipeline.stats()
+        self.last_refresh_stats['total_seconds'] = round(time.perf_counter() - refresh_start, 3)
+        self.last_refresh_stats['transport'] = self.transport.stats()['total']
+        self._log_refresh_summary()
         return results
     
+    def _crawl_source(self, source_name):
+        """在工作线程中抓取并解析单个来源，返回(新闻列表, 耗时秒数)"""
+        start = time.perf_counter()
+        fetch_method = self.get_source_fetcher(source_name)
+        if fetch_method is None:
+            logger.warning(f'No fetcher implemented for source: {source_name}')
+            news_list = []
+        else:
+            logger.info(f'Start fetching news from {source_name}')
+            news_list = fetch_method()
+        return news_list, time.perf_counter() - start
+    
+    def _store_source_result(self, source, future, pipeline, progress=None):
+        """在调用线程中把单个来源的抓取结果交给入库流水线并更新其抓取状态"""
+        saved = []
+        stats = {
+            'fetch_seconds': 0.0, 'save_seconds': 0.0, 'fetched': 0,
+            'inserted': 0, 'duplicates': 0, 'status': 'idle'
+        }
+        try:
+            news_list, fetch_seconds = future.result()
+            stats['fetch_seconds'] = round(fetch_seconds, 3)
+            stats['fetched'] = len(news_list)
+            pipeline.record('list', len(news_list), fetch_seconds)
+            
+            # 存储新闻（正文稍后回填）
+            save_start = time.perf_counter()
+            batch = pipeline.process(news_list)
+            saved = batch['items']
+            stats['inserted'] = batch['inserted']
+            stats['duplicates'] = batch['duplicates']
+            stats['save_seconds'] = round(time.perf_counter() - save_start, 3)
+            
+            # 更新抓取状态并安排下次抓取
+            source.last_crawl_time = datetime.utcnow()
+            source.crawl_status = 'idle'
+            source.error_message = None
+            self.scheduler.record_result(source, stats['inserted'], success=True)
+            db.session.commit()
+            
+            logger.info(f'Fetched {len(news_list)} news from {source.name}')
+            
+        except Exception as e:
+            logger.error(f'Error fetching news from {source.name}: {e}')
+            db.session.rollback()
+            stats['status'] = 'error'
+            stats['error'] = str(e)[:500]
+            # 更新错误状态
+            source.crawl_status = 'error'
+            source.error_message = str(e)[:500]
+            self.scheduler.record_result(source, 0, success=False)
+            db.session.commit()
+        
+        stats['effective_interval'] = source.effective_interval
+        self.last_refresh_stats['sources'][source.name] = stats
+        if progress is not None:
+            progress.source_finished(source.name, stats)
+        return saved
+    
+    def _restore_breakers(self, sources):
+        """用保存的断路器状态恢复传输层断路器，返回不在冷却期内的来源
+        
+        正文页等其他主机的状态保存在host_breakers表；来源首页主机没有对应记录时
+        （升级前的数据）使用来源上保存的状态。
+        """
+        now = datetime.utcnow()
+        restored = set()
+        for row in HostBreaker.query.all():
+            self.transport.breaker(row.host).restore(row.state, row.consecutive_failures, row.open_until)
+            restored.add(row.host)
+        
+        available = []
+        for source in sources:
+            host = host_of(source.url)
+            breaker = self.transport.breaker(host)
+            if host not in restored:
+                breaker.restore(source.breaker_state, source.breaker_failures, source.breaker_open_until)
+            if breaker.is_open(now):
+                # 冷却结束前不再调度该来源
+                if source.next_crawl_time is None or source.next_crawl_time < breaker.open_until:
+                    source.next_crawl_time = breaker.open_until
+                self.last_refresh_stats['skipped'].append(source.name)
+                logger.warning(f'Skipping {source.name}: circuit open until {breaker.open_until.isoformat()}')
+            else:
+                available.append(source)
+        if len(available) < len(sources):
+            db.session.commit()
+        return available
+    
+    def _save_breakers(self, sources):
+        """把断路器状态写回host_breakers表和来源（由调用方提交）
+        
+        已有记录的主机和未处于正常闭合状态的主机写入host_breakers表，
+        包括正文页等来源首页以外的主机。
+        """
+        snapshots = self.transport.breaker_snapshots()
+        rows = {row.host: row for row in HostBreaker.query.all()}
+        for host, snapshot in snapshots.items():
+            row = rows.get(host)
+            if row is None:
+                if snapshot['state'] == 'closed' and not snapshot['consecutive_failures']:
+                    continue
+                row = HostBreaker(host=host)
+                db.session.add(row)
+            row.state = snapshot['state']
+            row.consecutive_failures = snapshot['consecutive_failures']
+            row.open_until = snapshot['open_until']
+        
+        for source in sources:
+            snapshot = self.transport.breaker(host_of(source.url)).snapshot()
+            source.breaker_state = snapshot['state']
+            source.breaker_failures = snapshot['consecutive_failures']
+            source.breaker_open_until = snapshot['open_until']
+    
+    def _log_refresh_summary(self):
+        """输出本次刷新的耗时汇总"""
+        summary = self.last_refresh_stats
+        logger.info(
+            f'Refresh finished in {summary["total_seconds"]}s '
+            f'with {summary["max_workers"]} workers for {len(summary["sources"])} sources'
+        )
+        if summary.get('skipped'):
+            logger.info(f'  skipped (circuit open): {", ".join(summary["skipped"])}')
+        for name, stats in summary['sources'].items():
+            logger.info(
+                f'  {name}: fetch {stats["fetch_seconds"]}s, save {stats["save_seconds"]}s, '
+                f'{stats["inserted"]} inserted, {stats["duplicates"]} duplicates of {stats["fetched"]} items, '
+                f'status {stats["status"]}'
+            )
+        transport = summary.get('transport')
+        if transport:
+            logger.info(
+                f'  transport: {transport["requests"]} requests over {transport["connections"]} connections, '
+                f'{transport["reused"]} reused, {transport["retries"]} retries, {transport["failures"]} failures, '
+                f'{transport["rejected"]} rejected by open circuits, {transport["throttled_seconds"]}s throttled'
+            )
+    
+    def get_source_fetcher(self, source_name):
+        """根据来源名称选择对应的抓取方法"""
+        fetchers = {
+            '腾讯新闻': self.fetch_tencent_news,
+            '网易新闻': self.fetch_163_news,
+            '新浪新闻': self.fetch_sina_news,
+            '央视新闻': self.fetch_cctv_news
+        }
+        return fetchers.get(source_name)
+    
     def fetch_tencent_news(self):
         """抓取腾讯新闻"""
         url = 'https://news.qq.com'
         try:
             # 添加编码处理
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.transport.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
             # 确保正确解码
             response.encoding = response.apparent_encoding
@@ -126,17 +311,15 @@ class NewsFetcher:
         """抓取网易新闻"""
         url = 'https://news.163.com'
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.transport.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'lxml')
             news_items = []
             
-            # 抓取头条新闻
-            headlines = soup.select('.ns_area a')
-            for headline in headlines[:15]:  # 限制数量
-                title = headline.text.strip()
-                news_url = headline.get('href')
+            # 抓取头条新闻（只解析到第15个头条链接为止）
+            headlines = islice(NETEASE_LINKS.iter_links(response.text), 15)  # 限制数量
+            for title, href, _ in headlines:
+                news_url = canonicalize_url(href, base_url=url)
                 if title and news_url:
                     news_items.append({
                         'title': title,
@@ -156,21 +339,16 @@ class NewsFetcher:
         """抓取新浪新闻"""
         url = 'https://news.sina.com.cn'
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.transport.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
             # 确保正确解码
             response.encoding = response.apparent_encoding
             
-            # 直接从响应文本中提取新闻链接（简单粗暴的方法）
-            news_items = []
-            content = response.text
-            
-            # 提取所有包含news.sina.com.cn的链接
-            import re
-            links = re.findall(r'<a[^>]+href="([^"]+news\.sina\.com\.cn[^"]+)"[^>]*>([^<]+)</a>', content)
+            # 提取包含news.sina.com.cn的链接，找到10个即停止扫描
+            sina_links = SINA_LINKS.links(response.text, 10)  # 限制数量
             
-            for news_url, title in links[:10]:  # 限制数量
-                title = title.strip()
+            news_items = []
+            for title, news_url in sina_links:
                 if title and len(title) > 10:
                     news_items.append({
                         'title': title,
@@ -180,13 +358,10 @@ class NewsFetcher:
                         'category': '综合'
                     })
             
-            # 如果正则表达式方法失败，尝试BeautifulSoup
+            # 如果正则表达式方法失败，流式解析页面前100个链接
             if not news_items:
-                soup = BeautifulSoup(content, 'lxml')
-                all_links = soup.find_all('a')
-                for link in all_links[:100]:  # 增加数量以提高命中率
-                    title = link.text.strip()
-                    news_url = link.get('href')
+                page_links = islice(PAGE_LINKS.iter_links(response.text), 100)  # 增加数量以提高命中率
+                for title, news_url, _ in page_links:
                     if title and news_url and len(title) > 10:
                         news_items.append({
                             'title': title,
@@ -209,25 +384,21 @@ class NewsFetcher:
         """抓取央视新闻"""
         url = 'https://news.cctv.com'
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.transport.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
             # 确保正确解码
             response.encoding = response.apparent_encoding
             
-            soup = BeautifulSoup(response.text, 'lxml')
             news_items = []
             
-            # 抓取新闻 - 使用更通用的方法
-            all_links = soup.find_all('a')
-            for link in all_links[:50]:  # 增加数量以提高命中率
-                title = link.text.strip()
-                news_url = link.get('href')
+            # 抓取新闻 - 使用更通用的方法（只解析到第50个链接为止）
+            all_links = islice(PAGE_LINKS.iter_links(response.text), 50)  # 增加数量以提高命中率
+            for title, news_url, _ in all_links:
                 if title and news_url:
-                    # 确保URL是完整的
-                    if not news_url.startswith('http'):
-                        news_url = url + news_url
+                    # 解析相对链接并规范化
+                    news_url = canonicalize_url(news_url, base_url=url)
                     # 过滤出新闻链接（包含news.cctv.com）
-                    if 'news.cctv.com' in news_url and len(title) > 10:
+                    if news_url and 'news.cctv.com' in news_url and len(title) > 10:
                         news_items.append({
                             'title': title,
                             'url': news_url,
@@ -246,71 +417,167 @@ class NewsFetcher:
             logger.error(f'Error fetching CCTV news: {e}')
             return []
     
-    def save_news(self, news_item):
-        """存储新闻到数据库"""
-        # 检查是否已存在
-        existing_news = News.query.filter_by(url=news_item['url']).first()
-        if existing_news:
-            logger.info(f'News already exists: {news_item["title"]}')
-            return existing_news
-        
-        # 创建新闻对象
+    def build_news(self, news_item):
+        """根据抓取到的条目构建新闻对象（不写入数据库）"""
+        url = canonicalize_url(news_item['url']) or news_item['url']
         news = News(
             title=news_item['title'],
             content=news_item.get('content', ''),
             source=news_item['source'],
-            url=news_item['url'],
+            url=url,
+            url_hash=url_hash(url),
             publish_time=news_item['publish_time'],
             category=news_item.get('category', '综合')
         )
         
-        # 尝试获取新闻内容
+        # 计算初始热度分数；对数热度分数入库时即写入，HOTNESS_MODE=log的排行榜不会漏掉未重算的新闻
+        news.hotness_score = self.calculate_initial_hotness(news)
+        news.hot_log_score = self.hotness_analyzer.calculate_hot_log_score(news)
+        return news
+    
+    def find_existing_hashes(self, hashes):
+        """分块IN查询，返回数据库中已存在的链接哈希集合"""
+        existing = set()
+        hashes = list(hashes)
+        for start in range(0, len(hashes), SQL_IN_CHUNK_SIZE):
+            chunk = hashes[start:start + SQL_IN_CHUNK_SIZE]
+            rows = db.session.query(News.url_hash).filter(News.url_hash.in_(chunk)).all()
+            existing.update(row.url_hash for row in rows)
+        return existing
+    
+    def insert_news_batch(self, news_items):
+        """批量插入新闻并提交一次，返回新入库新闻的(id, url, content)列表"""
+        return self.insert_news_rows([self._news_row(news_item) for news_item in news_items])
+    
+    def insert_news_rows(self, rows):
+        """批量插入已转换好的列字典
+        
+        调用方需先完成去重；若并发写入导致唯一约束冲突，退回逐条插入并跳过重复项。
+        新闻与其小时热度汇总增量在同一事务中提交。
+        """
+        if not rows:
+            return []
+        
         try:
-            if not news.content:
-                content = self.fetch_news_content(news.url)
-                news.content = content
-        except Exception as e:
-            logger.error(f'Error fetching news content: {e}')
+            db.session.execute(News.__table__.insert(), rows)
+            self.rollup_new_news(rows)
+            db.session.commit()
+            saved = rows
+        except IntegrityError:
+            db.session.rollback()
+            logger.warning('Bulk insert hit duplicate urls, falling back to row-by-row insert')
+            # 只记录本次实际插入的行，并发写入方插入的同一链接不算作本次保存
+            saved = []
+            for row in rows:
+                try:
+                    db.session.execute(News.__table__.insert(), row)
+                    self.rollup_new_news([row])
+                    db.session.commit()
+                    saved.append(row)
+                except IntegrityError:
+                    db.session.rollback()
         
-        # 计算初始热度分数
-        news.hotness_score = self.calculate_initial_hotness(news)
+        # 回查新行的ID，供故事链接和正文回填使用
+        rows_by_hash = {row['url_hash']: row for row in saved}
+        inserted = []
+        for start in range(0, len(saved), SQL_IN_CHUNK_SIZE):
+            chunk = [row['url_hash'] for row in saved[start:start + SQL_IN_CHUNK_SIZE]]
+            query = db.session.query(News.id, News.url_hash).filter(News.url_hash.in_(chunk))
+            inserted.extend((news_id, rows_by_hash[hash_key]) for news_id, hash_key in query.all())
+        inserted.sort(key=lambda item: item[0])
+        
+        self.link_stories(inserted)
+        self.link_related(inserted)
+        if inserted:
+            # 热词检测器在入库时即追赶新标题
+            get_trending_terms()
+            data_generation.bump()
+        
+        logger.info(f'Saved {len(inserted)} news in one batch')
+        return [(news_id, row['url'], row['content']) for news_id, row in inserted]
+    
+    def rollup_new_news(self, rows):
+        """把本次插入的新闻计入小时热度汇总（不提交，与插入在同一事务中）"""
+        rollup = RollupDeltas()
+        for row in rows:
+            rollup.add_news(row)
+        rollup.apply()
+    
+    def link_stories(self, inserted):
+        """为新入库的新闻分配故事ID和故事簇ID
+        
+        近似重复的新闻链接到同一故事，否则自成一个故事；报道同一事件的新闻按标题的
+        TF-IDF相似度归入同一故事簇，近似重复的新闻总是与其故事在同一个簇中。
+        """
+        if not inserted:
+            return
         
-        # 保存到数据库
-        db.session.add(news)
+        index = get_near_duplicate_index()
+        clusters = get_story_cluster_index()
+        updates = []
+        for news_id, row in inserted:
+            sig = signature(row['title'], row['content'])
+            story_id = news_id if sig is None else index.assign(news_id, sig, row['publish_time'])
+            cluster_id = clusters.assign(news_id, row['title'], row['publish_time'], story_id)
+            updates.append({'news_id': news_id, 'story_id': story_id, 'cluster_id': cluster_id})
+        
+        table = News.__table__
+        db.session.execute(
+            table.update().where(table.c.id == bindparam('news_id')).values(
+                story_id=bindparam('story_id'), cluster_id=bindparam('cluster_id')
+            ),
+            updates
+        )
         db.session.commit()
         
-        logger.info(f'Saved news: {news.title}')
-        return news
+        linked = sum(1 for update in updates if update['story_id'] != update['news_id'])
+        if linked:
+            logger.info(f'Linked {linked} near-duplicate news to existing stories')
+        clustered = sum(1 for update in updates if update['cluster_id'] != update['news_id'])
+        if clustered:
+            logger.info(f'Clustered {clustered} news into existing story clusters')
+    
+    def link_related(self, inserted):
+        """为新入库的新闻预先计算相关新闻，双向写入news_related表"""
+        if not inserted:
+            return
+        
+        index = get_related_news_index()
+        related = {
+            news_id: index.relate(news_id, row['title'], row['publish_time'])
+            for news_id, row in inserted
+        }
+        if save_related(related):
+            db.session.commit()
+    
+    def _news_row(self, news_item):
+        """把抓取条目转换为可直接批量插入的列字典"""
+        news = self.build_news(news_item)
+        return {
+            'title': news.title,
+            'content': news.content or '',
+            'source': news.source,
+            'url': news.url,
+            'url_hash': news.url_hash,
+            'publish_time': news.publish_time,
+            'crawl_time': datetime.utcnow(),
+            'category': news.category,
+            'hotness_score': news.hotness_score,
+            'hot_log_score': news.hot_log_score,
+            'sentiment_score': 0.0,
+            'view_count': 0,
+            'comment_count': 0,
+            'share_count': 0
+        }
     
     def fetch_news_content(self, url):
         """获取新闻详情内容"""
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.transport.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # 移除脚本和样式
-            for script in soup(['script', 'style']):
-                script.decompose()
-            
-            # 尝试提取正文内容
-            content_tags = ['article', '.content', '.main-content', '.article-content', '#content']
-            content = ''
-            
-            for tag in content_tags:
-                elements = soup.select(tag)
-                if elements:
-                    content = ' '.join([p.text.strip() for p in elements[0].find_all('p')])
-                    if content:
-                        break
-            
-            # 如果没有找到正文，尝试提取所有段落
-            if not content:
-                paragraphs = soup.find_all('p')
-                content = ' '.join([p.text.strip() for p in paragraphs[:20]])  # 限制段落数量
-            
-            return content[:2000]  # 限制内容长度
+            # 提取正文内容（最多2000字）
+            return ARTICLE_CONTENT.extract(response.text)
             
         except Exception as e:
             logger.error(f'Error fetching news content from {url}: {e}')
@@ -320,7 +587,7 @@ class NewsFetcher:
         """抓取Bloomberg经济新闻"""
         url = 'https://www.bloomberg.com/economics'
         try:
-            response = requests.get(url, headers=self.headers, proxies=self.proxies, timeout=15)
+            response = self.transport.get(url, headers=self.headers, proxies=self.proxies, timeout=15)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'lxml')
@@ -334,12 +601,9 @@ class NewsFetcher:
                 
                 if title_elem and url_elem:
                     title = title_elem.text.strip()
-                    news_url = url_elem.get('href')
+                    news_url = canonicalize_url(url_elem.get('href'), base_url=url)
                     
                     if title and news_url:
-                        if not news_url.startswith('http'):
-                            news_url = 'https://www.bloomberg.com' + news_url
-                        
                         news_items.append({
                             'title': title,
                             'url': news_url,
@@ -358,7 +622,7 @@ class NewsFetcher:
         """抓取Reuters经济新闻"""
         url = 'https://www.reuters.com/business/economy'
         try:
-            response = requests.get(url, headers=self.headers, proxies=self.proxies, timeout=15)
+            response = self.transport.get(url, headers=self.headers, proxies=self.proxies, timeout=15)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'lxml')
@@ -372,12 +636,9 @@ class NewsFetcher:
                 
                 if title_elem and url_elem:
                     title = title_elem.text.strip()
-                    news_url = url_elem.get('href')
+                    news_url = canonicalize_url(url_elem.get('href'), base_url=url)
                     
                     if title and news_url:
-                        if not news_url.startswith('http'):
-                            news_url = 'https://www.reuters.com' + news_url
-                        
                         news_items.append({
                             'title': title,
                             'url': news_url,
@@ -396,7 +657,7 @@ class NewsFetcher:
         """抓取CNBC经济新闻"""
         url = 'https://www.cnbc.com/economy/'
         try:
-            response = requests.get(url, headers=self.headers, proxies=self.proxies, timeout=15)
+            response = self.transport.get(url, headers=self.headers, proxies=self.proxies, timeout=15)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'lxml')
@@ -409,12 +670,9 @@ class NewsFetcher:
                 
                 if url_elem:
                     title = article.text.strip()
-                    news_url = url_elem.get('href')
+                    news_url = canonicalize_url(url_elem.get('href'), base_url=url)
                     
                     if title and news_url:
-                        if not news_url.startswith('http'):
-                            news_url = 'https://www.cnbc.com' + news_url
-                        
                         news_items.append({
                             'title': title,
                             'url': news_url,
@@ -0,0 +1,212 @@
+import fcntl
+import json
+import os
+import threading
+import uuid
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from app.models import db, RefreshJob
+from app.news_fetcher.fetcher import NewsFetcher
+from app.hot_analysis.analyzer import HotnessAnalyzer
+from app.hot_analysis.snapshot import hot_rank_snapshots
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 尚未结束的任务状态
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class RefreshProgress:
+    """运行中任务的进度，每次变化写回refresh_jobs表
+
+    只有运行任务的线程会写入，计数保存在本对象中，按整行写回，无需先读取数据库。
+    抓取器在提交每个来源的结果之后才回调，进度写入不会与抓取器未提交的数据混在一起。
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.sources_total = 0
+        self.sources_done = 0
+        self.items_fetched = 0
+        self.items_inserted = 0
+        self.errors = []
+
+    def sources_planned(self, total):
+        """抓取器确定本次要抓取的来源后回调"""
+        self.sources_total = total
+        self._save()
+
+    def source_finished(self, source_name, stats):
+        """每个来源存储完成后回调"""
+        self.sources_done += 1
+        self.items_fetched += stats.get('fetched', 0)
+        self.items_inserted += stats.get('inserted', 0)
+        if stats.get('status') == 'error':
+            self.errors.append({'source': source_name, 'error': stats.get('error')})
+        self._save()
+
+    def mark_started(self):
+        self._save(started_at=datetime.utcnow())
+
+    def mark_finished(self, summary=None, error=None):
+        """记录任务结果；error不为None时任务失败"""
+        if error is not None:
+            self.errors.append({'source': None, 'error': error})
+        values = {'status': 'failed' if error is not None else 'succeeded', 'finished_at': datetime.utcnow()}
+        if summary is not None:
+            values['summary'] = json.dumps(summary, ensure_ascii=False, default=str)
+        self._save(**values)
+
+    def _save(self, **values):
+        table = RefreshJob.__table__
+        db.session.execute(table.update().where(table.c.id == self.job_id).values(
+            sources_total=self.sources_total,
+            sources_done=self.sources_done,
+            items_fetched=self.items_fetched,
+            items_inserted=self.items_inserted,
+            errors=json.dumps(self.errors, ensure_ascii=False),
+            **values
+        ))
+        db.session.commit()
+
+
+class RefreshJobManager:
+    """在后台线程中执行新闻刷新，所有工作进程中同一时间只运行一个任务
+
+    任务记录保存在refresh_jobs表中，任何工作进程都能查询任务状态，只保留最近
+    REFRESH_JOB_HISTORY个已结束的任务。提交和结束任务都在实例目录的文件锁内完成：
+    任务运行期间的重复刷新请求会合并到正在运行的任务中；正在运行的任务不是强制刷新时，
+    强制刷新请求会排入一个后续的强制刷新任务，在当前任务结束后运行（多个请求合并到同一个
+    后续任务）。运行任务的进程一直持有运行锁，直到没有排队的任务；进程退出时锁自动释放，
+    数据库中遗留的未结束任务在下次提交时标记为失败。
+    """
+
+    LOCK_NAME = 'refresh_jobs.lock'
+    RUN_LOCK_NAME = 'refresh_jobs.run'
+
+    def __init__(self, history=None):
+        self.history = history or Config.REFRESH_JOB_HISTORY
+
+    def submit(self, app, force=False):
+        """提交刷新任务，返回(任务, 是否新建)；排队的后续任务状态为queued"""
+        with self._submit_lock(app):
+            active = RefreshJob.query.filter(RefreshJob.status.in_(ACTIVE_STATUSES)).order_by(
+                RefreshJob.created_at
+            ).all()
+            run_lock = self._try_run_lock(app)
+            if run_lock is None:
+                if not active:
+                    raise RuntimeError('Refresh run lock is held but no job is active')
+                current = next((job for job in active if job.status == 'running'), active[0])
+                queued = next((job for job in active if job.status == 'queued'), None)
+                if not force or current.force:
+                    job, created = current, False
+                elif queued is not None:
+                    job, created = queued, False
+                else:
+                    job, created = self._add(force=True, status='queued'), True
+                if not created:
+                    job.merged_requests = (job.merged_requests or 0) + 1
+                db.session.commit()
+                return job, created
+
+            # 没有进程持有运行锁，遗留的未结束任务所在的进程已经退出
+            for stale in active:
+                stale.status = 'failed'
+                stale.finished_at = datetime.utcnow()
+                stale.errors = json.dumps([{'source': None, 'error': 'interrupted'}])
+            job = self._add(force=force, status='running')
+            db.session.commit()
+
+        self._start(app, job.id, run_lock)
+        return job, True
+
+    def get(self, job_id):
+        return db.session.get(RefreshJob, job_id)
+
+    def _add(self, force, status):
+        """新建任务，并删除超出保留数量的已结束任务（不提交）"""
+        job = RefreshJob(id=uuid.uuid4().hex, force=force, status=status, created_at=datetime.utcnow())
+        db.session.add(job)
+        expired = RefreshJob.query.filter(RefreshJob.status.notin_(ACTIVE_STATUSES)).order_by(
+            RefreshJob.created_at.desc()
+        ).offset(self.history).all()
+        for old in expired:
+            db.session.delete(old)
+        return job
+
+    def _path(self, app, name):
+        os.makedirs(app.instance_path, exist_ok=True)
+        return os.path.join(app.instance_path, name)
+
+    @contextmanager
+    def _submit_lock(self, app):
+        """跨进程互斥地查询和修改任务队列"""
+        with open(self._path(app, self.LOCK_NAME), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _try_run_lock(self, app):
+        """获取运行锁并返回其文件对象；已有进程在运行任务时返回None"""
+        f = open(self._path(app, self.RUN_LOCK_NAME), 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return None
+        return f
+
+    def _start(self, app, job_id, run_lock):
+        thread = threading.Thread(
+            target=self._run, args=(app, job_id, run_lock), name=f'news-refresh-{job_id[:8]}', daemon=True
+        )
+        thread.start()
+
+    def _run(self, app, job_id, run_lock):
+        """依次运行任务及其后排队的任务，没有排队的任务时释放运行锁"""
+        while job_id is not None:
+            with app.app_context():
+                progress = RefreshProgress(job_id)
+                summary = error = None
+                try:
+                    force = bool(db.session.get(RefreshJob, job_id).force)
+                    progress.mark_started()
+                    fetcher = NewsFetcher()
+                    fetcher.fetch_all_news(force=force, progress=progress)
+                    summary = fetcher.last_refresh_stats
+                    # 重算新入库和到期新闻的热度，让本进程已有的热度排行榜快照反映新入库的新闻
+                    HotnessAnalyzer().refresh_hotness()
+                    hot_rank_snapshots.rebuild_known()
+                except Exception as e:
+                    logger.error(f'Refresh job {job_id} failed: {e}')
+                    db.session.rollback()
+                    error = str(e)
+
+                # 结束当前任务并取出排队的强制刷新任务，两步在同一把锁内完成，新请求不会插到中间
+                try:
+                    with self._submit_lock(app):
+                        progress.mark_finished(summary, error)
+                        next_job = RefreshJob.query.filter_by(status='queued').order_by(
+                            RefreshJob.created_at
+                        ).first()
+                        if next_job is not None:
+                            next_job.status = 'running'
+                            db.session.commit()
+                            job_id = next_job.id
+                        else:
+                            job_id = None
+                            run_lock.close()
+                except Exception as e:
+                    logger.error(f'Unable to finish refresh job {job_id}: {e}')
+                    job_id = None
+                    run_lock.close()
+                finally:
+                    db.session.remove()
+
+
+refresh_jobs = RefreshJobManager()
@@ -0,0 +1,179 @@
+import hashlib
+import heapq
+import random
+import re
+import threading
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app.models import db, News
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# MinHash使用的梅森素数及固定种子的哈希置换，保证各进程得到相同签名
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20260205)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(Config.NEAR_DUP_BANDS * Config.NEAR_DUP_ROWS)
+]
+
+# 计算特征前去掉的空白和标点
+_NOISE_PATTERN = re.compile(r'[\s\W_]+', re.UNICODE)
+
+# 标题前缀中的来源名称，如“腾讯新闻：”
+_SOURCE_PREFIX_PATTERN = re.compile(r'^[^：:]{2,6}新闻[：:]')
+
+
+def shingles(title, content=''):
+    """标题（及可选的正文开头）的字符n-gram集合"""
+    text = _SOURCE_PREFIX_PATTERN.sub('', title or '')
+    if Config.NEAR_DUP_CONTENT_CHARS:
+        text += (content or '')[:Config.NEAR_DUP_CONTENT_CHARS]
+    text = _NOISE_PATTERN.sub('', text)
+
+    n = Config.NEAR_DUP_NGRAM
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[start:start + n] for start in range(len(text) - n + 1)}
+
+
+def minhash(features):
+    """计算特征集合的MinHash签名，特征为空时返回None"""
+    if not features:
+        return None
+    hashes = [
+        int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for feature in features
+    ]
+    return tuple(
+        min((a * value + b) % _MERSENNE_PRIME for value in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def signature(title, content=''):
+    return minhash(shingles(title, content))
+
+
+def estimated_jaccard(a, b):
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+class NearDuplicateIndex:
+    """MinHash签名的LSH分段索引
+
+    签名按NEAR_DUP_ROWS个值一段切成NEAR_DUP_BANDS段，只有至少一段完全相同的
+    新闻才会成为候选，再用签名估计的Jaccard相似度确认，因此查找代价与候选数
+    而不是新闻总数成正比。索引只保留最近window_days天的新闻，并按ID增量追赶
+    其他进程写入的数据。
+    """
+
+    def __init__(self, threshold=None, window_days=None):
+        self.threshold = Config.NEAR_DUP_THRESHOLD if threshold is None else threshold
+        self.window = timedelta(days=window_days or Config.NEAR_DUP_WINDOW_DAYS)
+        self.rows = Config.NEAR_DUP_ROWS
+        self._buckets = [{} for _ in range(Config.NEAR_DUP_BANDS)]
+        self._entries = []  # (publish_time, news_id)的最小堆，按发布时间淘汰
+        self._signatures = {}
+        self._story_ids = {}
+        self._last_id = 0
+        self._lock = threading.RLock()
+
+    def _band_keys(self, sig):
+        return [hash(sig[start:start + self.rows]) for start in range(0, len(sig), self.rows)]
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def find(self, sig):
+        """返回最相似的近似重复新闻(news_id, story_id, 相似度)，没有时返回None"""
+        best = None
+        with self._lock:
+            candidates = set()
+            for buckets, key in zip(self._buckets, self._band_keys(sig)):
+                candidates.update(buckets.get(key, ()))
+            for news_id in candidates:
+                similarity = estimated_jaccard(sig, self._signatures[news_id])
+                if similarity >= self.threshold and (best is None or similarity > best[2]):
+                    best = (news_id, self._story_ids[news_id], similarity)
+        return best
+
+    def add(self, news_id, sig, story_id, publish_time=None):
+        with self._lock:
+            if news_id in self._signatures:
+                return
+            for buckets, key in zip(self._buckets, self._band_keys(sig)):
+                buckets.setdefault(key, set()).add(news_id)
+            self._signatures[news_id] = sig
+            self._story_ids[news_id] = story_id
+            heapq.heappush(self._entries, (publish_time or datetime.utcnow(), news_id))
+            self._last_id = max(self._last_id, news_id)
+
+    def assign(self, news_id, sig, publish_time=None):
+        """为新入库的新闻确定所属故事ID并加入索引"""
+        with self._lock:
+            match = self.find(sig)
+            story_id = match[1] if match else news_id
+            self.add(news_id, sig, story_id, publish_time)
+            return story_id
+
+    def evict_expired(self, now=None):
+        """移除超出时间窗口的新闻"""
+        cutoff = (now or datetime.utcnow()) - self.window
+        with self._lock:
+            while self._entries and self._entries[0][0] < cutoff:
+                _, news_id = heapq.heappop(self._entries)
+                sig = self._signatures.pop(news_id, None)
+                self._story_ids.pop(news_id, None)
+                if sig is None:
+                    continue
+                for buckets, key in zip(self._buckets, self._band_keys(sig)):
+                    bucket = buckets.get(key)
+                    if bucket is not None:
+                        bucket.discard(news_id)
+                        if not bucket:
+                            del buckets[key]
+
+    def catch_up(self):
+        """从数据库加载索引中还没有的、已分配故事ID的新闻，返回加载的新闻数
+        
+        其他进程写入的新闻可能晚于ID更大的新闻提交或分配故事ID，因此从已加载的最大ID
+        往前INDEX_CATCH_UP_OVERLAP个ID处开始查找，跳过已在索引中的新闻。
+        """
+        cutoff = datetime.utcnow() - self.window
+        with self._lock:
+            rows = db.session.query(
+                News.id, News.title, func.substr(News.content, 1, Config.NEAR_DUP_CONTENT_CHARS),
+                News.story_id, News.publish_time
+            ).filter(
+                News.id > max(self._last_id - Config.INDEX_CATCH_UP_OVERLAP, 0),
+                News.story_id.isnot(None),
+                News.publish_time >= cutoff
+            ).order_by(News.id).all()
+            loaded = 0
+            for news_id, title, content, story_id, publish_time in rows:
+                if news_id in self._signatures:
+                    continue
+                sig = signature(title, content)
+                if sig is not None:
+                    self.add(news_id, sig, story_id, publish_time)
+                    loaded += 1
+            self.evict_expired()
+        return loaded
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index():
+    """获取进程内共享的近似重复索引，并追赶数据库中的新数据"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = NearDuplicateIndex()
+        index = _default_index
+    index.catch_up()
+    return index
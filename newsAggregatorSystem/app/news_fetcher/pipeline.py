@@ -0,0 +1,198 @@
+import queue
+import threading
+import time
+import logging
+from datetime import datetime
+from sqlalchemy import bindparam
+from app.models import db, News
+from app.news_fetcher.urls import canonicalize_url, url_hash
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 流水线各阶段，按执行顺序排列
+STAGES = ('list', 'normalize', 'dedupe', 'persist', 'body_fetch', 'backfill')
+
+# 工作线程退出标记
+_STOP = object()
+
+
+class IngestPipeline:
+    """分阶段的新闻入库流水线
+
+    列表 → 规范化 → 去重 → 持久化（正文待补）→ 正文抓取入队 → 回填正文。
+    正文抓取在有界队列后的工作线程中执行，队列满时生产者一边等待一边回填，
+    形成背压；所有数据库写入都在调用线程中完成。
+    """
+
+    def __init__(self, fetcher, body_workers=None, queue_size=None):
+        self.fetcher = fetcher
+        self.body_workers = body_workers or Config.INGEST_BODY_WORKERS
+        self.body_queue = queue.Queue(maxsize=queue_size or Config.INGEST_BODY_QUEUE_SIZE)
+        self.done_queue = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._seen_hashes = set()
+        self._stages = {stage: {'items': 0, 'seconds': 0.0} for stage in STAGES}
+
+    def start(self):
+        """启动正文抓取工作线程"""
+        for index in range(self.body_workers):
+            worker = threading.Thread(
+                target=self._body_worker,
+                name=f'news-body-{index}',
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+        return self
+
+    def process(self, news_list):
+        """处理单个来源的列表结果
+        
+        返回规范化后的新闻条目以及本批的插入数与重复数。
+        """
+        items = self._timed('normalize', news_list, self._normalize)
+        new_items = self._timed('dedupe', items, self._dedupe)
+        saved = self._timed('persist', new_items, self.fetcher.insert_news_batch)
+
+        for news_id, url, content in saved:
+            if not content:
+                self._enqueue_body(news_id, url)
+
+        # 顺便回填已完成的正文
+        self._drain_backfill()
+        return {
+            'items': items,
+            'inserted': len(saved),
+            'duplicates': len(items) - len(saved)
+        }
+
+    def finish(self):
+        """等待正文抓取完成并回填剩余内容"""
+        for _ in self._workers:
+            self._put_with_backpressure(_STOP)
+
+        while any(worker.is_alive() for worker in self._workers):
+            self._drain_backfill(wait=0.1)
+
+        for worker in self._workers:
+            worker.join()
+        self._drain_backfill()
+        self._workers = []
+
+    def record(self, stage, items, seconds):
+        """记录某个阶段处理的条目数和耗时"""
+        with self._lock:
+            self._stages[stage]['items'] += items
+            self._stages[stage]['seconds'] += seconds
+
+    def stats(self):
+        """返回队列深度和各阶段吞吐量"""
+        with self._lock:
+            stages = {}
+            for stage, values in self._stages.items():
+                seconds = values['seconds']
+                stages[stage] = {
+                    'items': values['items'],
+                    'seconds': round(seconds, 3),
+                    'items_per_second': round(values['items'] / seconds, 2) if seconds > 0 else None
+                }
+        return {
+            'queue_depth': self.body_queue.qsize(),
+            'pending_backfill': self.done_queue.qsize(),
+            'stages': stages
+        }
+
+    def _timed(self, stage, items, func):
+        start = time.perf_counter()
+        result = func(items)
+        self.record(stage, len(items), time.perf_counter() - start)
+        return result
+
+    def _normalize(self, news_list):
+        """清理标题、规范化链接，补全缺省字段，丢弃无效条目"""
+        items = []
+        for news_item in news_list:
+            title = ' '.join((news_item.get('title') or '').split())
+            url = canonicalize_url(news_item.get('url'))
+            if not title or not url:
+                continue
+            items.append({
+                'title': title[:255],
+                'url': url,
+                'source': news_item['source'],
+                'publish_time': news_item.get('publish_time') or datetime.utcnow(),
+                'category': news_item.get('category') or '综合',
+                'content': news_item.get('content', '')
+            })
+        return items
+
+    def _dedupe(self, items):
+        """按链接哈希去除本次刷新内重复以及数据库中已存在的新闻（一次批量查询）"""
+        candidates = []
+        for news_item in items:
+            hash_key = url_hash(news_item['url'])
+            if hash_key in self._seen_hashes:
+                continue
+            self._seen_hashes.add(hash_key)
+            candidates.append((hash_key, news_item))
+
+        existing_hashes = self.fetcher.find_existing_hashes([hash_key for hash_key, _ in candidates])
+        return [news_item for hash_key, news_item in candidates if hash_key not in existing_hashes]
+
+    def _enqueue_body(self, news_id, url):
+        self._put_with_backpressure((news_id, url))
+
+    def _put_with_backpressure(self, job):
+        """队列满时先回填已完成的正文，再重试入队"""
+        while True:
+            try:
+                self.body_queue.put(job, timeout=0.1)
+                return
+            except queue.Full:
+                self._drain_backfill()
+
+    def _body_worker(self):
+        while True:
+            job = self.body_queue.get()
+            if job is _STOP:
+                break
+            news_id, url = job
+            start = time.perf_counter()
+            try:
+                content = self.fetcher.fetch_news_content(url)
+            except Exception as e:
+                logger.error(f'Error fetching news content: {e}')
+                content = ''
+            self.record('body_fetch', 1, time.perf_counter() - start)
+            self.done_queue.put((news_id, content))
+
+    def _drain_backfill(self, wait=None):
+        """把已抓取到的正文批量写回数据库"""
+        rows = []
+        try:
+            if wait:
+                rows.append(self.done_queue.get(timeout=wait))
+            while True:
+                rows.append(self.done_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        rows = [{'news_id': news_id, 'content': content} for news_id, content in rows if content]
+        if not rows:
+            return
+
+        start = time.perf_counter()
+        table = News.__table__
+        try:
+            db.session.execute(
+                table.update().where(table.c.id == bindparam('news_id')).values(content=bindparam('content')),
+                rows
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f'Error backfilling news content: {e}')
+            return
+        self.record('backfill', len(rows), time.perf_counter() - start)
@@ -0,0 +1,114 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+# 断路器状态
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+
+class TokenBucket:
+    """令牌桶限速器：每秒补充rate个令牌，最多积累capacity个"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """预占一个令牌，返回需要等待的秒数（令牌不足时可预支，由等待时间偿还）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """阻塞直到获得一个令牌"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class CircuitBreaker:
+    """主机级断路器
+
+    连续失败达到failure_threshold次后断开，冷却cooldown秒内的请求直接拒绝；
+    冷却结束后进入半开状态，只放行一个试探请求，成功则闭合，失败则重新断开。
+    断开截止时间使用UTC时间，便于保存到数据库并在重启后恢复。
+    """
+
+    def __init__(self, failure_threshold, cooldown):
+        self.failure_threshold = failure_threshold
+        self.cooldown = timedelta(seconds=cooldown)
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.open_until = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def is_open(self, now=None):
+        """冷却期内返回True，不改变状态"""
+        now = now or datetime.utcnow()
+        with self._lock:
+            return self.state == BREAKER_OPEN and self.open_until is not None and now < self.open_until
+
+    def allow(self, now=None):
+        """判断是否放行一个请求；冷却结束后的第一个请求作为半开试探"""
+        now = now or datetime.utcnow()
+        with self._lock:
+            if self.state == BREAKER_CLOSED:
+                return True
+            if self.state == BREAKER_OPEN:
+                if self.open_until is not None and now < self.open_until:
+                    return False
+                self.state = BREAKER_HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = BREAKER_CLOSED
+            self.consecutive_failures = 0
+            self.open_until = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """试探请求未能判断主机是否可用时释放试探名额，状态不变，下一个请求重新试探"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self, now=None):
+        now = now or datetime.utcnow()
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == BREAKER_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = BREAKER_OPEN
+                self.open_until = now + self.cooldown
+
+    def restore(self, state, consecutive_failures, open_until):
+        """从持久化的状态恢复"""
+        with self._lock:
+            self.state = state or BREAKER_CLOSED
+            self.consecutive_failures = consecutive_failures or 0
+            self.open_until = open_until
+            self._trial_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'open_until': self.open_until
+            }
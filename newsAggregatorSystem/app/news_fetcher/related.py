@@ -0,0 +1,237 @@
+"""入库时预先计算的相关新闻
+
+新闻入库时在标题TF-IDF倒排索引中查找相似的已有新闻，把双向的相关关系写入news_related表，
+相关新闻接口只需按news_id读取一次。相关新闻表缺失或需要按新参数重新计算时可全量重建：
+
+    python -m app.news_fetcher.related --rebuild
+"""
+import argparse
+import math
+import threading
+import logging
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from app.models import db, News, RelatedNews
+from app.news_fetcher.story_cluster import title_ngrams
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 单条IN查询中的最大参数数（SQLite旧版本上限为999）
+SQL_IN_CHUNK_SIZE = 500
+
+
+class RelatedNewsIndex:
+    """标题TF-IDF字符n-gram向量的倒排索引，查找与新入库新闻最相似的已有新闻
+
+    每条新闻的全部n-gram都建立倒排索引；查找时用新闻中与其他新闻共有（文档频率大于1）的
+    n-gram查索引，只与命中次数最多的RELATED_NEWS_MAX_CANDIDATES个候选计算余弦相似度。
+    新闻只与ID更小（更早入库）的新闻相关联，反向关系由调用方一并写入，
+    因此同一批新闻无论是否已被catch_up加载，得到的结果都相同。
+    """
+
+    def __init__(self, threshold=None, window_days=None):
+        self.threshold = Config.RELATED_NEWS_THRESHOLD if threshold is None else threshold
+        self.window = timedelta(days=window_days or Config.RELATED_NEWS_WINDOW_DAYS)
+        self._df = Counter()
+        self._entries = deque()  # (publish_time, news_id, n-gram集合)，按加入顺序
+        self._vectors = {}
+        self._postings = {}
+        self._last_id = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def vector(self, grams):
+        """按当前文档频率计算L2归一化的TF-IDF向量"""
+        documents = len(self._entries)
+        weights = {
+            gram: count * (math.log((documents + 1) / (self._df[gram] + 1)) + 1)
+            for gram, count in grams.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return {gram: weight / norm for gram, weight in weights.items()} if norm else {}
+
+    def add(self, news_id, grams, publish_time):
+        """把新闻计入文档频率，保存其向量并建立倒排索引"""
+        with self._lock:
+            if news_id in self._vectors:
+                return
+            self._df.update(grams.keys())
+            self._entries.append((publish_time, news_id, frozenset(grams)))
+            self._last_id = max(self._last_id, news_id)
+
+            self._vectors[news_id] = self.vector(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(news_id)
+
+    def neighbours(self, news_id, grams, limit=None):
+        """ID小于news_id的新闻中与之最相似的limit条，返回[(新闻ID, 余弦相似度)]"""
+        limit = limit or Config.RELATED_NEWS_LIMIT
+        vector = self.vector(grams)
+        hits = Counter()
+        for gram in vector:
+            if self._df[gram] > 1:
+                hits.update(candidate for candidate in self._postings.get(gram, ()) if candidate < news_id)
+
+        scored = []
+        for candidate, _ in hits.most_common(Config.RELATED_NEWS_MAX_CANDIDATES):
+            other = self._vectors[candidate]
+            similarity = sum(weight * other.get(gram, 0.0) for gram, weight in vector.items())
+            if similarity >= self.threshold:
+                scored.append((candidate, round(similarity, 4)))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def relate(self, news_id, title, publish_time=None):
+        """计入新入库的新闻并返回其相关新闻"""
+        grams = title_ngrams(title)
+        if not grams:
+            return []
+        with self._lock:
+            self.add(news_id, grams, publish_time or datetime.utcnow())
+            return self.neighbours(news_id, grams)
+
+    def evict_expired(self, now=None):
+        """移除超出时间窗口的新闻"""
+        cutoff = (now or datetime.utcnow()) - self.window
+        with self._lock:
+            while self._entries and self._entries[0][0] < cutoff:
+                _, news_id, grams = self._entries.popleft()
+                for gram in grams:
+                    self._df[gram] -= 1
+                    if self._df[gram] <= 0:
+                        del self._df[gram]
+                for gram in self._vectors.pop(news_id, ()):
+                    posting = self._postings.get(gram)
+                    if posting is not None:
+                        posting.discard(news_id)
+                        if not posting:
+                            del self._postings[gram]
+
+    def catch_up(self, chunk_size=None):
+        """按ID分块加载索引中还没有的、仍在时间窗口内的新闻，返回加载的新闻数
+        
+        与近似重复索引相同，从已加载的最大ID往前INDEX_CATCH_UP_OVERLAP个ID处开始查找，
+        其他进程较晚提交的新闻不会被跳过。
+        """
+        chunk_size = chunk_size or Config.ANALYSIS_STREAM_CHUNK_SIZE
+        cutoff = datetime.utcnow() - self.window
+        total = 0
+        with self._lock:
+            last_id = max(self._last_id - Config.INDEX_CATCH_UP_OVERLAP, 0)
+            while True:
+                rows = db.session.query(News.id, News.title, News.publish_time).filter(
+                    News.id > last_id,
+                    News.publish_time >= cutoff
+                ).order_by(News.id).limit(chunk_size).all()
+                if not rows:
+                    break
+                for news_id, title, publish_time in rows:
+                    grams = title_ngrams(title) if news_id not in self._vectors else None
+                    if grams:
+                        self.add(news_id, grams, publish_time)
+                        total += 1
+                last_id = rows[-1].id
+            self.evict_expired()
+        return total
+
+
+def save_related(related):
+    """把{新闻ID: [(相关新闻ID, 相似度)]}按双向关系写入news_related表（不提交）
+
+    反向关系使已有新闻的相关新闻超过RELATED_NEWS_LIMIT条时，只保留相似度最高的部分。
+    返回写入后保留的关系数。
+    """
+    now = datetime.utcnow()
+    rows = []
+    for news_id, neighbours in related.items():
+        for related_id, score in neighbours:
+            rows.append({'news_id': news_id, 'related_id': related_id, 'score': score, 'created_at': now})
+            rows.append({'news_id': related_id, 'related_id': news_id, 'score': score, 'created_at': now})
+    if not rows:
+        return 0
+    db.session.execute(RelatedNews.__table__.insert(), rows)
+
+    reverse_ids = sorted({related_id for neighbours in related.values() for related_id, _ in neighbours})
+    return len(rows) - trim_related(reverse_ids)
+
+
+def trim_related(news_ids, limit=None):
+    """每条新闻只保留相似度最高的limit条相关新闻，返回删除的关系数"""
+    limit = limit or Config.RELATED_NEWS_LIMIT
+    table = RelatedNews.__table__
+    removed = 0
+    for start in range(0, len(news_ids), SQL_IN_CHUNK_SIZE):
+        rows = db.session.query(RelatedNews.id, RelatedNews.news_id).filter(
+            RelatedNews.news_id.in_(news_ids[start:start + SQL_IN_CHUNK_SIZE])
+        ).order_by(RelatedNews.news_id, RelatedNews.score.desc(), RelatedNews.related_id).all()
+
+        kept = Counter()
+        stale = []
+        for row_id, news_id in rows:
+            kept[news_id] += 1
+            if kept[news_id] > limit:
+                stale.append(row_id)
+        for offset in range(0, len(stale), SQL_IN_CHUNK_SIZE):
+            db.session.execute(table.delete().where(table.c.id.in_(stale[offset:offset + SQL_IN_CHUNK_SIZE])))
+        removed += len(stale)
+    return removed
+
+
+def rebuild(chunk_size=None):
+    """按时间窗口内的新闻全量重建相关新闻表，返回(新闻数, 关系数)"""
+    chunk_size = chunk_size or Config.ANALYSIS_STREAM_CHUNK_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=Config.RELATED_NEWS_WINDOW_DAYS)
+    index = RelatedNewsIndex()
+    db.session.execute(RelatedNews.__table__.delete())
+
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(News.id, News.title, News.publish_time).filter(
+            News.id > last_id,
+            News.publish_time >= cutoff
+        ).order_by(News.id).limit(chunk_size).all()
+        if not rows:
+            break
+        related = {news_id: index.relate(news_id, title, publish_time) for news_id, title, publish_time in rows}
+        save_related(related)
+        last_id = rows[-1].id
+        total += len(rows)
+    db.session.commit()
+    edges = db.session.query(RelatedNews).count()
+    logger.info(f'Rebuilt related news: {total} news, {edges} links')
+    return total, edges
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_related_news_index():
+    """获取进程内共享的相关新闻索引，并追赶数据库中的新数据"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = RelatedNewsIndex()
+        index = _default_index
+    index.catch_up()
+    return index
+
+
+if __name__ == '__main__':
+    from app import create_app
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Precomputed related news maintenance')
+    parser.add_argument('--rebuild', action='store_true', help='recompute related news for the recent window')
+    args = parser.parse_args()
+    if not args.rebuild:
+        parser.error('nothing to do, pass --rebuild')
+
+    app = create_app()
+    with app.app_context():
+        RelatedNews.__table__.create(bind=db.engine, checkfirst=True)
+        rebuild()
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlsplit, parse_qs
+
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 录制时保存的响应头
+RECORDED_HEADERS = ('Content-Type', 'Location')
+
+# 注入失败的方式：返回错误状态码，或直接断开连接
+FAILURE_MODES = ('status', 'reset')
+
+
+class FixtureStore:
+    """录制的响应：index.json保存链接到响应的映射，响应体按链接哈希存为单独文件"""
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._index = {}
+        self._lock = threading.Lock()
+        path = os.path.join(directory, self.INDEX_FILE)
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._index = json.load(f)
+
+    def __len__(self):
+        return len(self._index)
+
+    def save(self, url, status, headers, body):
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest() + '.body'
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            f.write(body)
+        with self._lock:
+            self._index[url] = {
+                'file': name,
+                'status': status,
+                'headers': {key: headers[key] for key in RECORDED_HEADERS if key in headers}
+            }
+
+    def load(self, url):
+        """返回(状态码, 响应头, 响应体)，没有录制时返回None"""
+        with self._lock:
+            entry = self._index.get(url)
+        if entry is None:
+            return None
+        with open(os.path.join(self.directory, entry['file']), 'rb') as f:
+            return entry['status'], entry['headers'], f.read()
+
+    def flush(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            index = dict(self._index)
+        with open(os.path.join(self.directory, self.INDEX_FILE), 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """正常发出请求，同时把每个响应（包括重定向的中间响应）写入FixtureStore"""
+
+    def __init__(self, store, **kwargs):
+        self.store = store
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.store.save(request.url, response.status_code, response.headers, response.content)
+        return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    """把请求转发到本地回放服务器，响应的url仍为原始链接
+
+    传输层按原始链接的主机做限速、断路和统计，因此回放时这些逻辑与线上一致。
+    """
+
+    def __init__(self, server_url, **kwargs):
+        self.server_url = server_url.rstrip('/')
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        original = request.url
+        request.url = f'{self.server_url}/replay?{urlencode({"url": original})}'
+        response = super().send(request, **kwargs)
+        response.url = original
+        return response
+
+
+def install_adapter(transport, adapter):
+    """在传输层的会话上挂载录制/回放适配器"""
+    transport.adapter = adapter
+    transport.session.mount('http://', adapter)
+    transport.session.mount('https://', adapter)
+
+
+class ReplayServer:
+    """在本地回放录制的响应，可配置延迟和失败注入
+
+    每个请求先等待latency秒再加上0到jitter秒的随机抖动；之后以failure_rate的
+    概率注入失败（返回failure_status，或在failure_mode为reset时直接断开连接）。
+    随机数使用固定种子，相同参数下的失败序列可复现。
+    """
+
+    def __init__(self, store, latency=0.0, jitter=0.0, failure_rate=0.0, failure_status=503,
+                 failure_mode='status', seed=0, host='127.0.0.1', port=0):
+        if failure_mode not in FAILURE_MODES:
+            raise ValueError(f'failure_mode must be one of {FAILURE_MODES}')
+        self.store = store
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.failure_mode = failure_mode
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counters = {'requests': 0, 'served': 0, 'missing': 0, 'injected_failures': 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='replay-server', daemon=True)
+        self._thread.start()
+        logger.info(f'Replaying {len(self.store)} recorded responses at {self.url}')
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, key):
+        with self._lock:
+            self.counters[key] += 1
+
+    def _plan(self):
+        """确定本次请求的等待时间以及是否注入失败"""
+        with self._lock:
+            self.counters['requests'] += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.failure_rate > 0 and self._random.random() < self.failure_rate
+        return delay, fail
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                delay, fail = server._plan()
+                if delay:
+                    time.sleep(delay)
+
+                if fail:
+                    server._count('injected_failures')
+                    if server.failure_mode == 'reset':
+                        self.close_connection = True
+                        return
+                    self._reply(server.failure_status, {'Content-Type': 'text/plain'}, b'injected failure')
+                    return
+
+                url = parse_qs(urlsplit(self.path).query).get('url', [''])[0]
+                recorded = server.store.load(url)
+                if recorded is None:
+                    server._count('missing')
+                    self._reply(404, {'Content-Type': 'text/plain'}, b'not recorded')
+                    return
+
+                server._count('served')
+                self._reply(*recorded)
+
+            def _reply(self, status, headers, body):
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
@@ -0,0 +1,66 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from app.models import NewsSource
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlScheduler:
+    """按来源抓取间隔调度抓取，并根据每次抓取到的新条目数自适应调整间隔
+
+    crawl_interval是用户设置的基准间隔；effective_interval是当前实际使用的间隔：
+    连续没有新条目时按比例放慢（不超过基准的SCHEDULER_MAX_FACTOR倍），
+    新条目较多时按比例加快（不低于SCHEDULER_MIN_INTERVAL分钟）。
+    """
+
+    def __init__(self):
+        self.backoff_factor = Config.SCHEDULER_BACKOFF_FACTOR
+        self.speedup_factor = Config.SCHEDULER_SPEEDUP_FACTOR
+        self.busy_threshold = Config.SCHEDULER_BUSY_THRESHOLD
+        self.min_interval = Config.SCHEDULER_MIN_INTERVAL
+        self.max_factor = Config.SCHEDULER_MAX_FACTOR
+
+    def due_sources(self, now=None):
+        """返回已到抓取时间的启用来源"""
+        now = now or datetime.utcnow()
+        return NewsSource.query.filter(
+            NewsSource.enabled.is_(True),
+            or_(NewsSource.next_crawl_time.is_(None), NewsSource.next_crawl_time <= now)
+        ).all()
+
+    def record_result(self, source, inserted, success=True, now=None):
+        """根据本次抓取结果调整来源的实际间隔并安排下次抓取（由调用方提交）"""
+        now = now or datetime.utcnow()
+        base = source.crawl_interval or 30
+        current = source.effective_interval or base
+
+        if success:
+            if inserted == 0:
+                current = min(current * self.backoff_factor, base * self.max_factor)
+            elif inserted >= self.busy_threshold:
+                current = max(current * self.speedup_factor, self.min_interval)
+            source.last_new_count = inserted
+
+        source.effective_interval = max(int(round(current)), 1)
+        source.next_crawl_time = now + timedelta(minutes=source.effective_interval)
+
+    def reset(self, source):
+        """用户修改基准间隔后，从新的基准重新开始自适应"""
+        source.effective_interval = source.crawl_interval
+        if source.last_crawl_time:
+            source.next_crawl_time = source.last_crawl_time + timedelta(minutes=source.crawl_interval)
+        else:
+            source.next_crawl_time = None
+
+    def state(self, source, now=None):
+        """来源的调度状态"""
+        now = now or datetime.utcnow()
+        return {
+            'crawl_interval': source.crawl_interval,
+            'effective_interval': source.effective_interval or source.crawl_interval,
+            'next_crawl_time': source.next_crawl_time.isoformat() if source.next_crawl_time else None,
+            'last_new_count': source.last_new_count,
+            'due': source.enabled and (source.next_crawl_time is None or source.next_crawl_time <= now)
+        }
@@ -0,0 +1,214 @@
+import math
+import re
+import threading
+import logging
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from app.models import db, News
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 计算特征前去掉的空白和标点
+_NOISE_PATTERN = re.compile(r'[\s\W_]+', re.UNICODE)
+
+# 标题前缀中的来源名称，如“腾讯新闻：”
+_SOURCE_PREFIX_PATTERN = re.compile(r'^[^：:]{2,6}新闻[：:]')
+
+
+def title_ngrams(title):
+    """标题的字符二元和三元组计数"""
+    text = _NOISE_PATTERN.sub('', _SOURCE_PREFIX_PATTERN.sub('', title or '')).lower()
+    grams = Counter()
+    for n in (2, 3):
+        grams.update(text[start:start + n] for start in range(len(text) - n + 1))
+    return grams
+
+
+class _Cluster:
+    __slots__ = ('centroid', 'norm', 'size', 'last_time', 'index_terms')
+
+    def __init__(self):
+        self.centroid = {}  # 成员向量之和，只保留权重最高的STORY_CLUSTER_CENTROID_TERMS个n-gram
+        self.norm = 0.0
+        self.size = 0
+        self.last_time = None
+        self.index_terms = frozenset()
+
+
+class StoryClusterIndex:
+    """在线故事聚类：新闻按TF-IDF字符n-gram向量归入余弦相似度最高的故事簇
+
+    文档频率只统计时间窗口内的新闻并随窗口滑动增减。每个簇的中心是成员向量之和，
+    加入新成员时增量更新并只保留权重最高的若干n-gram；这些n-gram建立倒排索引，
+    新闻只与共享n-gram最多的少数候选簇比较，计算相似度的次数与新闻总数无关。
+    簇ID为首篇新闻的ID；已链接为近似重复的新闻直接加入其故事所在的簇。
+    """
+
+    def __init__(self, threshold=None, window_hours=None):
+        self.threshold = Config.STORY_CLUSTER_THRESHOLD if threshold is None else threshold
+        self.window = timedelta(hours=window_hours or Config.STORY_CLUSTER_WINDOW_HOURS)
+        self._df = Counter()
+        self._entries = deque()  # (publish_time, news_id, n-gram集合)，按加入顺序
+        self._news_clusters = {}
+        self._clusters = {}
+        self._postings = {}
+        self._last_id = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._clusters)
+
+    def vector(self, grams):
+        """按当前文档频率计算L2归一化的TF-IDF向量"""
+        documents = len(self._entries)
+        weights = {
+            gram: count * (math.log((documents + 1) / (self._df[gram] + 1)) + 1)
+            for gram, count in grams.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return {gram: weight / norm for gram, weight in weights.items()} if norm else {}
+
+    def find(self, vector):
+        """返回(簇ID, 余弦相似度)，没有达到阈值的簇时返回None
+        
+        用新闻中所有与其他新闻共有（文档频率大于1）的n-gram查倒排索引，只与命中次数
+        最多的STORY_CLUSTER_MAX_CANDIDATES个候选簇计算相似度。
+        """
+        hits = Counter()
+        for gram in vector:
+            if self._df[gram] > 1:
+                hits.update(self._postings.get(gram, ()))
+
+        best = None
+        for cluster_id, _ in hits.most_common(Config.STORY_CLUSTER_MAX_CANDIDATES):
+            cluster = self._clusters[cluster_id]
+            centroid = cluster.centroid
+            similarity = sum(weight * centroid.get(gram, 0.0) for gram, weight in vector.items()) / cluster.norm
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (cluster_id, similarity)
+        return best
+
+    def assign(self, news_id, title, publish_time=None, story_id=None):
+        """为新入库的新闻确定故事簇ID并更新簇中心"""
+        publish_time = publish_time or datetime.utcnow()
+        grams = title_ngrams(title)
+        with self._lock:
+            if story_id is not None and story_id != news_id and story_id in self._news_clusters:
+                cluster_id = self._news_clusters[story_id]
+            else:
+                self._count_document(grams)
+                match = self.find(self.vector(grams)) if grams else None
+                cluster_id = match[0] if match else news_id
+                self._entries.pop()
+                self._uncount_document(grams)
+            self.add(news_id, grams, cluster_id, publish_time)
+            return cluster_id
+
+    def add(self, news_id, grams, cluster_id, publish_time):
+        """把已确定簇ID的新闻计入文档频率和簇中心"""
+        with self._lock:
+            if news_id in self._news_clusters:
+                return
+            self._count_document(grams, publish_time, news_id)
+            self._news_clusters[news_id] = cluster_id
+            self._last_id = max(self._last_id, news_id)
+
+            cluster = self._clusters.get(cluster_id)
+            if cluster is None:
+                cluster = self._clusters[cluster_id] = _Cluster()
+            cluster.size += 1
+            if cluster.last_time is None or publish_time > cluster.last_time:
+                cluster.last_time = publish_time
+            if grams:
+                for gram, weight in self.vector(grams).items():
+                    cluster.centroid[gram] = cluster.centroid.get(gram, 0.0) + weight
+                self._trim_centroid(cluster_id, cluster)
+
+    def _count_document(self, grams, publish_time=None, news_id=None):
+        self._df.update(grams.keys())
+        self._entries.append((publish_time, news_id, frozenset(grams)))
+
+    def _uncount_document(self, grams):
+        for gram in grams:
+            self._df[gram] -= 1
+            if self._df[gram] <= 0:
+                del self._df[gram]
+
+    def _trim_centroid(self, cluster_id, cluster):
+        """只保留权重最高的n-gram，并同步倒排索引"""
+        top = sorted(cluster.centroid.items(), key=lambda item: item[1], reverse=True)
+        cluster.centroid = dict(top[:Config.STORY_CLUSTER_CENTROID_TERMS])
+        cluster.norm = math.sqrt(sum(weight * weight for weight in cluster.centroid.values())) or 1.0
+
+        index_terms = frozenset(cluster.centroid)
+        for gram in cluster.index_terms - index_terms:
+            self._unpost(gram, cluster_id)
+        for gram in index_terms - cluster.index_terms:
+            self._postings.setdefault(gram, set()).add(cluster_id)
+        cluster.index_terms = index_terms
+
+    def _unpost(self, gram, cluster_id):
+        posting = self._postings.get(gram)
+        if posting is not None:
+            posting.discard(cluster_id)
+            if not posting:
+                del self._postings[gram]
+
+    def evict_expired(self, now=None):
+        """移除超出时间窗口的新闻的文档频率，以及窗口内没有新成员的簇"""
+        cutoff = (now or datetime.utcnow()) - self.window
+        with self._lock:
+            while self._entries and self._entries[0][0] < cutoff:
+                _, news_id, grams = self._entries.popleft()
+                self._uncount_document(grams)
+                self._news_clusters.pop(news_id, None)
+            for cluster_id in [cluster_id for cluster_id, cluster in self._clusters.items()
+                               if cluster.last_time < cutoff]:
+                cluster = self._clusters.pop(cluster_id)
+                for gram in cluster.index_terms:
+                    self._unpost(gram, cluster_id)
+
+    def catch_up(self, chunk_size=None):
+        """按ID分块加载索引中还没有的、已分配簇ID的新闻，返回加载的新闻数
+        
+        与近似重复索引相同，从已加载的最大ID往前INDEX_CATCH_UP_OVERLAP个ID处开始查找，
+        其他进程较晚提交或较晚分配簇ID的新闻不会被跳过。
+        """
+        chunk_size = chunk_size or Config.ANALYSIS_STREAM_CHUNK_SIZE
+        cutoff = datetime.utcnow() - self.window
+        total = 0
+        with self._lock:
+            last_id = max(self._last_id - Config.INDEX_CATCH_UP_OVERLAP, 0)
+            while True:
+                rows = db.session.query(
+                    News.id, News.title, News.cluster_id, News.publish_time
+                ).filter(
+                    News.id > last_id,
+                    News.cluster_id.isnot(None),
+                    News.publish_time >= cutoff
+                ).order_by(News.id).limit(chunk_size).all()
+                if not rows:
+                    break
+                for news_id, title, cluster_id, publish_time in rows:
+                    if news_id not in self._news_clusters:
+                        self.add(news_id, title_ngrams(title), cluster_id, publish_time)
+                        total += 1
+                last_id = rows[-1].id
+            self.evict_expired()
+        return total
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_story_cluster_index():
+    """获取进程内共享的故事聚类索引，并追赶数据库中的新数据"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = StoryClusterIndex()
+        index = _default_index
+    index.catch_up()
+    return index
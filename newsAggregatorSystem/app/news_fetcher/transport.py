@@ -0,0 +1,220 @@
+import random
+import threading
+import time
+import logging
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from app.news_fetcher.politeness import TokenBucket, CircuitBreaker
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 需要重试的HTTP状态码
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def host_of(url):
+    """链接所属主机（含非默认端口），用作连接池、限速和断路器的键"""
+    return urlsplit(url).netloc.lower()
+
+
+class CircuitOpenError(requests.RequestException):
+    """主机断路器处于断开状态，请求未发出"""
+
+    def __init__(self, host, open_until=None):
+        self.host = host
+        self.open_until = open_until
+        until = f' until {open_until.isoformat()}' if open_until else ''
+        super().__init__(f'Circuit open for {host}{until}')
+
+
+class _ConnectionCountingAdapter(HTTPAdapter):
+    """新建连接时回调on_new_connection(主机)的适配器
+
+    计数由传输层保存，连接池因超出HTTP_POOL_HOSTS被淘汰后，其新建连接数不会丢失。
+    """
+
+    def __init__(self, on_new_connection, **kwargs):
+        # HTTPAdapter.__init__会调用init_poolmanager，回调需先设置
+        self._on_new_connection = on_new_connection
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: self._counting_pool(pool_class)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def _counting_pool(self, pool_class):
+        on_new_connection = self._on_new_connection
+
+        class CountingPool(pool_class):
+            def _new_conn(self):
+                host = self.host if self.port in (None, 80, 443) else f'{self.host}:{self.port}'
+                on_new_connection(host.lower())
+                return super()._new_conn()
+
+        CountingPool.__name__ = f'Counting{pool_class.__name__}'
+        return CountingPool
+
+
+class HttpTransport:
+    """抓取器共享的HTTP传输层
+
+    每个主机使用独立的keep-alive连接池，同一主机的并发连接数受限；
+    连接异常、超时以及5xx/429响应会按带抖动的指数退避进行有限次重试。
+    每个主机另有令牌桶限速（包括重试），以及在连续失败后暂停访问该主机的断路器；
+    只有连接异常、超时和重试后仍为5xx的响应计为断路器失败。
+    """
+
+    def __init__(self, headers=None, max_connections_per_host=None, max_retries=None,
+                 backoff_base=None, backoff_max=None):
+        self.max_connections_per_host = max_connections_per_host or Config.HTTP_MAX_CONNECTIONS_PER_HOST
+        self.max_retries = Config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = Config.HTTP_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = Config.HTTP_BACKOFF_MAX if backoff_max is None else backoff_max
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+
+        # 重试由本类负责，连接池满时阻塞等待，从而限制每个主机的连接数
+        self.adapter = _ConnectionCountingAdapter(
+            lambda host: self._record(host, 'connections'),
+            pool_connections=Config.HTTP_POOL_HOSTS,
+            pool_maxsize=self.max_connections_per_host,
+            pool_block=True,
+            max_retries=0
+        )
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        self._lock = threading.Lock()
+        self._host_stats = {}
+        self._buckets = {}
+        self._breakers = {}
+
+    def get(self, url, timeout=10, **kwargs):
+        """发送GET请求，失败时按退避策略重试
+
+        主机断路器断开时不发出请求，直接抛出CircuitOpenError。
+        """
+        host = host_of(url)
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            self._record(host, 'rejected')
+            raise CircuitOpenError(host, breaker.open_until)
+
+        bucket = self._bucket(host)
+        attempt = 0
+        while True:
+            waited = bucket.acquire()
+            if waited:
+                self._record(host, 'throttled_seconds', waited)
+            try:
+                response = self.session.get(url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(host, 'requests')
+                if attempt >= self.max_retries:
+                    self._record(host, 'failures')
+                    breaker.record_failure()
+                    raise
+                logger.warning(f'Request to {url} failed ({e}), retrying')
+            except requests.RequestException:
+                # 无效链接、重定向过多等请求本身的问题不说明主机不可用，不计入断路器，
+                # 但需释放半开状态下的试探名额，否则断路器不再放行请求
+                self._record(host, 'failures')
+                breaker.release_trial()
+                raise
+            else:
+                self._record(host, 'requests')
+                if response.status_code not in RETRY_STATUS_CODES:
+                    breaker.record_success()
+                    return response
+                if attempt >= self.max_retries:
+                    self._record(host, 'failures')
+                    # 只有5xx说明主机故障；429是限速，不断开主机
+                    if response.status_code >= 500:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                    return response
+                logger.warning(f'Request to {url} returned {response.status_code}, retrying')
+                response.close()
+
+            attempt += 1
+            self._record(host, 'retries')
+            time.sleep(self._backoff_delay(attempt))
+
+    def _backoff_delay(self, attempt):
+        """计算第attempt次重试前的等待时间（full jitter）"""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def _record(self, host, key, amount=1):
+        with self._lock:
+            stats = self._host_stats.setdefault(host, {
+                'requests': 0, 'connections': 0, 'retries': 0, 'failures': 0, 'rejected': 0,
+                'throttled_seconds': 0.0
+            })
+            stats[key] += amount
+
+    def _bucket(self, host):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(Config.HTTP_RATE_PER_HOST, Config.HTTP_RATE_BURST)
+            return bucket
+
+    def breaker(self, host):
+        """获取主机的断路器"""
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(
+                    Config.BREAKER_FAILURE_THRESHOLD, Config.BREAKER_COOLDOWN
+                )
+            return breaker
+
+    def breaker_snapshots(self):
+        """返回{主机: 断路器状态}，包括本进程访问过的全部主机"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: breaker.snapshot() for host, breaker in breakers.items()}
+
+    def stats(self):
+        """返回按主机统计的请求数、新建连接数以及复用（节省握手）次数"""
+        with self._lock:
+            host_stats = {host: dict(values) for host, values in self._host_stats.items()}
+            breakers = dict(self._breakers)
+
+        total = {
+            'requests': 0, 'connections': 0, 'reused': 0, 'retries': 0, 'failures': 0,
+            'rejected': 0, 'throttled_seconds': 0.0
+        }
+        for host, values in host_stats.items():
+            values['reused'] = max(values['requests'] - values['connections'], 0)
+            values['throttled_seconds'] = round(values['throttled_seconds'], 3)
+            breaker = breakers.get(host)
+            values['breaker'] = breaker.snapshot()['state'] if breaker else 'closed'
+            for key in total:
+                total[key] += values[key]
+        total['throttled_seconds'] = round(total['throttled_seconds'], 3)
+
+        return {'hosts': host_stats, 'total': total}
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """获取进程内共享的传输层实例"""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = HttpTransport(headers={'User-Agent': Config.USER_AGENT})
+        return _default_transport
@@ -0,0 +1,60 @@
+import hashlib
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 需要去除的跟踪参数；from、ref等通用名称在部分站点上决定页面内容，予以保留
+TRACKING_PARAMS = {
+    'spm', 'shareuid', 'tt_from', 'wxshare', 'isappinstalled',
+    'gclid', 'fbclid', 'mc_cid', 'mc_eid', 'cmpid', 'ncid'
+}
+TRACKING_PREFIXES = ('utm_', 'share_')
+
+# 各协议的默认端口
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url, base_url=None):
+    """规范化新闻链接
+
+    解析相对链接，统一使用小写的协议和主机名，去掉默认端口、片段、跟踪参数和
+    结尾斜杠，其余查询参数按名称排序。保留原协议，只支持http的站点仍可抓取；
+    http和https的同一链接由url_hash视为相同。无法解析为http(s)绝对地址时返回None。
+    """
+    if not url:
+        return None
+    url = url.strip()
+    if base_url:
+        url = urljoin(base_url, url)
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower().rstrip('.')
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f'{host}:{port}'
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/') or '/'
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def url_hash(url):
+    """返回规范化链接的定长哈希（40位十六进制SHA-1），用作去重键
+
+    哈希前把http统一为https，同一链接的两种协议得到相同的键。
+    """
+    if url.startswith('http://'):
+        url = 'https://' + url[len('http://'):]
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
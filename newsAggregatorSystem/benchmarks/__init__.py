@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# 性能基准脚本，在项目根目录下以模块方式运行，例如：
+#   python -m benchmarks.bench_extract
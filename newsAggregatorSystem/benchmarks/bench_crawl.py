@@ -0,0 +1,151 @@
+"""抓取器端到端基准：在本地回放录制的响应，测量完整fetch_all_news的吞吐
+
+用法：
+    # 录制：访问真实站点，保存列表页和正文页响应
+    python -m benchmarks.bench_crawl record fixtures/crawl
+
+    # 回放：启动本地回放服务器，运行完整抓取并输出条目/秒、耗时和内存峰值
+    python -m benchmarks.bench_crawl run fixtures/crawl --repeat 3 --latency 0.05 --failure-rate 0.1
+
+每次运行使用独立的临时SQLite数据库和新的传输层实例，结果互不影响。
+回放时传输层仍按原始主机限速和断路，可用--rate、--workers比较不同配置。
+"""
+import argparse
+import os
+import resource
+import statistics
+import tempfile
+import time
+import tracemalloc
+from config import Config
+from app import create_app
+from app.models import db
+from app.news_fetcher import near_dup, related, story_cluster
+from app.hot_analysis import trending
+from app.news_fetcher.fetcher import NewsFetcher, init_news_sources
+from app.news_fetcher.transport import HttpTransport
+from app.news_fetcher.replay import FixtureStore, RecordingAdapter, ReplayAdapter, ReplayServer, install_adapter
+
+
+def _bench_app(db_path):
+    """使用临时数据库的应用实例"""
+    config = type('BenchConfig', (Config,), {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}'})
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        init_news_sources()
+    return app
+
+
+def _new_transport(adapter):
+    transport = HttpTransport(headers={'User-Agent': Config.USER_AGENT})
+    install_adapter(transport, adapter)
+    return transport
+
+
+def _adapter_options():
+    return {
+        'pool_connections': Config.HTTP_POOL_HOSTS,
+        'pool_maxsize': Config.HTTP_MAX_CONNECTIONS_PER_HOST,
+        'pool_block': True,
+        'max_retries': 0
+    }
+
+
+def _crawl(app, transport):
+    """运行一次完整抓取，返回(结果列表, 抓取器)"""
+    # 近似重复索引、故事聚类索引、相关新闻索引和热词检测器是进程级单例，换数据库前需丢弃
+    near_dup._default_index = None
+    story_cluster._default_index = None
+    related._default_index = None
+    trending._default_detector = None
+    with app.app_context():
+        fetcher = NewsFetcher()
+        fetcher.transport = transport
+        results = fetcher.fetch_all_news(force=True)
+        db.session.remove()
+    return results, fetcher
+
+
+def record(directory):
+    store = FixtureStore(directory)
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _bench_app(os.path.join(tmp, 'record.db'))
+        transport = _new_transport(RecordingAdapter(store, **_adapter_options()))
+        results, _ = _crawl(app, transport)
+    store.flush()
+    print(f'Recorded {len(store)} responses for {len(results)} items into {directory}')
+
+
+def run(directory, repeat=3, latency=0.0, jitter=0.0, failure_rate=0.0, failure_mode='status', seed=0):
+    store = FixtureStore(directory)
+    if not len(store):
+        raise SystemExit(f'No recorded responses in {directory}, run "record" first')
+
+    rows = []
+    print(f'{"run":<5}{"items":>7}{"inserted":>10}{"wall s":>9}{"items/s":>9}'
+          f'{"peak MB":>9}{"failures":>10}{"served":>8}{"injected":>10}')
+    for index in range(repeat):
+        server = ReplayServer(store, latency=latency, jitter=jitter, failure_rate=failure_rate,
+                              failure_mode=failure_mode, seed=seed + index)
+        with server, tempfile.TemporaryDirectory() as tmp:
+            app = _bench_app(os.path.join(tmp, 'bench.db'))
+            transport = _new_transport(ReplayAdapter(server.url, **_adapter_options()))
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            results, fetcher = _crawl(app, transport)
+            wall = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        inserted = sum(stats['inserted'] for stats in fetcher.last_refresh_stats['sources'].values())
+        row = {
+            'items': len(results),
+            'inserted': inserted,
+            'wall': wall,
+            'rate': len(results) / wall if wall else 0.0,
+            'peak_mb': peak / (1024 * 1024),
+            'failures': transport.stats()['total']['failures'],
+            'served': server.counters['served'],
+            'injected': server.counters['injected_failures']
+        }
+        rows.append(row)
+        print(f'{index + 1:<5}{row["items"]:>7}{row["inserted"]:>10}{row["wall"]:>9.2f}{row["rate"]:>9.1f}'
+              f'{row["peak_mb"]:>9.1f}{row["failures"]:>10}{row["served"]:>8}{row["injected"]:>10}')
+
+    # ru_maxrss在Linux上以KB为单位
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'median: {statistics.median(row["wall"] for row in rows):.2f}s wall, '
+          f'{statistics.median(row["rate"] for row in rows):.1f} items/s, '
+          f'{max(row["peak_mb"] for row in rows):.1f} MB traced peak, {max_rss:.1f} MB max RSS')
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline crawl benchmark with recorded responses')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='record live responses into a fixture directory')
+    record_parser.add_argument('fixtures')
+
+    run_parser = subparsers.add_parser('run', help='replay fixtures and benchmark fetch_all_news')
+    run_parser.add_argument('fixtures')
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    run_parser.add_argument('--jitter', type=float, default=0.0, help='random extra latency upper bound')
+    run_parser.add_argument('--failure-rate', type=float, default=0.0, help='fraction of requests to fail')
+    run_parser.add_argument('--failure-mode', choices=('status', 'reset'), default='status')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--workers', type=int, help='override CRAWL_MAX_WORKERS')
+    run_parser.add_argument('--rate', type=float, help='override HTTP_RATE_PER_HOST')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record(args.fixtures)
+    else:
+        if args.workers:
+            Config.CRAWL_MAX_WORKERS = args.workers
+        if args.rate:
+            Config.HTTP_RATE_PER_HOST = args.rate
+        run(args.fixtures, args.repeat, args.latency, args.jitter, args.failure_rate, args.failure_mode, args.seed)
@@ -0,0 +1,172 @@
+"""HTML抽取微基准：对比原先的BeautifulSoup整页解析与新的lxml流式抽取
+
+用法：
+    python -m benchmarks.bench_extract [页面目录] [--repeat N]
+
+页面目录中按来源放置保存下来的页面：163.html、sina.html、cctv.html，
+以及任意数量的article*.html正文页。未提供目录或缺少某类页面时使用生成的模拟页面。
+"""
+import argparse
+import glob
+import os
+import re
+import timeit
+from bs4 import BeautifulSoup
+from app.news_fetcher.extractor import NETEASE_LINKS, PAGE_LINKS, SINA_LINKS, ARTICLE_CONTENT
+from itertools import islice
+
+
+# ---- 原实现（与重构前fetcher.py中的解析逻辑一致） ----
+
+def legacy_163(text):
+    soup = BeautifulSoup(text, 'lxml')
+    return [(a.text.strip(), a.get('href')) for a in soup.select('.ns_area a')[:15]
+            if a.text.strip() and a.get('href')]
+
+
+def legacy_sina(text):
+    links = re.findall(r'<a[^>]+href="([^"]+news\.sina\.com\.cn[^"]+)"[^>]*>([^<]+)</a>', text)
+    items = [(title.strip(), url) for url, title in links[:10] if len(title.strip()) > 10]
+    if not items:
+        soup = BeautifulSoup(text, 'lxml')
+        for link in soup.find_all('a')[:100]:
+            title = link.text.strip()
+            if title and link.get('href') and len(title) > 10:
+                items.append((title, link.get('href')))
+            if len(items) >= 5:
+                break
+    return items
+
+
+def legacy_cctv(text):
+    soup = BeautifulSoup(text, 'lxml')
+    items = []
+    for link in soup.find_all('a')[:50]:
+        title = link.text.strip()
+        if title and link.get('href') and len(title) > 10:
+            items.append((title, link.get('href')))
+        if len(items) >= 10:
+            break
+    return items
+
+
+def legacy_content(text):
+    soup = BeautifulSoup(text, 'lxml')
+    for script in soup(['script', 'style']):
+        script.decompose()
+    content = ''
+    for tag in ['article', '.content', '.main-content', '.article-content', '#content']:
+        elements = soup.select(tag)
+        if elements:
+            content = ' '.join([p.text.strip() for p in elements[0].find_all('p')])
+            if content:
+                break
+    if not content:
+        content = ' '.join([p.text.strip() for p in soup.find_all('p')[:20]])
+    return content[:2000]
+
+
+# ---- 新实现 ----
+
+def fast_163(text):
+    return [(title, href) for title, href, _ in islice(NETEASE_LINKS.iter_links(text), 15) if title and href]
+
+
+def fast_sina(text):
+    items = [(title, href) for title, href in SINA_LINKS.links(text, 10) if len(title) > 10]
+    if not items:
+        for title, href, _ in islice(PAGE_LINKS.iter_links(text), 100):
+            if title and href and len(title) > 10:
+                items.append((title, href))
+            if len(items) >= 5:
+                break
+    return items
+
+
+def fast_cctv(text):
+    items = []
+    for title, href, _ in islice(PAGE_LINKS.iter_links(text), 50):
+        if title and href and len(title) > 10:
+            items.append((title, href))
+        if len(items) >= 10:
+            break
+    return items
+
+
+def fast_content(text):
+    return ARTICLE_CONTENT.extract(text)
+
+
+# ---- 模拟页面 ----
+
+def _filler(count):
+    return ''.join(
+        f'<div class="box"><span>栏目{i}</span><script>var x{i} = {i};</script>'
+        f'<ul>{"".join(f"<li>条目{i}-{j}</li>" for j in range(10))}</ul></div>'
+        for i in range(count)
+    )
+
+
+def synthetic_listing(kind):
+    title = '这是一条用于基准测试的模拟新闻标题第{}条'
+    if kind == '163':
+        links = ''.join(f'<a href="https://www.163.com/news/article/{i}.html">{title.format(i)}</a>' for i in range(40))
+        body = f'<div class="nav">{_filler(20)}</div><div class="ns_area list">{links}</div>'
+    elif kind == 'sina':
+        links = ''.join(f'<a href="https://news.sina.com.cn/c/2026/{i}.shtml">{title.format(i)}</a>' for i in range(60))
+        body = f'<div class="nav">{_filler(20)}</div>{links}'
+    else:
+        links = ''.join(f'<a href="/2026/02/05/ARTI{i}.shtml">{title.format(i)}</a>' for i in range(60))
+        body = f'<div class="nav">{_filler(20)}</div>{links}'
+    return f'<html><head><title>{kind}</title></head><body>{body}{_filler(400)}</body></html>'
+
+
+def synthetic_article():
+    paragraphs = ''.join(f'<p>第{i}段正文内容，用于测试正文抽取的性能表现。</p>' for i in range(60))
+    return (f'<html><head><style>p {{}}</style></head><body>{_filler(200)}'
+            f'<div class="main-content">{paragraphs}</div>{_filler(200)}</body></html>')
+
+
+def load_pages(directory):
+    pages = {}
+    for kind in ('163', 'sina', 'cctv'):
+        path = os.path.join(directory, f'{kind}.html') if directory else None
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8', errors='replace') as f:
+                pages[kind] = f.read()
+        else:
+            pages[kind] = synthetic_listing(kind)
+
+    articles = []
+    for path in sorted(glob.glob(os.path.join(directory, 'article*.html'))) if directory else []:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            articles.append(f.read())
+    pages['article'] = articles or [synthetic_article()]
+    return pages
+
+
+def run(directory=None, repeat=20):
+    pages = load_pages(directory)
+    cases = [
+        ('163', legacy_163, fast_163, [pages['163']]),
+        ('sina', legacy_sina, fast_sina, [pages['sina']]),
+        ('cctv', legacy_cctv, fast_cctv, [pages['cctv']]),
+        ('article', legacy_content, fast_content, pages['article'])
+    ]
+
+    print(f'{"case":<10}{"legacy ms":>12}{"fast ms":>12}{"speedup":>10}{"items":>12}')
+    for name, legacy, fast, texts in cases:
+        legacy_time = timeit.timeit(lambda: [legacy(text) for text in texts], number=repeat) / repeat
+        fast_time = timeit.timeit(lambda: [fast(text) for text in texts], number=repeat) / repeat
+        legacy_items = sum(len(legacy(text)) for text in texts)
+        fast_items = sum(len(fast(text)) for text in texts)
+        print(f'{name:<10}{legacy_time * 1000:>12.2f}{fast_time * 1000:>12.2f}'
+              f'{legacy_time / fast_time:>9.1f}x{f"{legacy_items}/{fast_items}":>12}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='HTML extraction micro-benchmark')
+    parser.add_argument('pages', nargs='?', help='directory with saved pages')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    run(args.pages, args.repeat)
@@ -0,0 +1,89 @@
+"""启动导入耗时基准：在全新的解释器中导入应用，按模块统计导入耗时
+
+用法：
+    python -m benchmarks.bench_import [--target app.api] [--repeat 5] [--budget-ms 900] [--top 15]
+
+每次运行都启动新的Python进程（-X importtime），取各次总耗时的中位数。
+总耗时超过预算，或启动时加载了应按需导入的分析/绘图库时，以非零状态码退出，可直接用于CI。
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+# 只在首次使用时导入的重量级模块，启动时不应出现
+LAZY_MODULES = ('pandas', 'numpy', 'matplotlib', 'seaborn', 'sklearn')
+
+DEFAULT_TARGET = 'app.api'
+DEFAULT_BUDGET_MS = 900
+
+
+def measure(target):
+    """导入一次target，返回({模块: (自身微秒, 累计微秒)}, 总微秒, 已加载的重量级模块)"""
+    code = (
+        f'import sys, {target}\n'
+        f'print(",".join(name for name in {LAZY_MODULES!r} if name in sys.modules))'
+    )
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True
+    )
+
+    modules = {}
+    total = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        modules[name] = (int(self_us), int(cumulative_us))
+        if depth == 0:
+            total += int(cumulative_us)
+
+    loaded = [name for name in completed.stdout.strip().split(',') if name]
+    return modules, total, loaded
+
+
+def run(target=DEFAULT_TARGET, repeat=5, budget_ms=DEFAULT_BUDGET_MS, top=15):
+    runs = [measure(target) for _ in range(repeat)]
+    totals = [total for _, total, _ in runs]
+    median_ms = statistics.median(totals) / 1000
+
+    # 按顶层包汇总自身耗时（取中位数那次运行）
+    modules, _, loaded = sorted(runs, key=lambda item: item[1])[len(runs) // 2]
+    packages = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        packages[name.split('.')[0]] += self_us
+
+    print(f'{"package":<30}{"self ms":>10}')
+    for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f'{name:<30}{self_us / 1000:>10.1f}')
+    print()
+    print(f'{"module":<50}{"cumulative ms":>15}')
+    for name, (_, cumulative_us) in sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:top]:
+        print(f'{name:<50}{cumulative_us / 1000:>15.1f}')
+    print()
+    print(f'import {target}: median {median_ms:.1f} ms over {repeat} runs '
+          f'(min {min(totals) / 1000:.1f}, max {max(totals) / 1000:.1f}), budget {budget_ms} ms')
+
+    failures = []
+    if loaded:
+        failures.append(f'lazy modules imported at startup: {", ".join(loaded)}')
+    if median_ms > budget_ms:
+        failures.append(f'startup import time {median_ms:.1f} ms exceeds budget {budget_ms} ms')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    return not failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Startup import-time benchmark')
+    parser.add_argument('--target', default=DEFAULT_TARGET, help='module to import')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+    if not run(args.target, args.repeat, args.budget_ms, args.top):
+        sys.exit(1)
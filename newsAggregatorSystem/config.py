@@ -1,4 +1,5 @@
 import os
+from datetime import datetime
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -42,10 +43,96 @@ class Config:
         }
     ]
     
+    # 并发抓取配置
+    CRAWL_CONCURRENT = os.environ.get('CRAWL_CONCURRENT', 'True').lower() == 'true'
+    CRAWL_MAX_WORKERS = int(os.environ.get('CRAWL_MAX_WORKERS', 4))  # 同时抓取的来源数上限
+    
+    # 抓取调度配置
+    SCHEDULER_BACKOFF_FACTOR = 1.5  # 没有新条目时间隔放大的倍数
+    SCHEDULER_SPEEDUP_FACTOR = 0.5  # 新条目较多时间隔缩小的倍数
+    SCHEDULER_BUSY_THRESHOLD = 5  # 视为活跃来源的新条目数
+    SCHEDULER_MIN_INTERVAL = 5  # 最小抓取间隔（分钟）
+    SCHEDULER_MAX_FACTOR = 8  # 最大间隔为基准间隔的倍数
+    
+    # 入库流水线配置
+    INGEST_BODY_WORKERS = int(os.environ.get('INGEST_BODY_WORKERS', 4))  # 正文抓取线程数
+    INGEST_BODY_QUEUE_SIZE = 32  # 正文抓取队列容量，队列满时入库阶段等待
+    # 近似重复、故事聚类等内存索引追赶数据库时重新检查的最近ID数：其他进程的新闻可能晚于ID更大的新闻提交
+    INDEX_CATCH_UP_OVERLAP = 1000
+    
+    # 近似重复检测配置（MinHash + LSH）
+    NEAR_DUP_NGRAM = 2  # 字符n-gram长度
+    NEAR_DUP_CONTENT_CHARS = 0  # 参与签名的正文字符数；正文异步回填，默认只用标题
+    NEAR_DUP_BANDS = 20  # LSH分段数
+    NEAR_DUP_ROWS = 3  # 每段的签名值个数
+    NEAR_DUP_THRESHOLD = 0.5  # 视为近似重复的最小Jaccard相似度
+    NEAR_DUP_WINDOW_DAYS = 7  # 只在最近N天的新闻中查找近似重复
+    
+    # 故事聚类配置（TF-IDF字符n-gram + 候选倒排索引）
+    STORY_CLUSTER_THRESHOLD = 0.3  # 加入已有故事簇的最小余弦相似度
+    STORY_CLUSTER_WINDOW_HOURS = 72  # 超过N小时没有新成员的故事簇不再接收新闻
+    STORY_CLUSTER_CENTROID_TERMS = 64  # 每个簇中心保留并建立索引的n-gram数（覆盖一般长度标题的全部n-gram）
+    STORY_CLUSTER_MAX_CANDIDATES = 20  # 每条新闻最多计算相似度的候选簇数
+    
+    # 相关新闻配置（入库时按标题TF-IDF倒排索引预先计算）
+    RELATED_NEWS_LIMIT = 10  # 每条新闻保存的相关新闻数
+    RELATED_NEWS_THRESHOLD = 0.2  # 视为相关的最小余弦相似度
+    RELATED_NEWS_WINDOW_DAYS = 7  # 只在最近N天的新闻中查找相关新闻
+    RELATED_NEWS_MAX_CANDIDATES = 50  # 每条新闻最多计算相似度的候选数
+    
+    # 后台刷新任务配置
+    REFRESH_JOB_HISTORY = 20  # 保留的已结束刷新任务记录数
+    
+    # HTTP传输层配置
+    HTTP_POOL_HOSTS = 20  # 保持连接池的主机数
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('HTTP_MAX_CONNECTIONS_PER_HOST', 4))
+    HTTP_MAX_RETRIES = 2  # 失败后的最大重试次数
+    HTTP_BACKOFF_BASE = 0.5  # 退避基准时间（秒）
+    HTTP_BACKOFF_MAX = 8.0  # 单次退避上限（秒）
+    HTTP_RATE_PER_HOST = float(os.environ.get('HTTP_RATE_PER_HOST', 2.0))  # 每个主机每秒请求数
+    HTTP_RATE_BURST = 4  # 每个主机允许的突发请求数
+    BREAKER_FAILURE_THRESHOLD = 3  # 连续失败多少次后断开主机断路器
+    BREAKER_COOLDOWN = 300  # 断路器断开后的冷却时间（秒）
+    
     # 热度分析配置
     HOTNESS_WEIGHT = 0.7
     TREND_WEIGHT = 0.3
     REFRESH_INTERVAL = 60  # 分钟
+    HOTNESS_UPDATE_CHUNK_SIZE = 1000  # 每条批量UPDATE写回的热度分数行数
+    # 增量模式只重算互动数据变化或跨越时间衰减阶梯的新闻，关闭时每次分析重算窗口内全部新闻
+    HOTNESS_INCREMENTAL = os.environ.get('HOTNESS_INCREMENTAL', 'true').lower() == 'true'
+    # 热度排行榜模式：step为阶梯衰减分数；log按对数热度分数的索引排序，无需定期重算
+    HOTNESS_MODE = os.environ.get('HOTNESS_MODE', 'step')
+    HOT_LOG_EPOCH = datetime(2020, 1, 1)  # 对数热度分数的时间锚点
+    HOT_LOG_DECAY_HOURS = 12.5  # 晚发布多少小时相当于互动量多一个数量级
+    HOT_RANK_SNAPSHOT_SIZE = 100  # 每个热度排行榜快照保存的条数
+    HOT_RANK_SNAPSHOT_TTL = 60  # 数据未变化时快照的最长有效期（秒）
+    HOT_RANK_SNAPSHOT_MAX_KEYS = 64  # 每个进程内存和实例目录中最多保留的排行榜快照数
+    ANALYSIS_CACHE_TTL = 300  # 数据未变化时只读分析结果的缓存时间（秒）
+    ANALYSIS_CACHE_MAX_ENTRIES = 32  # 每个进程最多缓存的分析结果数
+    ANALYSIS_MAX_DAYS = 90  # 分析接口的最大天数，超出时返回400
+    ANALYSIS_STREAM_CHUNK_SIZE = 2000  # 重算和流式分析每次读取的新闻行数
+    
+    # 情感分析配置
+    # 情感词典：每行“词<Tab>positive/negative”，#开头为注释
+    SENTIMENT_LEXICON_PATH = os.environ.get('SENTIMENT_LEXICON_PATH') or \
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'hot_analysis', 'sentiment_lexicon.txt')
+    SENTIMENT_WORKERS = int(os.environ.get('SENTIMENT_WORKERS', os.cpu_count() or 1))  # 情感打分进程数
+    SENTIMENT_CHUNK_SIZE = 500  # 每个进程任务打分的新闻数
+    SENTIMENT_THRESHOLD = 0.1  # 情感分数超过±该值时视为正面/负面
+    
+    # 图表配置
+    CHART_WORKERS = int(os.environ.get('CHART_WORKERS', 2))  # 绘制图表的进程数
+    CHART_CACHE_MAX_FILES = 200  # 实例目录中最多缓存的图表文件数
+    
+    # 热词检测配置
+    TRENDING_BUCKET_MINUTES = 60  # 滑动窗口中每个计数桶的时长（分钟）
+    TRENDING_WINDOW_HOURS = 6  # 当前窗口
+    TRENDING_BASELINE_HOURS = 48  # 当前窗口之前用作基线的时长
+    TRENDING_SKETCH_WIDTH = 4096  # 每个桶的Count-Min Sketch宽度
+    TRENDING_SKETCH_DEPTH = 4  # Count-Min Sketch的哈希行数
+    TRENDING_CANDIDATES = 200  # 每个桶保留的高频词候选数
+    TRENDING_MIN_COUNT = 3  # 当前窗口内至少出现在多少条标题中才参与排名
     
     # API配置
     API_RATE_LIMIT = 100  # 每分钟请求数
@@ -0,0 +1,3 @@
+# migrations/__init__.py
+# 数据库迁移脚本，在项目根目录下以模块方式运行，例如：
+#   python -m migrations.add_url_hash
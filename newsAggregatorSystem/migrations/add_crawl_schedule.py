@@ -0,0 +1,33 @@
+"""为news_sources表增加自适应抓取调度所需的列
+
+effective_interval初始化为用户设置的crawl_interval，
+next_crawl_time按上次抓取时间加间隔计算（从未抓取过的来源立即到期）。
+
+用法：python -m migrations.add_crawl_schedule
+"""
+import logging
+from app import create_app
+from app.models import db, NewsSource
+from app.news_fetcher.scheduler import CrawlScheduler
+from migrations.utils import add_missing_columns, create_missing_indexes
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        add_missing_columns(NewsSource)
+        create_missing_indexes(NewsSource)
+        
+        scheduler = CrawlScheduler()
+        sources = NewsSource.query.filter(NewsSource.effective_interval.is_(None)).all()
+        for source in sources:
+            scheduler.reset(source)
+        db.session.commit()
+        logger.info(f'Initialized crawl schedule for {len(sources)} sources')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
@@ -0,0 +1,24 @@
+"""创建按主机保存断路器状态的host_breakers表
+
+来源首页以外的主机（如正文页所在的域名）的断路器状态此前只保存在内存中，重启后丢失；
+已有来源首页主机的状态仍从来源上恢复，直到下次抓取写入本表。
+
+用法：python -m migrations.add_host_breakers
+"""
+import logging
+from app import create_app
+from app.models import db, HostBreaker
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        HostBreaker.__table__.create(bind=db.engine, checkfirst=True)
+        logger.info(f'Ensured table {HostBreaker.__tablename__}')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
@@ -0,0 +1,30 @@
+"""为news表增加带索引的对数热度分数列（HOTNESS_MODE=log时用于热度排行榜）
+
+已有新闻标记为待重算，下一次热度分析或排行榜请求时写入对数热度分数。
+
+用法：python -m migrations.add_hot_log_score
+"""
+import logging
+from app import create_app
+from app.models import db, News
+from migrations.utils import add_missing_columns, create_missing_indexes
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        add_missing_columns(News)
+        create_missing_indexes(News)
+        
+        count = News.query.filter(News.hot_log_score.is_(None)).update(
+            {News.hotness_dirty: True}, synchronize_session=False
+        )
+        db.session.commit()
+        logger.info(f'Marked {count} news for hot log score backfill')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
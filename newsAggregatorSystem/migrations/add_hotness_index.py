@@ -0,0 +1,22 @@
+"""为news.hotness_score创建索引，热度排行榜快照按该列ORDER BY ... LIMIT取前K条
+
+用法：python -m migrations.add_hotness_index
+"""
+import logging
+from app import create_app
+from app.models import News
+from migrations.utils import create_missing_indexes
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        created = create_missing_indexes(News)
+        logger.info(f'Created {len(created)} indexes on {News.__tablename__}')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
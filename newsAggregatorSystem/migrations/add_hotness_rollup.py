@@ -0,0 +1,26 @@
+"""创建按小时 × 来源 × 分类预聚合的热度汇总表，并用已有新闻回填
+
+之后新闻入库、热度重算和互动数据变化时增量维护；汇总表与news表不一致时可随时重建：
+python -m app.hot_analysis.rollup --rebuild
+
+用法：python -m migrations.add_hotness_rollup
+"""
+import logging
+from app import create_app
+from app.models import db, HotnessRollup
+from app.hot_analysis.rollup import rebuild
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        HotnessRollup.__table__.create(bind=db.engine, checkfirst=True)
+        logger.info(f'Ensured table {HotnessRollup.__tablename__}')
+        rebuild()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
@@ -0,0 +1,31 @@
+"""为news表增加增量热度维护所需的列
+
+已有新闻全部标记为待重算，下一次热度分析时重算一次并记录下次跨越时间衰减阶梯的时间，
+之后只重算互动数据变化或到期的新闻。
+
+用法：python -m migrations.add_hotness_tracking
+"""
+import logging
+from app import create_app
+from app.models import db, News
+from migrations.utils import add_missing_columns, create_missing_indexes
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        add_missing_columns(News)
+        create_missing_indexes(News)
+        
+        count = News.query.filter(News.hotness_dirty.isnot(True)).update(
+            {News.hotness_dirty: True}, synchronize_session=False
+        )
+        db.session.commit()
+        logger.info(f'Marked {count} news for hotness rescoring')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
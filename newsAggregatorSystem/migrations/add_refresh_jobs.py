@@ -0,0 +1,24 @@
+"""创建保存后台刷新任务的refresh_jobs表
+
+刷新任务此前只保存在启动它的工作进程的内存中，多工作进程部署时其他进程查询不到任务，
+也无法合并并发的刷新请求。
+
+用法：python -m migrations.add_refresh_jobs
+"""
+import logging
+from app import create_app
+from app.models import db, RefreshJob
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        RefreshJob.__table__.create(bind=db.engine, checkfirst=True)
+        logger.info(f'Ensured table {RefreshJob.__tablename__}')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
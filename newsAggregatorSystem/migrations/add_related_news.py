@@ -0,0 +1,26 @@
+"""创建入库时预先计算的相关新闻表，并为最近的新闻回填
+
+之后新闻入库时增量计算；调整相关新闻参数后可随时重建：
+python -m app.news_fetcher.related --rebuild
+
+用法：python -m migrations.add_related_news
+"""
+import logging
+from app import create_app
+from app.models import db, RelatedNews
+from app.news_fetcher.related import rebuild
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        RelatedNews.__table__.create(bind=db.engine, checkfirst=True)
+        logger.info(f'Ensured table {RelatedNews.__tablename__}')
+        rebuild()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
@@ -0,0 +1,30 @@
+"""为news_sources表增加主机断路器状态列
+
+已有来源的断路器初始化为闭合状态。
+
+用法：python -m migrations.add_source_breaker
+"""
+import logging
+from app import create_app
+from app.models import db, NewsSource
+from migrations.utils import add_missing_columns
+
+logger = logging.getLogger(__name__)
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        add_missing_columns(NewsSource)
+        
+        count = NewsSource.query.filter(NewsSource.breaker_state.is_(None)).update(
+            {NewsSource.breaker_state: 'closed', NewsSource.breaker_failures: 0},
+            synchronize_session=False
+        )
+        db.session.commit()
+        logger.info(f'Initialized circuit breaker state for {count} sources')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
@@ -0,0 +1,73 @@
+"""为news表增加cluster_id，把报道同一事件的新闻归入同一个故事簇
+
+按ID顺序为最近STORY_CLUSTER_WINDOW_HOURS小时内的新闻计算标题TF-IDF向量并分配簇ID，
+近似重复的新闻与其故事在同一个簇中；更早的新闻各自成为独立的簇。
+
+用法：python -m migrations.add_story_clusters
+"""
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam
+from app import create_app
+from app.models import db, News
+from app.news_fetcher.story_cluster import StoryClusterIndex
+from config import Config
+from migrations.utils import add_missing_columns, create_missing_indexes
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_cluster_ids(chunk_size=None):
+    """为尚未分配簇ID的新闻回填cluster_id，返回(处理数, 归入已有簇的数量)
+    
+    按ID分块读取、写回和提交，内存中只保留时间窗口内的聚类索引。
+    """
+    chunk_size = chunk_size or Config.ANALYSIS_STREAM_CHUNK_SIZE
+    cutoff = datetime.utcnow() - timedelta(hours=Config.STORY_CLUSTER_WINDOW_HOURS)
+    index = StoryClusterIndex()
+    table = News.__table__
+    processed = clustered = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(
+            News.id, News.title, News.story_id, News.publish_time
+        ).filter(
+            News.id > last_id,
+            News.cluster_id.is_(None)
+        ).order_by(News.id).limit(chunk_size).all()
+        if not rows:
+            break
+        
+        updates = []
+        for news_id, title, story_id, publish_time in rows:
+            if publish_time >= cutoff:
+                cluster_id = index.assign(news_id, title, publish_time, story_id)
+            else:
+                cluster_id = news_id
+            updates.append({'news_id': news_id, 'cluster_id': cluster_id})
+        
+        db.session.execute(
+            table.update().where(table.c.id == bindparam('news_id')).values(cluster_id=bindparam('cluster_id')),
+            updates
+        )
+        db.session.commit()
+        
+        last_id = rows[-1].id
+        processed += len(updates)
+        clustered += sum(1 for update in updates if update['cluster_id'] != update['news_id'])
+    
+    return processed, clustered
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        add_missing_columns(News)
+        create_missing_indexes(News)
+        processed, clustered = backfill_cluster_ids()
+        logger.info(f'Assigned cluster ids to {processed} news, {clustered} joined existing clusters')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
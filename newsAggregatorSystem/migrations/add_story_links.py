@@ -0,0 +1,56 @@
+"""为news表增加story_id，把近似重复的新闻链接到同一个故事
+
+按ID顺序为最近NEAR_DUP_WINDOW_DAYS天内的新闻计算MinHash签名并分配故事ID，
+更早的新闻各自成为独立的故事。
+
+用法：python -m migrations.add_story_links
+"""
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import bindparam
+from app import create_app
+from app.models import db, News
+from app.news_fetcher.near_dup import NearDuplicateIndex, signature
+from config import Config
+from migrations.utils import add_missing_columns, create_missing_indexes
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_story_ids():
+    """为尚未分配故事ID的新闻回填story_id，返回(处理数, 链接到已有故事的数量)"""
+    cutoff = datetime.utcnow() - timedelta(days=Config.NEAR_DUP_WINDOW_DAYS)
+    index = NearDuplicateIndex()
+    rows = db.session.query(
+        News.id, News.title, News.content, News.publish_time
+    ).filter(News.story_id.is_(None)).order_by(News.id).all()
+    
+    updates = []
+    for news_id, title, content, publish_time in rows:
+        sig = signature(title, content) if publish_time >= cutoff else None
+        story_id = news_id if sig is None else index.assign(news_id, sig, publish_time)
+        updates.append({'news_id': news_id, 'story_id': story_id})
+    
+    if updates:
+        table = News.__table__
+        db.session.execute(
+            table.update().where(table.c.id == bindparam('news_id')).values(story_id=bindparam('story_id')),
+            updates
+        )
+        db.session.commit()
+    
+    return len(updates), sum(1 for update in updates if update['story_id'] != update['news_id'])
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        add_missing_columns(News)
+        create_missing_indexes(News)
+        processed, linked = backfill_story_ids()
+        logger.info(f'Assigned story ids to {processed} news, {linked} linked as near-duplicates')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
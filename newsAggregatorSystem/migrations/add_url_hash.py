@@ -0,0 +1,92 @@
+"""为news表增加url_hash去重键
+
+1. 添加url_hash列；
+2. 规范化已有链接并回填哈希，合并规范化后相同的重复新闻
+   （保留ID最小的一条，互动数据相加，正文取较长者）；
+3. 去掉url列上的唯一约束，改由url_hash上的唯一索引去重。
+
+用法：python -m migrations.add_url_hash
+"""
+import logging
+from sqlalchemy import bindparam, text
+from app import create_app
+from app.models import db, News
+from app.news_fetcher.urls import canonicalize_url, url_hash
+from migrations.utils import add_missing_columns, create_missing_indexes, rebuild_sqlite_table
+
+logger = logging.getLogger(__name__)
+
+
+def merge_duplicates():
+    """回填哈希并合并重复新闻，返回(更新数, 删除数)"""
+    rows = db.session.query(
+        News.id, News.url, News.content,
+        News.view_count, News.comment_count, News.share_count
+    ).order_by(News.id).all()
+    
+    groups = {}
+    for row in rows:
+        url = canonicalize_url(row.url) or row.url
+        groups.setdefault(url_hash(url), []).append((url, row))
+    
+    updates = []
+    duplicate_ids = []
+    for hash_key, members in groups.items():
+        url, keeper = members[0]
+        content = max((row.content or '' for _, row in members), key=len)
+        updates.append({
+            'news_id': keeper.id,
+            'url': url,
+            'url_hash': hash_key,
+            'content': content,
+            'view_count': sum(row.view_count or 0 for _, row in members),
+            'comment_count': sum(row.comment_count or 0 for _, row in members),
+            'share_count': sum(row.share_count or 0 for _, row in members)
+        })
+        duplicate_ids.extend(row.id for _, row in members[1:])
+    
+    table = News.__table__
+    # 先删除重复行，避免规范化后的链接触发url上的唯一约束
+    if duplicate_ids:
+        db.session.execute(table.delete().where(table.c.id.in_(duplicate_ids)))
+    if updates:
+        db.session.execute(
+            table.update().where(table.c.id == bindparam('news_id')).values(
+                url=bindparam('url'),
+                url_hash=bindparam('url_hash'),
+                content=bindparam('content'),
+                view_count=bindparam('view_count'),
+                comment_count=bindparam('comment_count'),
+                share_count=bindparam('share_count')
+            ),
+            updates
+        )
+    db.session.commit()
+    return len(updates), len(duplicate_ids)
+
+
+def drop_url_unique():
+    """去掉url列上的唯一约束"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        rebuild_sqlite_table(News)
+    elif dialect == 'postgresql':
+        with db.engine.begin() as conn:
+            conn.execute(text('ALTER TABLE news DROP CONSTRAINT IF EXISTS news_url_key'))
+    else:
+        logger.warning(f'Unique constraint on news.url left in place for dialect {dialect}')
+
+
+def upgrade():
+    app = create_app()
+    with app.app_context():
+        add_missing_columns(News)
+        updated, deleted = merge_duplicates()
+        logger.info(f'Backfilled url_hash for {updated} news, merged {deleted} duplicates')
+        drop_url_unique()
+        create_missing_indexes(News)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    upgrade()
@@ -0,0 +1,74 @@
+import logging
+from sqlalchemy import inspect, text
+from app.models import db
+
+logger = logging.getLogger(__name__)
+
+
+def existing_columns(table_name):
+    """返回数据库中某张表已有的列名集合"""
+    return {column['name'] for column in inspect(db.engine).get_columns(table_name)}
+
+
+def add_missing_columns(model):
+    """为模型中新增、但数据库表中尚不存在的列执行ALTER TABLE ADD COLUMN
+    
+    只添加列本身（不含唯一约束和索引），索引由create_missing_indexes创建。
+    返回新增的列名列表。
+    """
+    table = model.__table__
+    present = existing_columns(table.name)
+    added = []
+    
+    with db.engine.begin() as conn:
+        for column in table.columns:
+            if column.name in present:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+            default = column.default.arg if column.default is not None and column.default.is_scalar else None
+            if default is not None:
+                # 布尔默认值用TRUE/FALSE，PostgreSQL不接受整数作为布尔列的默认值
+                ddl += f' DEFAULT {str(default).upper() if isinstance(default, bool) else repr(default)}'
+            conn.execute(text(ddl))
+            added.append(column.name)
+            logger.info(f'Added column {table.name}.{column.name}')
+    
+    return added
+
+
+def create_missing_indexes(model):
+    """创建模型中声明、但数据库中尚不存在的索引"""
+    table = model.__table__
+    present = {index['name'] for index in inspect(db.engine).get_indexes(table.name)}
+    created = []
+    
+    for index in table.indexes:
+        if index.name in present:
+            continue
+        index.create(bind=db.engine)
+        created.append(index.name)
+        logger.info(f'Created index {index.name}')
+    
+    return created
+
+
+def rebuild_sqlite_table(model):
+    """按当前模型定义重建SQLite表（SQLite无法直接删除列上的唯一约束）
+    
+    旧表中必须已包含模型的全部列；数据原样复制，索引按模型重新创建。
+    """
+    table = model.__table__
+    old_name = f'{table.name}_old'
+    columns = ', '.join(column.name for column in table.columns)
+    
+    with db.engine.begin() as conn:
+        conn.execute(text(f'ALTER TABLE {table.name} RENAME TO {old_name}'))
+        # 旧索引随表改名保留原名，先删除以免与新表索引重名
+        for index in inspect(conn).get_indexes(old_name):
+            conn.execute(text(f'DROP INDEX IF EXISTS {index["name"]}'))
+        table.create(bind=conn)
+        conn.execute(text(f'INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old_name}'))
+        conn.execute(text(f'DROP TABLE {old_name}'))
+    
+    logger.info(f'Rebuilt table {table.name}')
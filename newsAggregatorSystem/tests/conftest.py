@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+
+from app import create_app
+from app.models import db as _db
+from config import Config
+
+
+# 报道同一事件、措辞不同的标题对
+SAME_STORY_TITLES = [
+    ('北京暴雨导致交通中断', '北京暴雨导致交通中断多条线路停运'),
+    ('台风海葵登陆福建沿海', '台风海葵在福建登陆'),
+]
+
+# 与上面的事件都无关的标题
+UNRELATED_TITLE = '央行宣布下调存款准备金率'
+
+
+@pytest.fixture(params=SAME_STORY_TITLES, ids=['rainstorm', 'typhoon'])
+def same_story_titles(request):
+    return request.param
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """使用临时目录中SQLite数据库和实例目录的应用，进程内共享的索引每个测试重新建立"""
+    from app.hot_analysis import trending
+    from app.news_fetcher import near_dup, related, story_cluster
+
+    for module in (near_dup, related, story_cluster):
+        monkeypatch.setattr(module, '_default_index', None)
+    monkeypatch.setattr(trending, '_default_detector', None)
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "test.db"}'
+        TESTING = True
+
+    app = create_app(TestConfig)
+    app.instance_path = str(tmp_path / 'instance')
+    with app.app_context():
+        _db.create_all()
+        yield app
+        _db.session.remove()
+        _db.drop_all()
+
+
+@pytest.fixture
+def db(app):
+    return _db
+
+
+def news_row(news_id, **values):
+    """news表的一行列字典，未给出的列取测试默认值"""
+    row = {
+        'id': news_id, 'title': f'新闻{news_id}', 'content': '', 'url': f'https://news.example.com/{news_id}',
+        'url_hash': f'hash-{news_id}', 'source': '测试来源', 'category': '科技',
+        'publish_time': datetime.utcnow(), 'view_count': 0, 'comment_count': 0, 'share_count': 0,
+        'hotness_score': 0.0
+    }
+    row.update(values)
+    return row
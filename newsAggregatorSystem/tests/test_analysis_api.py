@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.mark.parametrize('days', ['0', '91', '365', 'week'])
+def test_out_of_range_days_are_rejected(app, days):
+    client = app.test_client()
+    for path in ('/api/analysis/hotness', '/api/analysis/hot-rank', '/api/analysis/trend',
+                 '/api/analysis/stories'):
+        response = client.get(path, query_string={'days': days})
+        assert response.json['code'] == 400, path
+        assert '90' in response.json['message']
+
+
+def test_max_days_is_accepted(app):
+    response = app.test_client().get('/api/analysis/hotness', query_string={'days': 90})
+    assert response.json['code'] == 404
+    assert '过去90天' in response.json['message']
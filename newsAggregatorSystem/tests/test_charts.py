@@ -0,0 +1,28 @@
+import os
+import signal
+
+from app.hot_analysis.charts import ChartService
+
+
+def hourly_points(scale):
+    return [{'hour': hour, 'average_hotness': hour * scale} for hour in range(24)]
+
+
+def test_chart_is_cached_by_content(app):
+    service = ChartService(workers=1)
+    key, content = service.get(hourly_points(1), fmt='svg')
+    assert content.startswith(b'<?xml')
+    assert service.get(hourly_points(1), fmt='svg') == (key, content)
+    assert service.get(hourly_points(2), fmt='svg')[0] != key
+
+
+def test_pool_is_replaced_after_worker_dies(app):
+    service = ChartService(workers=1)
+    service.get(hourly_points(1), fmt='svg')
+    broken = service._executor
+    for pid in list(broken._processes):
+        os.kill(pid, signal.SIGKILL)
+
+    key, content = service.get(hourly_points(3), fmt='svg')
+    assert content.startswith(b'<?xml')
+    assert service._executor is not broken
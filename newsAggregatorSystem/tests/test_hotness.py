@@ -0,0 +1,105 @@
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from app.hot_analysis import analyzer as analyzer_module
+from app.hot_analysis.analyzer import HotnessAnalyzer
+from app.models import News
+from app.news_fetcher.fetcher import NewsFetcher
+from config import Config
+from conftest import news_row
+
+
+def scraped_items(count, now):
+    return [
+        {'title': f'北京暴雨导致交通中断第{i}报', 'url': f'https://news.example.com/{i}', 'source': '腾讯新闻',
+         'publish_time': now - timedelta(minutes=i), 'category': '社会', 'content': '正文'}
+        for i in range(count)
+    ]
+
+
+def test_inserted_news_have_log_scores(db):
+    now = datetime.utcnow()
+    NewsFetcher().insert_news_batch(scraped_items(3, now))
+
+    rows = db.session.query(News).order_by(News.id).all()
+    assert len(rows) == 3
+    assert [row.hot_log_score for row in rows] == HotnessAnalyzer().calculate_hot_log_score_batch(rows)
+
+    ranked = HotnessAnalyzer().top_hot_news(days=1, log_mode=True, refresh=False)
+    assert [item['id'] for item in ranked] == [row.id for row in rows]
+
+
+def test_non_incremental_rescore_writes_log_scores(db, monkeypatch):
+    monkeypatch.setattr(Config, 'HOTNESS_INCREMENTAL', False)
+    now = datetime.utcnow()
+    NewsFetcher().insert_news_batch(scraped_items(2, now))
+    db.session.execute(News.__table__.update().values(hot_log_score=None, view_count=500))
+    db.session.commit()
+
+    analyzer = HotnessAnalyzer()
+    assert analyzer.ensure_scores(now - timedelta(days=1), now) == 2
+    rows = db.session.query(News).order_by(News.id).all()
+    assert [row.hot_log_score for row in rows] == analyzer.calculate_hot_log_score_batch(rows)
+
+
+class FrozenDatetime(datetime):
+    """utcnow固定的datetime，逐条计算与批量计算使用同一时刻"""
+
+    frozen = datetime(2026, 3, 1, 12, 0, 0)
+
+    @classmethod
+    def utcnow(cls):
+        return cls.frozen
+
+
+def test_batch_hotness_matches_scalar(monkeypatch):
+    monkeypatch.setattr(analyzer_module, 'datetime', FrozenDatetime)
+    now = FrozenDatetime.frozen
+    rng = random.Random(7)
+    sources = ['腾讯新闻', '央视新闻', 'Reuters', '未知来源']
+    # 覆盖每个衰减阶梯的边界及其两侧
+    ages = [timedelta(hours=hours) + delta for hours in (0, 1, 6, 24, 72, 200)
+            for delta in (timedelta(0), timedelta(microseconds=1), -timedelta(microseconds=1))]
+    ages += [timedelta(seconds=rng.randrange(0, 400 * 3600)) for _ in range(200)]
+    rows = [
+        SimpleNamespace(
+            view_count=rng.randrange(0, 50000), comment_count=rng.randrange(0, 3000),
+            share_count=rng.randrange(0, 1000), publish_time=now - age,
+            source=rng.choice(sources), title='标' * rng.randrange(1, 80)
+        )
+        for age in ages if age >= timedelta(0)
+    ]
+
+    analyzer = HotnessAnalyzer()
+    assert analyzer.calculate_hotness_batch(rows, now=now) == [analyzer.calculate_hotness(row) for row in rows]
+    assert analyzer.calculate_hot_log_score_batch(rows) == [analyzer.calculate_hot_log_score(row) for row in rows]
+
+
+def test_refresh_rescores_only_dirty_and_due_news(db):
+    now = datetime.utcnow()
+    published = now - timedelta(hours=2)
+    db.session.execute(News.__table__.insert(), [
+        news_row(1, publish_time=published, view_count=900, hotness_dirty=True, hotness_due_at=None),
+        news_row(2, publish_time=published, view_count=900, hotness_dirty=False,
+                 hotness_due_at=now - timedelta(minutes=1)),
+        news_row(3, publish_time=published, view_count=900, hotness_dirty=False,
+                 hotness_due_at=now + timedelta(hours=4)),
+        news_row(4, publish_time=now - timedelta(days=5), view_count=900, hotness_dirty=False,
+                 hotness_due_at=None),
+    ])
+    db.session.commit()
+
+    analyzer = HotnessAnalyzer()
+    assert analyzer.refresh_hotness(now=now) == 2
+    rows = {row.id: row for row in db.session.query(News)}
+    for news_id in (1, 2):
+        assert rows[news_id].hotness_score > 0
+        assert rows[news_id].hotness_dirty is False
+        assert rows[news_id].hotness_due_at == published + timedelta(hours=6)
+        assert rows[news_id].hot_log_score is not None
+    assert rows[3].hotness_score == rows[4].hotness_score == 0.0
+
+    assert analyzer.refresh_hotness(now=now) == 0
+    # 跨越下一个衰减阶梯后再次到期
+    assert analyzer.refresh_hotness(now=published + timedelta(hours=7)) == 3
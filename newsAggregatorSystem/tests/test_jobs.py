@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from app.models import RefreshJob
+from app.news_fetcher import jobs
+from app.news_fetcher.jobs import RefreshJobManager
+
+
+class BlockingFetcher:
+    """在release被设置前阻塞的抓取器，记录每次抓取是否为强制刷新"""
+
+    started = None
+    release = None
+    calls = []
+
+    def __init__(self):
+        self.last_refresh_stats = {'sources': {}}
+
+    def fetch_all_news(self, force=False, progress=None):
+        BlockingFetcher.calls.append(force)
+        progress.sources_planned(1)
+        BlockingFetcher.started.set()
+        BlockingFetcher.release.wait(5)
+        progress.source_finished('测试来源', {'fetched': 3, 'inserted': 2})
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    BlockingFetcher.started = threading.Event()
+    BlockingFetcher.release = threading.Event()
+    BlockingFetcher.calls = []
+    monkeypatch.setattr(jobs, 'NewsFetcher', BlockingFetcher)
+    monkeypatch.setattr(jobs.HotnessAnalyzer, 'refresh_hotness', lambda self: 0)
+    monkeypatch.setattr(jobs.hot_rank_snapshots, 'rebuild_known', lambda: 0)
+    return BlockingFetcher
+
+
+def wait_finished(db, job_id):
+    for _ in range(100):
+        db.session.expire_all()
+        job = db.session.get(RefreshJob, job_id)
+        if job.finished:
+            return job
+        threading.Event().wait(0.05)
+    raise AssertionError(f'job {job_id} did not finish')
+
+
+def test_requests_to_other_workers_merge_into_running_job(app, db, fetcher):
+    # 两个管理器模拟两个工作进程，共享数据库和实例目录
+    first, second = RefreshJobManager(), RefreshJobManager()
+    job, created = first.submit(app)
+    assert created
+    assert fetcher.started.wait(5)
+
+    merged, created = second.submit(app)
+    assert not created and merged.id == job.id
+    assert second.get(job.id).status == 'running'
+
+    fetcher.release.set()
+    finished = wait_finished(db, job.id)
+    assert finished.status == 'succeeded'
+    assert finished.to_dict()['items_inserted'] == 2
+    assert finished.merged_requests == 1
+    assert fetcher.calls == [False]
+
+
+def test_forced_request_queues_one_follow_up_job(app, db, fetcher):
+    first, second = RefreshJobManager(), RefreshJobManager()
+    job, _ = first.submit(app)
+    assert fetcher.started.wait(5)
+
+    queued, created = second.submit(app, force=True)
+    assert created and queued.status == 'queued' and queued.force
+    again, created = first.submit(app, force=True)
+    assert not created and again.id == queued.id
+
+    fetcher.release.set()
+    assert wait_finished(db, job.id).status == 'succeeded'
+    follow_up = wait_finished(db, queued.id)
+    assert follow_up.status == 'succeeded' and follow_up.merged_requests == 1
+    assert fetcher.calls == [False, True]
+
+
+def test_jobs_left_by_an_exited_worker_are_failed(app, db, fetcher):
+    stale = RefreshJob(id='stale', status='running')
+    db.session.add(stale)
+    db.session.commit()
+
+    fetcher.release.set()
+    job, created = RefreshJobManager().submit(app)
+    assert created and job.id != 'stale'
+    assert db.session.get(RefreshJob, 'stale').status == 'failed'
+    assert wait_finished(db, job.id).status == 'succeeded'
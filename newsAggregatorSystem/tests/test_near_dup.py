@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+from app.models import News
+from app.news_fetcher.near_dup import NearDuplicateIndex, signature
+from conftest import UNRELATED_TITLE, news_row
+
+
+def test_out_of_order_news_expire_by_publish_time():
+    now = datetime.utcnow()
+    index = NearDuplicateIndex(window_days=1)
+    index.add(1, signature('北京暴雨导致交通中断'), 1, now)
+    index.add(2, signature('台风海葵登陆福建沿海'), 2, now - timedelta(days=2))
+    index.add(3, signature(UNRELATED_TITLE), 3, now - timedelta(hours=1))
+
+    index.evict_expired(now)
+    assert len(index) == 2
+    assert index.find(signature('台风海葵登陆福建沿海')) is None
+
+
+def test_catch_up_loads_news_committed_after_a_higher_id(db):
+    now = datetime.utcnow()
+    db.session.execute(News.__table__.insert(), [news_row(1, story_id=1, publish_time=now)])
+    db.session.commit()
+    index = NearDuplicateIndex()
+    index.catch_up()
+
+    # 本进程入库了ID为3的新闻，另一个进程的ID为2的新闻之后才提交并分配故事ID
+    index.assign(3, signature(UNRELATED_TITLE), now)
+    db.session.execute(News.__table__.insert(), [
+        news_row(2, title='北京暴雨导致交通中断', story_id=2, publish_time=now),
+        news_row(3, title=UNRELATED_TITLE, story_id=3, publish_time=now),
+    ])
+    db.session.commit()
+
+    assert index.catch_up() == 1
+    match = index.find(signature('北京暴雨导致交通中断'))
+    assert match is not None and match[0] == 2
@@ -0,0 +1,43 @@
+from app.hot_analysis.generation import data_generation
+from app.hot_analysis.rollup import rebuild
+from app.models import News, HotnessRollup
+from conftest import news_row
+
+
+def add_news(db, **values):
+    db.session.execute(News.__table__.insert(), [news_row(1, hotness_dirty=False, **values)])
+    db.session.commit()
+    rebuild()
+
+
+def view_sum(db):
+    return db.session.query(db.func.sum(HotnessRollup.view_sum)).scalar()
+
+
+def test_repeated_interaction_does_not_bump_generation(app, db):
+    add_news(db, view_count=10)
+    client = app.test_client()
+
+    generation = data_generation.current()
+    response = client.post('/api/news/1/interact', json={'view_count': 10, 'comment_count': 0})
+    assert response.json['code'] == 200
+    assert data_generation.current() == generation
+    assert db.session.get(News, 1).hotness_dirty is False
+
+    response = client.post('/api/news/1/interact', json={'view_count': 15, 'share_count': 2})
+    assert response.json['data']['view_count'] == 15
+    assert data_generation.current() != generation
+    news = db.session.get(News, 1)
+    assert news.hotness_dirty is True and news.share_count == 2
+    assert view_sum(db) == 15
+
+
+def test_viewing_news_marks_it_dirty_and_bumps_generation(app, db):
+    add_news(db, view_count=3)
+    client = app.test_client()
+
+    generation = data_generation.current()
+    assert client.get('/api/news/1').json['data']['view_count'] == 4
+    assert data_generation.current() != generation
+    assert db.session.get(News, 1).hotness_dirty is True
+    assert view_sum(db) == 4
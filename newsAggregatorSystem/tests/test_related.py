@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from app.models import News
+from app.news_fetcher.related import RelatedNewsIndex
+from conftest import UNRELATED_TITLE, news_row
+
+
+def test_same_story_titles_are_related(same_story_titles):
+    now = datetime.utcnow()
+    first, second = same_story_titles
+    index = RelatedNewsIndex()
+    assert index.relate(1, first, now) == []
+    related = index.relate(2, second, now)
+    assert [news_id for news_id, _ in related] == [1]
+    assert related[0][1] >= index.threshold
+
+
+def test_unrelated_title_has_no_related_news():
+    now = datetime.utcnow()
+    index = RelatedNewsIndex()
+    index.relate(1, '北京暴雨导致交通中断', now)
+    assert index.relate(2, UNRELATED_TITLE, now) == []
+
+
+def test_catch_up_loads_news_committed_after_a_higher_id(db):
+    now = datetime.utcnow()
+    index = RelatedNewsIndex()
+    index.relate(3, UNRELATED_TITLE, now)
+
+    # 另一个进程的ID为2的新闻在本进程的ID为3的新闻之后才提交
+    db.session.execute(News.__table__.insert(), [
+        news_row(2, title='北京暴雨导致交通中断', publish_time=now),
+        news_row(3, title=UNRELATED_TITLE, publish_time=now),
+    ])
+    db.session.commit()
+
+    assert index.catch_up() == 1
+    assert [news_id for news_id, _ in index.relate(4, '北京暴雨导致交通中断多条线路停运', now)] == [2]
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from app.hot_analysis.analyzer import HotnessAnalyzer
+from app.hot_analysis.rollup import RollupDeltas, rebuild
+from app.models import News, HotnessRollup
+from conftest import news_row
+
+
+def insert_news(db, rows):
+    db.session.execute(News.__table__.insert(), rows)
+    deltas = RollupDeltas()
+    for row in rows:
+        deltas.add_news(row)
+    deltas.apply()
+    db.session.commit()
+
+
+def rollup_totals(db):
+    return db.session.query(
+        db.func.sum(HotnessRollup.news_count), db.func.sum(HotnessRollup.hotness_sum),
+        db.func.sum(HotnessRollup.view_sum)
+    ).one()
+
+
+def test_deltas_accumulate_into_hourly_buckets(db):
+    hour = datetime(2024, 5, 1, 8)
+    insert_news(db, [
+        news_row(1, publish_time=hour.replace(minute=5), hotness_score=10.0, view_count=3),
+        news_row(2, publish_time=hour.replace(minute=50), hotness_score=5.0, view_count=1),
+        news_row(3, publish_time=hour.replace(hour=9), hotness_score=1.0),
+    ])
+    buckets = {row.bucket: (row.news_count, row.hotness_sum, row.view_sum)
+               for row in db.session.query(HotnessRollup)}
+    assert buckets == {hour: (2, 15.0, 4), hour.replace(hour=9): (1, 1.0, 0)}
+
+
+def test_rebuild_matches_incremental_rollup(db):
+    insert_news(db, [news_row(i, hotness_score=float(i), view_count=i) for i in range(1, 6)])
+    incremental = tuple(rollup_totals(db))
+    rebuild()
+    assert tuple(rollup_totals(db)) == incremental == (5, 15.0, 15)
+
+
+def test_concurrent_rescore_rolls_up_each_change_once(db):
+    insert_news(db, [news_row(1, hotness_score=10.0), news_row(2, hotness_score=20.0)])
+    stale_rows = db.session.query(
+        News.id, News.source, News.category, News.publish_time, News.hotness_score
+    ).order_by(News.id).all()
+    updates = [{'news_id': 1, 'hotness_score': 30.0}, {'news_id': 2, 'hotness_score': 25.0}]
+
+    analyzer = HotnessAnalyzer()
+    assert analyzer.write_rescored(stale_rows, updates) == 2
+    # 第二个重算进程读取的是同一份旧分数，写入和汇总都应被跳过
+    assert analyzer.write_rescored(stale_rows, updates) == 0
+
+    scores = [score for score, in db.session.query(News.hotness_score).order_by(News.id)]
+    assert scores == [30.0, 25.0]
+    assert rollup_totals(db)[1] == 55.0
+
+
+def test_rescore_skips_only_rows_written_concurrently(db):
+    insert_news(db, [news_row(1, hotness_score=10.0), news_row(2, hotness_score=20.0)])
+    query = db.session.query(News.id, News.source, News.category, News.publish_time, News.hotness_score)
+    stale_rows = query.order_by(News.id).all()
+
+    analyzer = HotnessAnalyzer()
+    analyzer.write_rescored(stale_rows[:1], [{'news_id': 1, 'hotness_score': 12.0}])
+    updates = [{'news_id': 1, 'hotness_score': 15.0}, {'news_id': 2, 'hotness_score': 22.0}]
+    assert analyzer.write_rescored(stale_rows, updates) == 1
+
+    scores = [score for score, in db.session.query(News.hotness_score).order_by(News.id)]
+    assert scores == [12.0, 22.0]
+    assert rollup_totals(db)[1] == 34.0
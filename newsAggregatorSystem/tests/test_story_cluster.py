@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from app.models import News
+from app.news_fetcher.story_cluster import StoryClusterIndex
+from conftest import UNRELATED_TITLE, news_row
+
+
+def test_same_story_titles_join_existing_cluster(same_story_titles):
+    now = datetime.utcnow()
+    first, second = same_story_titles
+    index = StoryClusterIndex()
+    assert index.assign(1, first, now) == 1
+    assert index.assign(2, second, now) == 1
+
+
+def test_unrelated_title_starts_new_cluster():
+    now = datetime.utcnow()
+    index = StoryClusterIndex()
+    index.assign(1, '北京暴雨导致交通中断', now)
+    assert index.assign(2, UNRELATED_TITLE, now) == 2
+
+
+def test_catch_up_loads_news_committed_after_a_higher_id(db):
+    now = datetime.utcnow()
+    index = StoryClusterIndex()
+    index.assign(3, UNRELATED_TITLE, now)
+
+    # 另一个进程的ID为2的新闻在本进程的ID为3的新闻之后才分配簇ID
+    db.session.execute(News.__table__.insert(), [
+        news_row(2, title='北京暴雨导致交通中断', cluster_id=2, publish_time=now),
+        news_row(3, title=UNRELATED_TITLE, cluster_id=3, publish_time=now),
+    ])
+    db.session.commit()
+
+    assert index.catch_up() == 1
+    assert index.assign(4, '北京暴雨导致交通中断多条线路停运', now) == 2
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from app.news_fetcher.politeness import (
+    CircuitBreaker, BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN
+)
+from app.news_fetcher.transport import HttpTransport, CircuitOpenError
+
+URL = 'https://news.example.com/a'
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """按顺序返回预设的响应或抛出预设的异常"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+
+    def get(self, url, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+
+def make_transport(*outcomes):
+    transport = HttpTransport(max_retries=0)
+    transport.session = FakeSession(outcomes)
+    return transport
+
+
+def open_breaker(breaker, now):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure(now)
+    assert breaker.state == BREAKER_OPEN
+
+
+def test_breaker_opens_after_threshold_and_allows_one_trial():
+    now = datetime.utcnow()
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=60)
+    breaker.record_failure(now)
+    breaker.record_failure(now)
+    assert breaker.state == BREAKER_CLOSED
+    breaker.record_failure(now)
+    assert breaker.state == BREAKER_OPEN
+    assert not breaker.allow(now + timedelta(seconds=30))
+
+    later = now + timedelta(seconds=61)
+    assert breaker.allow(later)
+    assert breaker.state == BREAKER_HALF_OPEN
+    assert not breaker.allow(later)
+
+
+def test_half_open_trial_success_closes_and_failure_reopens():
+    now = datetime.utcnow()
+    later = now + timedelta(seconds=61)
+
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    open_breaker(breaker, now)
+    assert breaker.allow(later)
+    breaker.record_success()
+    assert breaker.state == BREAKER_CLOSED
+    assert breaker.consecutive_failures == 0
+
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60)
+    open_breaker(breaker, now)
+    assert breaker.allow(later)
+    breaker.record_failure(later)
+    assert breaker.state == BREAKER_OPEN
+    assert breaker.open_until == later + timedelta(seconds=60)
+
+
+def test_request_error_during_trial_releases_it():
+    transport = make_transport(requests.TooManyRedirects('loop'), 200)
+    breaker = transport.breaker('news.example.com')
+    open_breaker(breaker, datetime.utcnow() - timedelta(days=1))
+
+    with pytest.raises(requests.TooManyRedirects):
+        transport.get(URL)
+    assert breaker.state == BREAKER_HALF_OPEN
+
+    assert transport.get(URL).status_code == 200
+    assert breaker.state == BREAKER_CLOSED
+
+
+def test_only_host_failures_trip_breaker():
+    transport = make_transport(requests.exceptions.InvalidURL('bad'), 429, 503)
+    transport.breaker('news.example.com').failure_threshold = 1
+
+    with pytest.raises(requests.exceptions.InvalidURL):
+        transport.get(URL)
+    assert transport.get(URL).status_code == 429
+    assert transport.breaker('news.example.com').state == BREAKER_CLOSED
+
+    assert transport.get(URL).status_code == 503
+    assert transport.breaker('news.example.com').state == BREAKER_OPEN
+    with pytest.raises(CircuitOpenError):
+        transport.get(URL)
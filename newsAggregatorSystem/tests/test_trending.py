@@ -0,0 +1,77 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app.hot_analysis.trending import CountMinSketch, HeavyHitterBucket, TrendingTerms, title_terms
+
+
+def zipf_stream(terms, length, seed=7):
+    """按1/排名的频率抽取的词序列"""
+    rng = random.Random(seed)
+    return rng.choices(terms, weights=[1 / rank for rank in range(1, len(terms) + 1)], k=length)
+
+
+def test_sketch_never_underestimates():
+    sketch = CountMinSketch(width=64, depth=4)
+    counts = Counter(zipf_stream([f'term{i}' for i in range(500)], 5000))
+    for term, count in counts.items():
+        sketch.add(term, count)
+
+    errors = [sketch.estimate(term) - count for term, count in counts.items()]
+    assert min(errors) >= 0
+    assert sketch.estimate('term0') - counts['term0'] <= 5000 * 2 / 64
+
+
+def test_add_returns_current_estimate():
+    sketch = CountMinSketch(width=1024, depth=4)
+    assert sketch.add('暴雨') == 1
+    assert sketch.add('暴雨', 2) == 3
+    assert sketch.estimate('暴雨') == 3
+    assert sketch.estimate('台风') == 0
+
+
+def test_bucket_keeps_heavy_hitters_within_capacity():
+    terms = [f'term{i}' for i in range(1000)]
+    stream = zipf_stream(terms, 20000)
+    bucket = HeavyHitterBucket(width=2048, depth=4, capacity=20)
+    for term in stream:
+        bucket.add_terms([term])
+
+    assert bucket.documents == 20000
+    assert len(bucket.candidates) == 20
+    assert len(bucket._heap) <= 4 * 20
+    top = [term for term, _ in Counter(stream).most_common(10)]
+    assert set(top) <= set(bucket.candidates)
+    for term, estimate in bucket.candidates.items():
+        assert estimate <= bucket.sketch.estimate(term)
+
+
+def test_title_terms_skip_source_prefix():
+    assert title_terms('腾讯新闻：暴雨') == {'暴雨'}
+    assert title_terms('Apple发布iPhone') == {'发布', 'apple', 'iphone'}
+
+
+def test_top_terms_ranks_bursts_over_steady_terms():
+    now = datetime(2024, 5, 1, 12, 30)
+    detector = TrendingTerms(window_hours=2, baseline_hours=8, bucket_minutes=60)
+    for hours in range(1, 9):
+        for _ in range(2):
+            detector.observe('股市收盘', now - timedelta(hours=hours + 2), now)
+    for minutes in range(6):
+        detector.observe('股市收盘', now - timedelta(minutes=10 * minutes), now)
+        detector.observe('台风登陆', now - timedelta(minutes=10 * minutes), now)
+
+    scores = {item['term']: item['score'] for item in detector.top_terms(limit=20, now=now, min_count=3)}
+    terms = list(scores)
+    assert terms[0] == '台风登'
+    assert scores['股市收'] < scores['台风登'] / 2
+    # 被同样热的三元组包含的二元组不单独列出
+    assert '台风' not in terms
+
+
+def test_observe_ignores_news_older_than_retention():
+    now = datetime(2024, 5, 1, 12)
+    detector = TrendingTerms(window_hours=2, baseline_hours=4, bucket_minutes=60)
+    detector.observe('旧闻标题', now - timedelta(hours=7), now)
+    detector.observe('新闻标题', now, now)
+    assert detector.stats()['documents'] == 1
@@ -0,0 +1,35 @@
+import pytest
+
+from app.news_fetcher.urls import canonicalize_url, url_hash
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTPS://News.Example.com:443/a/b/', 'https://news.example.com/a/b'),
+    ('http://news.example.com:80/a', 'http://news.example.com/a'),
+    ('https://news.example.com:8443/a#comments', 'https://news.example.com:8443/a'),
+    ('https://news.example.com/?b=2&a=1', 'https://news.example.com/?a=1&b=2'),
+    ('https://news.example.com/a?utm_source=x&spm=1&share_token=t&id=7', 'https://news.example.com/a?id=7'),
+    ('https://news.example.com/a?from=home&ref=top', 'https://news.example.com/a?from=home&ref=top'),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+def test_relative_url_is_resolved_against_base():
+    assert canonicalize_url('../b/?utm_medium=feed', 'https://news.example.com/a/list/') == \
+        'https://news.example.com/a/b'
+
+
+@pytest.mark.parametrize('url', ['', None, 'mailto:editor@example.com', 'javascript:void(0)',
+                                 'https://news.example.com:99999/a', '/relative/only'])
+def test_unusable_urls_are_rejected(url):
+    assert canonicalize_url(url) is None
+
+
+def test_url_hash_treats_http_and_https_as_the_same_link():
+    http = canonicalize_url('http://news.example.com/a?utm_source=x')
+    https = canonicalize_url('https://news.example.com/a/')
+    assert http != https
+    assert url_hash(http) == url_hash(https)
+    assert len(url_hash(https)) == 40
+    assert url_hash(https) != url_hash(canonicalize_url('https://news.example.com/b'))